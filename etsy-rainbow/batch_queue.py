@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Distributed batch generation: one producer, many workers, one shared queue.
+
+The producer expands a batch spec into a job queue (see job_queue.py); each
+worker process claims jobs as it has room for them and runs them through the
+usual BatchRunner (Krea generation, polling, downloads). Workers heartbeat
+their leases, so a crashed worker's jobs go back to the queue after
+``--visibility`` seconds, and the Krea job id is stored with the job on
+submission, so whoever picks it up re-attaches instead of paying again.
+
+Usage:
+    python3 batch_queue.py enqueue --spec batch3.json
+    python3 batch_queue.py work --spec batch3.json -j 8        # run N of these
+    python3 batch_queue.py status --spec batch3.json
+    python3 batch_queue.py results --spec batch3.json          # -> results.json
+
+The queue defaults to ``<output_dir>/queue.db``; pass ``--queue`` to share one
+elsewhere (any open_queue() URL).
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'skills', 'krea-api'))
+from krea_api import KreaAPI
+from batch_runner import BatchRunner
+from batch_spec import BatchSpec
+from job_queue import Claim, JobQueue, open_queue
+
+
+class QueueWorker:
+    """Pulls jobs from a JobQueue into a BatchRunner until the queue is drained."""
+
+    def __init__(
+        self,
+        api,
+        queue: JobQueue,
+        output_dir: str,
+        worker_id: Optional[str] = None,
+        visibility: float = 600.0,
+        retry_failed_after: Optional[float] = None,
+        **runner_options,
+    ):
+        """
+        Args:
+            api: A KreaAPI instance
+            queue: Shared job queue
+            output_dir: Local directory images are saved into
+            worker_id: Name recorded on claims (default: host-pid)
+            visibility: Lease length in seconds; heartbeats renew it every third
+            retry_failed_after: Put failed jobs back on the queue after this
+                many seconds, until the queue's max_attempts is used up
+            **runner_options: Passed to BatchRunner (concurrency, postprocess, ...)
+        """
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.visibility = visibility
+        self.retry_failed_after = retry_failed_after
+        self.runner = BatchRunner(
+            api, output_dir, journal=_QueueJournal(self), on_result=self._on_result, **runner_options
+        )
+        self.processed = 0
+        self._lock = threading.Lock()
+        self._held: Dict[int, Claim] = {}      # runner index -> claim
+        self._by_key: Dict[str, Claim] = {}
+        self._stop = threading.Event()
+
+    def run(self, wait: bool = False, idle_interval: float = 10.0) -> int:
+        """
+        Process jobs until none are claimable.
+
+        With ``wait``, keep going while other workers still hold leases
+        (their jobs come back if they die). Returns how many jobs finished.
+        """
+        heartbeat = threading.Thread(target=self._heartbeat, name="queue-heartbeat", daemon=True)
+        heartbeat.start()
+        try:
+            while True:
+                self.runner.run(self._claims())
+                if not wait:
+                    return self.processed
+                counts = self.queue.counts()
+                if not counts['ready'] and not counts['claimed']:
+                    return self.processed
+                time.sleep(idle_interval)
+        finally:
+            self._stop.set()
+            heartbeat.join()
+
+    def _claims(self) -> Iterator[dict]:
+        # Pulled by the runner only when it has a free slot, so a worker
+        # never leases more than it is working on.
+        index = 0
+        with self._lock:
+            self._held.clear()
+        while True:
+            claim = self.queue.claim(self.worker_id, self.visibility)
+            if claim is None:
+                return
+            with self._lock:
+                self._held[index] = claim
+                self._by_key[claim.key] = claim
+            index += 1
+            yield {**claim.job, 'key': claim.key}
+
+    def _on_result(self, index: int, entry: dict):
+        with self._lock:
+            claim = self._held.pop(index, None)
+            if claim is not None:
+                self._by_key.pop(claim.key, None)
+        if claim is None:
+            return
+        result = {k: v for k, v in entry.items() if k != '_index'}
+        if 'error' not in result:
+            ok = self.queue.complete(claim, result)
+        elif self.retry_failed_after is not None:
+            ok = self.queue.fail(claim, result['error'], retry_after=self.retry_failed_after)
+        else:
+            ok = self.queue.fail(claim, result['error'], result=result)
+        if not ok:
+            print(f"  ⚠️ Lost the lease on {claim.key}; another worker owns it now")
+        with self._lock:
+            self.processed += 1
+
+    def _heartbeat(self):
+        while not self._stop.wait(self.visibility / 3):
+            with self._lock:
+                claims = list(self._held.values())
+            for claim in claims:
+                if not self.queue.heartbeat(claim, self.visibility):
+                    print(f"  ⚠️ Lease on {claim.key} expired before it could be renewed")
+
+
+class _QueueJournal:
+    """
+    BatchRunner journal backed by the queue: progress is stored on the job,
+    so it follows the job to whichever worker claims it next.
+    """
+
+    def __init__(self, worker: QueueWorker):
+        self.worker = worker
+
+    def record(self, key: str, event: str, **fields):
+        with self.worker._lock:
+            claim = self.worker._by_key.get(key)
+        if claim is None:
+            return
+        entry = {'event': event, 'ts': time.time(), **fields}
+        if event == 'submitted':
+            # Same folding as JobJournal.replay(): a submission starts afresh.
+            claim.progress = entry
+        else:
+            claim.progress.update(entry)
+        self.worker.queue.save_progress(claim, claim.progress)
+
+    def replay(self) -> "_QueueJournal":
+        return self
+
+    def get(self, key: str) -> Optional[dict]:
+        with self.worker._lock:
+            claim = self.worker._by_key.get(key)
+        return claim.progress if claim and claim.progress else None
+
+    def close(self):
+        pass
+
+
+def _open(args) -> Tuple[Optional[BatchSpec], JobQueue, Optional[str]]:
+    spec = BatchSpec.load(args.spec) if args.spec else None
+    output_dir = args.output_dir or (spec.output_dir if spec else None)
+    url = args.queue or (os.path.join(output_dir, 'queue.db') if output_dir else None)
+    if not url:
+        raise SystemExit("Pass --spec (with an output_dir), --output-dir or --queue")
+    return spec, open_queue(url), output_dir
+
+
+def cmd_enqueue(args):
+    spec, queue, _ = _open(args)
+    if spec is None:
+        raise SystemExit("enqueue needs --spec")
+    start = time.time()
+    added = queue.put_many(spec, key=BatchRunner._key)
+    print(f"Enqueued {added} new jobs in {time.time() - start:.1f}s; {queue.counts()}")
+
+
+def cmd_work(args):
+    spec, queue, output_dir = _open(args)
+    if not output_dir:
+        raise SystemExit("work needs --output-dir (or a spec with output_dir)")
+    settings = {'concurrency': 4, 'poll_interval': 3.0, 'timeout': 180, **(spec.runner if spec else {})}
+    if args.concurrency is not None:
+        settings['concurrency'] = args.concurrency
+
+    worker = QueueWorker(
+        KreaAPI(),
+        queue,
+        output_dir,
+        worker_id=args.worker_id,
+        visibility=args.visibility,
+        retry_failed_after=args.retry_failed_after,
+        **settings,
+    )
+    print(f"Worker {worker.worker_id}: {settings['concurrency']} jobs in flight, output in {output_dir}")
+    processed = worker.run(wait=args.wait)
+    print(f"Worker {worker.worker_id} finished {processed} jobs; {queue.counts()}")
+
+
+def cmd_status(args):
+    _, queue, _ = _open(args)
+    counts = queue.counts()
+    print(json.dumps(counts))
+
+
+def cmd_results(args):
+    _, queue, output_dir = _open(args)
+    path = args.output or os.path.join(output_dir or '.', 'results.json')
+    results = list(queue.results())
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote {len(results)} results to {path}")
+
+
+def cmd_requeue(args):
+    _, queue, _ = _open(args)
+    print(f"Requeued {queue.requeue_failed()} failed jobs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a batch spec across several worker processes")
+    parser.add_argument("--spec", help="Batch spec (see batch_spec.py)")
+    parser.add_argument("--queue", help="Queue URL or path (default: <output_dir>/queue.db)")
+    parser.add_argument("--output-dir", help="Where images go (default: the spec's output_dir)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("enqueue", help="Add the spec's jobs to the queue").set_defaults(func=cmd_enqueue)
+
+    p = sub.add_parser("work", help="Claim and run jobs until the queue is empty")
+    p.add_argument("--concurrency", "-j", type=int, help="Krea jobs in flight in this worker")
+    p.add_argument("--worker-id", help="Name for this worker's claims (default: host-pid)")
+    p.add_argument("--visibility", type=float, default=600.0,
+                   help="Seconds before an unrenewed lease is handed to another worker (default: 600)")
+    p.add_argument("--retry-failed-after", type=float,
+                   help="Requeue failed jobs after this many seconds (up to the queue's attempt limit)")
+    p.add_argument("--wait", action="store_true",
+                   help="Stay up until every job is finished, to pick up jobs from crashed workers")
+    p.set_defaults(func=cmd_work)
+
+    sub.add_parser("status", help="Print job counts by state").set_defaults(func=cmd_status)
+
+    p = sub.add_parser("results", help="Write all finished results to a JSON file")
+    p.add_argument("--output", help="File to write (default: <output_dir>/results.json)")
+    p.set_defaults(func=cmd_results)
+
+    sub.add_parser("requeue", help="Put failed jobs back on the queue").set_defaults(func=cmd_requeue)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
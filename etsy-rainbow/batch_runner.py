@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Concurrent batch runner for Krea image generation.
+
+Keeps up to ``concurrency`` Krea jobs in flight at once, polls them all from
+a single JobTracker and hands finished jobs to a separate download pool, so
+downloads overlap with generation. Images land in a content-addressed
+ImageStore under ``output_dir``; with a PostProcessor, each saved image is
+resized / converted / hashed on a process pool as soon as it arrives, and
+with a dedupe.HashIndex too, near-duplicates of anything generated before
+are flagged (or dropped) as their hash comes in. Needs skills/krea-api on
+sys.path.
+
+Usage as a module:
+    from batch_runner import BatchRunner
+    runner = BatchRunner(api, output_dir="batch2", concurrency=8)
+    results = runner.run(jobs)
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait as futures_wait
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from krea_api import JobTracker
+from downloader import ImageStore
+
+
+class BatchRunner:
+    """Run many generation jobs with bounded concurrency."""
+
+    def __init__(
+        self,
+        api,
+        output_dir: str,
+        concurrency: int = 4,
+        model: str = "imagen-4",
+        width: int = 1024,
+        height: int = 1024,
+        poll_interval: float = 3.0,
+        timeout: float = 180.0,
+        download_workers: Optional[int] = None,
+        webhook=None,
+        journal=None,
+        postprocess=None,
+        dedupe=None,
+        skip_duplicates: bool = False,
+        on_result: Optional[Callable[[int, dict], None]] = None,
+    ):
+        """
+        Args:
+            api: A KreaAPI instance
+            output_dir: Directory images are saved into
+            concurrency: Maximum number of Krea jobs in flight at once
+            model: Default model for jobs that don't set one
+            width: Default image width
+            height: Default image height
+            poll_interval: Shortest gap between polls of one job
+            timeout: Seconds to wait for a single job before giving up
+            download_workers: Size of the download pool (default: concurrency)
+            webhook: Optional started krea_webhook.WebhookListener; jobs are
+                created with its URL and polling becomes a slow fallback
+            journal: Optional journal.JobJournal; every state change is
+                logged to it and a rerun resumes from its contents
+            postprocess: Optional postprocess.PostProcessor; its outputs are
+                added to each result as ``variants`` (and ``phash``)
+            dedupe: Optional dedupe.HashIndex; needs a postprocess with
+                ``phash=True``. Near-duplicates get ``duplicate_of``
+            skip_duplicates: Also delete near-duplicate images (and their
+                variants) and keep them out of the index
+            on_result: Called with ``(index, entry)`` as soon as each job's
+                result is final (after post-processing), from worker threads
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        if dedupe is not None and not (postprocess and postprocess.phash):
+            raise ValueError("dedupe needs a PostProcessor with phash=True")
+
+        self.api = api
+        self.output_dir = output_dir
+        self.concurrency = concurrency
+        self.model = model
+        self.width = width
+        self.height = height
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.download_workers = download_workers or concurrency
+        self.webhook = webhook
+        self.journal = journal
+        self.postprocess = postprocess
+        self.dedupe = dedupe
+        self.skip_duplicates = skip_duplicates
+        self.on_result = on_result
+        self.store = ImageStore(output_dir)
+
+        self._lock = threading.Lock()
+        self._results: List[dict] = []
+        self._post_futures: List[Future] = []
+
+    def run(self, jobs: Iterable[dict]) -> List[dict]:
+        """
+        Generate and download every job.
+
+        Each job is a dict with at least ``prompt`` and ``filename``; any other
+        keys (set_id, theme, style, variation, ...) are copied into the result.
+        Jobs are consumed lazily, so ``jobs`` may be a generator.
+
+        With a journal, each job is matched to its previous run by ``key``
+        (default: ``filename``): finished downloads are reused, completed
+        jobs are only downloaded, and jobs still running on Krea are
+        re-attached instead of submitted again.
+
+        Returns:
+            List of result dicts in input order. Successful entries have
+            ``local_file``; failed ones have ``error``. With post-processing,
+            entries also get ``variants`` / ``phash``, or ``postprocess_error``;
+            near-duplicates get ``duplicate_of`` / ``duplicate_distance`` (and
+            lose ``local_file`` if skipped).
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._results = []
+        self._post_futures = []
+        tracker = JobTracker(
+            self.api,
+            min_interval=self.poll_interval,
+            max_interval=max(self.poll_interval, 15.0),
+            timeout=self.timeout,
+            webhook=self.webhook,
+        )
+        in_flight: Dict[str, Tuple[int, dict]] = {}
+        queue = enumerate(jobs)
+        previous = self.journal.replay() if self.journal else {}
+
+        def fill():
+            # Top up to `concurrency` jobs in flight; submissions that fail
+            # are recorded and the next job is tried instead.
+            while len(tracker) < self.concurrency:
+                try:
+                    index, job = next(queue)
+                except StopIteration:
+                    return
+                state = previous.get(self._key(job))
+                if state and self._resume(index, job, state, tracker, in_flight, downloads):
+                    continue
+                job_id = self._submit(index, job)
+                if job_id:
+                    tracker.add(job_id, model=job.get('model', self.model))
+                    in_flight[job_id] = (index, job)
+
+        with ThreadPoolExecutor(self.download_workers, thread_name_prefix="download") as downloads:
+            fill()
+            for done in tracker.as_completed():
+                index, job = in_flight.pop(done['job_id'])
+                self._finish(index, job, done, downloads)
+                fill()
+
+        # Downloads are done; wait for whatever post-processing is still running.
+        futures_wait(self._post_futures)
+
+        self._results.sort(key=lambda r: r.pop('_index'))
+        return self._results
+
+    def _record(self, index: int, entry: dict, final: bool = True):
+        entry['_index'] = index
+        with self._lock:
+            self._results.append(entry)
+        if final and self.on_result:
+            self.on_result(index, entry)
+
+    def _log(self, job: dict, event: str, **fields):
+        if self.journal:
+            self.journal.record(self._key(job), event, **fields)
+
+    @staticmethod
+    def _key(job: dict) -> str:
+        return job.get('key') or job['filename']
+
+    @staticmethod
+    def _meta(job: dict) -> dict:
+        return {k: v for k, v in job.items() if k not in ('prompt', 'filename', 'label')}
+
+    def _submit(self, index: int, job: dict) -> Optional[str]:
+        """Create the Krea job; returns its id, or None if submission failed."""
+        label = job.get('label') or job['filename']
+        try:
+            created = self.api.generate_image(
+                prompt=job['prompt'],
+                model=job.get('model', self.model),
+                width=job.get('width', self.width),
+                height=job.get('height', self.height),
+                seed=job.get('seed'),
+                **{k: job[k] for k in ('steps', 'guidance_scale') if k in job},
+                webhook_url=self.webhook.url if self.webhook else None,
+            )
+        except Exception as e:
+            print(f"  [{label}] ❌ Error: {e}")
+            self._record(index, {**self._meta(job), 'error': str(e)})
+            return None
+        print(f"  [{label}] Job: {created['job_id']}")
+        self._log(job, 'submitted', job_id=created['job_id'], model=job.get('model', self.model))
+        return created['job_id']
+
+    def _resume(self, index: int, job: dict, state: dict, tracker: JobTracker,
+                in_flight: Dict[str, Tuple[int, dict]], downloads: ThreadPoolExecutor) -> bool:
+        """Pick a job up from its journaled state; False if it needs a fresh submission."""
+        label = job.get('label') or job['filename']
+        event = state.get('event')
+
+        result = state.get('result') or {}
+        if event == 'downloaded' and result.get('duplicate_of') and 'local_file' not in result:
+            print(f"  [{label}] ⏭️ Already skipped as a near-duplicate of {result['duplicate_of']}")
+            self._record(index, dict(result))
+            return True
+
+        if event == 'downloaded' and os.path.exists(result.get('local_file', '')):
+            print(f"  [{label}] ⏭️ Already downloaded")
+            entry = dict(result)
+            self._record(index, entry, final=not self.postprocess)
+            self._postprocess(job, entry, resumed=True)
+            return True
+
+        if event in ('completed', 'downloaded', 'download_failed') and state.get('url'):
+            print(f"  [{label}] ⏭️ Already generated, downloading")
+            downloads.submit(self._download, index, job, self._meta(job), state['url'], state.get('job_id'))
+            return True
+
+        if event == 'submitted' and state.get('job_id'):
+            print(f"  [{label}] 🔁 Re-attached to job {state['job_id']}")
+            tracker.add(state['job_id'], model=state.get('model'), submitted_at=state['ts'])
+            in_flight[state['job_id']] = (index, job)
+            return True
+
+        return False
+
+    def _finish(self, index: int, job: dict, done: dict, downloads: ThreadPoolExecutor):
+        """Handle a job that left the tracker; queue its download if it completed."""
+        meta = self._meta(job)
+        label = job.get('label') or job['filename']
+
+        status = done.get('status')
+        if status != 'completed':
+            error = done.get('error') or f"Job {status}: {done}"
+            if status == 'timeout':
+                error = f"Job {done['job_id']} did not complete within {self.timeout}s"
+            print(f"  [{label}] ❌ Error: {error}")
+            self._log(job, 'failed', error=error)
+            self._record(index, {**meta, 'error': error})
+            return
+
+        urls = done.get('result', {}).get('urls', [])
+        if not urls:
+            print(f"  [{label}] ⚠️ No URLs in result")
+            self._log(job, 'failed', error='no_urls')
+            self._record(index, {**meta, 'error': 'no_urls'})
+            return
+        self._log(job, 'completed', url=urls[0])
+
+        # Downloading happens on its own pool so the scheduler can keep
+        # polling and submitting while the file transfers.
+        downloads.submit(self._download, index, job, meta, urls[0], done['job_id'], done.get('local_file'))
+
+    def _download(self, index: int, job: dict, meta: dict, url: str, job_id: Optional[str] = None,
+                  local_file: Optional[str] = None):
+        filepath = os.path.join(self.output_dir, job['filename'])
+        try:
+            if local_file and os.path.exists(local_file):
+                # A result-cache hit brings its image along; the URL may have expired.
+                obj = self.store.put(local_file, filepath, url)
+            else:
+                cached = self.store.has(url)
+                started = time.time()
+                obj = self.store.fetch(url, filepath)
+                telemetry = getattr(self.api, 'telemetry', None)
+                if telemetry and not cached:
+                    telemetry.observe('download_seconds', job.get('model', self.model), time.time() - started)
+                if job_id:
+                    # Lets a rerun of the same seeded job skip Krea entirely.
+                    self.api.cache_file(job_id, filepath)
+        except Exception as e:
+            print(f"  ❌ Download failed: {e}")
+            self._log(job, 'download_failed', url=url, error=str(e))
+            self._record(index, {**meta, 'url': url, 'error': 'download_failed'})
+            return
+        print(f"  ✅ Saved: {job['filename']}")
+        entry = {
+            **meta,
+            'prompt': job['prompt'],
+            'url': url,
+            'local_file': filepath,
+            'sha256': os.path.splitext(os.path.basename(obj))[0],
+        }
+        self._log(job, 'downloaded', url=url, result=entry)
+        self._record(index, entry, final=not self.postprocess)
+        self._postprocess(job, entry)
+
+    def _postprocess(self, job: dict, entry: dict, resumed: bool = False):
+        """Queue a saved image for post-processing; its outputs merge into ``entry`` when ready."""
+        if not self.postprocess:
+            return
+        handled: Future = Future()
+        with self._lock:
+            self._post_futures.append(handled)
+        future = self.postprocess.submit(entry['local_file'])
+        future.add_done_callback(lambda f: self._postprocessed(job, entry, f, handled, resumed))
+
+    def _postprocessed(self, job: dict, entry: dict, future: Future, handled: Future, resumed: bool):
+        try:
+            try:
+                entry.update(future.result())
+            except Exception as e:
+                print(f"  ❌ Post-processing failed for {entry['local_file']}: {e}")
+                entry['postprocess_error'] = str(e)
+                return
+            if self.dedupe is not None and entry.get('phash'):
+                # A resumed image was already checked if it has a verdict or is
+                # indexed; checking it again would match it against its own pair.
+                checked = resumed and ('duplicate_of' in entry or entry['local_file'] in self.dedupe)
+                if not checked:
+                    self._check_duplicate(job, entry)
+        finally:
+            try:
+                if self.on_result:
+                    self.on_result(entry['_index'], entry)
+            finally:
+                handled.set_result(None)
+
+    def _check_duplicate(self, job: dict, entry: dict):
+        match = self.dedupe.check_and_add(
+            entry['local_file'], entry['phash'], add_duplicates=not self.skip_duplicates
+        )
+        if not match:
+            return
+        distance, other = match
+        entry['duplicate_of'] = other
+        entry['duplicate_distance'] = distance
+        name = os.path.basename(entry['local_file'])
+        if not self.skip_duplicates:
+            print(f"  ♻️ {name} looks like {other} (distance {distance})")
+        else:
+            print(f"  ♻️ Skipped {name}: near-duplicate of {other} (distance {distance})")
+            for path in [entry.pop('local_file')] + [v['path'] for v in entry.pop('variants', [])]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        # Journaled so a resumed run keeps this verdict instead of re-deciding.
+        self._log(job, 'downloaded', url=entry.get('url'),
+                  result={k: v for k, v in entry.items() if k != '_index'})
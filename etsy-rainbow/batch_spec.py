@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Declarative batch specs for the batch runner.
+
+A spec is a JSON file that describes jobs instead of listing them. Prompt
+templates are expanded over a matrix of axes (theme, style, model, size,
+...) lazily, one job at a time, so a spec for tens of thousands of images
+costs a few lines on disk and a few axis lists in memory:
+
+    {
+      "output_dir": "batch3",
+      "defaults": {"model": "imagen-4", "width": 1024, "height": 1024},
+      "template": "{theme} in {style} style, rainbow nursery wall art, {palette}",
+      "filename": "{theme_slug}_{style_slug}_{model}_{size}_v{variation}.png",
+      "matrix": {
+        "theme": ["Geometric Chevron", {"theme": "Sunburst Rays", "palette": "warm tones"}],
+        "style": ["watercolor", "flat vector", "boho line art"],
+        "palette": ["soft pastels"],
+        "model": ["imagen-4", "flux"],
+        "size": ["1024x1024", "1024x1536"]
+      },
+      "variations": 3,
+      "exclude": [{"model": "flux", "size": "1024x1536"}]
+    }
+
+Axis values are either scalars (stored under the axis name) or dicts of
+fields, which override fields from earlier axes. A ``size`` axis of "WxH"
+strings sets ``width`` and ``height``. Every field is available to the
+templates, plus ``<field>_slug`` and ``index``. ``template``, ``filename``,
+``label``, ``key`` and ``seed`` may all be templates.
+
+Explicit prompts are supported too, as ``sets`` (prompts-batch2.json):
+
+    {"sets": [{"set_id": 1, "theme": "...", "style": "...", "prompts": ["...", ...]}]}
+
+Their prompts are used exactly as written, braces included.
+
+Paths in a spec are relative to the spec file.
+
+Usage as a module:
+    from batch_spec import BatchSpec
+    spec = BatchSpec.load("batch3.json")
+    print(spec.count(), "jobs into", spec.output_dir)
+    runner.run(iter(spec))
+"""
+
+import itertools
+import json
+import os
+import re
+from typing import Dict, Iterator, List, Optional
+
+# Runner settings a spec may carry.
+RUNNER_KEYS = ('concurrency', 'poll_interval', 'timeout')
+TEMPLATED = ('prompt', 'filename', 'label', 'key', 'seed')
+SET_TEMPLATED = tuple(k for k in TEMPLATED if k != 'prompt')
+SET_FILENAME = "set{set_id:02d}_{theme_slug}_v{variation}.png"
+SET_LABEL = "{theme} v{variation}"
+
+
+def slugify(value) -> str:
+    """``"Geometric Chevron"`` -> ``"geometric-chevron"``."""
+    return re.sub(r'[^a-z0-9]+', '-', str(value).lower()).strip('-')
+
+
+class _Fields(dict):
+    """Template namespace that derives ``<field>_slug`` on demand."""
+
+    def __missing__(self, key):
+        if key.endswith('_slug') and key[:-5] in self:
+            return slugify(self[key[:-5]])
+        raise KeyError(f"Template field {{{key}}} is not defined (have: {', '.join(sorted(self))})")
+
+
+class BatchSpec:
+    """A lazily expanded stream of jobs described by a spec dict."""
+
+    def __init__(self, spec: dict, base_dir: str = '.'):
+        """
+        Args:
+            spec: Parsed spec (see module docstring)
+            base_dir: Directory relative paths in the spec are resolved from
+        """
+        self.spec = spec
+        self.base_dir = base_dir
+        self.defaults: dict = dict(spec.get('defaults', {}))
+        self.matrix: Dict[str, list] = dict(spec.get('matrix', {}))
+        self.sets: List[dict] = list(spec.get('sets', []))
+        self.exclude: List[dict] = list(spec.get('exclude', []))
+        self.limit: Optional[int] = spec.get('limit')
+
+        variations = spec.get('variations')
+        if variations and 'variation' not in self.matrix:
+            self.matrix['variation'] = list(range(1, int(variations) + 1))
+        if self.matrix and 'template' not in spec:
+            raise ValueError("A spec with a matrix needs a 'template'")
+        for axis, values in self.matrix.items():
+            if not isinstance(values, list) or not values:
+                raise ValueError(f"Matrix axis '{axis}' must be a non-empty list")
+        self.template: Optional[str] = spec.get('template')
+        self.filename: str = spec.get('filename') or '_'.join(
+            f"{{{axis}_slug}}" for axis in self.matrix
+        ) + '.png'
+
+    @classmethod
+    def load(cls, path: str) -> "BatchSpec":
+        with open(path) as f:
+            spec = json.load(f)
+        return cls(spec, base_dir=os.path.dirname(os.path.abspath(path)))
+
+    @property
+    def output_dir(self) -> Optional[str]:
+        out = self.spec.get('output_dir')
+        return os.path.join(self.base_dir, out) if out else None
+
+    @property
+    def runner(self) -> dict:
+        """BatchRunner settings from the spec (concurrency, poll_interval, timeout)."""
+        return {k: self.spec['runner'][k] for k in RUNNER_KEYS if k in self.spec.get('runner', {})}
+
+    def count(self) -> int:
+        """Number of jobs the spec expands to, without building any of them."""
+        if not self.exclude:
+            total = sum(len(s['prompts']) for s in self.sets)
+            product = 1
+            for values in self.matrix.values():
+                product *= len(values)
+            total += product if self.matrix else 0
+        else:
+            total = sum(1 for _ in self._expand())
+        return min(total, self.limit) if self.limit is not None else total
+
+    def __iter__(self) -> Iterator[dict]:
+        jobs = self._expand()
+        if self.limit is not None:
+            jobs = itertools.islice(jobs, self.limit)
+        return jobs
+
+    def _expand(self) -> Iterator[dict]:
+        index = 0
+        for source, templated in ((self._set_fields(), SET_TEMPLATED), (self._matrix_fields(), TEMPLATED)):
+            for fields in source:
+                if self._excluded(fields):
+                    continue
+                yield self._job(fields, index, templated)
+                index += 1
+
+    def _set_fields(self) -> Iterator[dict]:
+        for set_info in self.sets:
+            meta = {k: v for k, v in set_info.items() if k != 'prompts'}
+            for variation, prompt in enumerate(set_info['prompts'], 1):
+                yield {
+                    'filename': SET_FILENAME,
+                    'label': SET_LABEL,
+                    **self.defaults,
+                    **meta,
+                    'variation': variation,
+                    'prompt': prompt,
+                }
+
+    def _matrix_fields(self) -> Iterator[dict]:
+        if not self.matrix:
+            return
+        axes = list(self.matrix)
+        # product() walks the axis lists; the combinations are never stored.
+        for combo in itertools.product(*self.matrix.values()):
+            fields = {
+                'prompt': self.template,
+                'filename': self.filename,
+                **self.defaults,
+            }
+            for axis, value in zip(axes, combo):
+                if isinstance(value, dict):
+                    fields.update(value)
+                    fields.setdefault(axis, value.get(axis, value.get('name')))
+                else:
+                    fields[axis] = value
+                if axis == 'size' and isinstance(fields.get('size'), str):
+                    width, height = fields['size'].lower().split('x')
+                    fields['width'], fields['height'] = int(width), int(height)
+            yield fields
+
+    def _excluded(self, fields: dict) -> bool:
+        return any(all(fields.get(k) == v for k, v in rule.items()) for rule in self.exclude)
+
+    @staticmethod
+    def _job(fields: dict, index: int, templated=TEMPLATED) -> dict:
+        namespace = _Fields(fields, index=index)
+        job = dict(fields)
+        for key in templated:
+            if isinstance(job.get(key), str):
+                job[key] = job[key].format_map(namespace)
+        return job
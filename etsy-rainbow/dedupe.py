@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate detection across generated batches.
+
+Keeps a persistent index of perceptual hashes (see postprocess.perceptual_hash)
+for every image under ``etsy-rainbow/*/``, in ``phash-index.jsonl`` next to
+this file. Lookups go through an in-memory BK-tree, so finding everything
+within a few bits of a hash touches a small part of the index.
+
+Usage as a module:
+    from dedupe import HashIndex, index_archive
+    index = HashIndex()                       # etsy-rainbow/phash-index.jsonl
+    index_archive(index)                      # add images not indexed yet
+    match = index.check_and_add("batch3/set01_v1.png", phash)
+    if match:
+        distance, other = match
+
+Commands:
+    python3 dedupe.py index                   # hash everything in etsy-rainbow/*/
+    python3 dedupe.py cluster --max-distance 6 [--json clusters.json]
+    python3 dedupe.py query batch3/set01_chevron_v1.png
+"""
+
+import argparse
+import glob
+import json
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from jsonl import trim_torn_line
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_INDEX = os.path.join(HERE, 'phash-index.jsonl')
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp')
+
+
+class BKTree:
+    """BK-tree over integer hashes with hamming distance."""
+
+    def __init__(self):
+        # node: [hash, children {distance: node}]
+        self._root: Optional[list] = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, value: int):
+        if self._root is None:
+            self._root = [value, {}]
+            self._size = 1
+            return
+        node = self._root
+        while True:
+            d = (node[0] ^ value).bit_count()
+            if d == 0:
+                return
+            child = node[1].get(d)
+            if child is None:
+                node[1][d] = [value, {}]
+                self._size += 1
+                return
+            node = child
+
+    def search(self, value: int, max_distance: int) -> List[Tuple[int, int]]:
+        """All ``(distance, hash)`` within ``max_distance`` of ``value``."""
+        found = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            d = (node[0] ^ value).bit_count()
+            if d <= max_distance:
+                found.append((d, node[0]))
+            # Triangle inequality: only subtrees at distance d±max can match.
+            for child_d, child in node[1].items():
+                if d - max_distance <= child_d <= d + max_distance:
+                    stack.append(child)
+        return found
+
+
+class HashIndex:
+    """Persistent path -> perceptual hash index with near-neighbour lookup."""
+
+    def __init__(self, path: str = DEFAULT_INDEX, max_distance: int = 6):
+        """
+        Args:
+            path: JSONL file holding the index (paths inside are stored
+                relative to its directory)
+            max_distance: Hamming distance (of 64 bits) at or below which two
+                images count as near-duplicates
+        """
+        self.path = path
+        self.root = os.path.dirname(os.path.abspath(path))
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        self._hashes: Dict[str, int] = {}          # relative path -> hash
+        self._paths: Dict[int, List[str]] = {}     # hash -> relative paths
+        self._tree = BKTree()
+        # _add appends; a line torn by a crash would swallow the next entry.
+        trim_torn_line(path)
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A torn last line from a crash; ignore it.
+                        continue
+                    self._insert(entry['path'], int(entry['phash'], 16))
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def __contains__(self, path: str) -> bool:
+        return self._relative(path) in self._hashes
+
+    def add(self, path: str, phash: str):
+        """Index ``path`` (replacing any earlier hash for it)."""
+        with self._lock:
+            self._add(self._relative(path), int(phash, 16))
+
+    def nearest(self, phash: str, max_distance: Optional[int] = None,
+                exclude: Optional[str] = None) -> List[Tuple[int, str]]:
+        """
+        Indexed images within ``max_distance`` bits of ``phash``.
+
+        Returns:
+            ``(distance, path)`` pairs, closest first; ``exclude`` (usually
+            the image being checked) is left out
+        """
+        limit = self.max_distance if max_distance is None else max_distance
+        skip = self._relative(exclude) if exclude else None
+        with self._lock:
+            return self._nearest(int(phash, 16), limit, skip)
+
+    def check_and_add(self, path: str, phash: str, add_duplicates: bool = True) -> Optional[Tuple[int, str]]:
+        """
+        Look ``path`` up and index it, atomically.
+
+        Returns:
+            ``(distance, path)`` of the closest other near-duplicate, or None
+        """
+        rel = self._relative(path)
+        value = int(phash, 16)
+        with self._lock:
+            matches = self._nearest(value, self.max_distance, rel)
+            if add_duplicates or not matches:
+                self._add(rel, value)
+        return matches[0] if matches else None
+
+    def clusters(self, max_distance: Optional[int] = None) -> List[List[str]]:
+        """Groups of two or more images linked by near-duplicate pairs, largest first."""
+        limit = self.max_distance if max_distance is None else max_distance
+        with self._lock:
+            parent = {h: h for h in self._paths}
+
+            def find(h):
+                while parent[h] != h:
+                    parent[h] = parent[parent[h]]
+                    h = parent[h]
+                return h
+
+            for h in self._paths:
+                for _, other in self._tree.search(h, limit):
+                    if other not in parent:
+                        continue  # a replaced hash still in the tree
+                    a, b = find(h), find(other)
+                    if a != b:
+                        parent[b] = a
+
+            groups: Dict[int, List[str]] = {}
+            for h, rels in self._paths.items():
+                groups.setdefault(find(h), []).extend(rels)
+        found = [sorted(self._absolute(r) for r in g) for g in groups.values() if len(g) > 1]
+        return sorted(found, key=len, reverse=True)
+
+    def prune(self) -> int:
+        """Drop entries whose file is gone and rewrite the index; returns how many."""
+        with self._lock:
+            missing = {r for r in self._hashes if not os.path.exists(self._absolute(r))}
+            hashes = {r: h for r, h in self._hashes.items() if r not in missing}
+            self._hashes, self._paths, self._tree = {}, {}, BKTree()
+            for rel, value in hashes.items():
+                self._insert(rel, value)
+            tmp = f"{self.path}.tmp{os.getpid()}"
+            with open(tmp, 'w') as f:
+                for rel, value in self._hashes.items():
+                    f.write(json.dumps({'path': rel, 'phash': f"{value:016x}"}) + '\n')
+            os.replace(tmp, self.path)
+        return len(missing)
+
+    def _add(self, rel: str, value: int):
+        if self._hashes.get(rel) == value:
+            return
+        self._insert(rel, value)
+        with open(self.path, 'a') as f:
+            f.write(json.dumps({'path': rel, 'phash': f"{value:016x}"}) + '\n')
+
+    def _insert(self, rel: str, value: int):
+        old = self._hashes.get(rel)
+        if old is not None:
+            # The tree keeps the old hash; it just no longer maps to this path.
+            self._paths[old].remove(rel)
+            if not self._paths[old]:
+                del self._paths[old]
+        self._hashes[rel] = value
+        self._paths.setdefault(value, []).append(rel)
+        self._tree.add(value)
+
+    def _nearest(self, value: int, limit: int, skip: Optional[str]) -> List[Tuple[int, str]]:
+        found = [
+            (d, self._absolute(rel))
+            for d, h in self._tree.search(value, limit)
+            for rel in self._paths.get(h, ())
+            if rel != skip
+        ]
+        return sorted(found)
+
+    def _relative(self, path: str) -> str:
+        return os.path.relpath(os.path.abspath(path), self.root)
+
+    def _absolute(self, rel: str) -> str:
+        return os.path.normpath(os.path.join(self.root, rel))
+
+
+def iter_images(root: str) -> Iterable[Tuple[str, Optional[str]]]:
+    """
+    ``(path, phash or None)`` for every image in ``root/*/``.
+
+    Hashes already recorded in a batch's results.json are reused. Resized
+    and converted variants are skipped, so each generation counts once.
+    """
+    for batch in sorted(glob.glob(os.path.join(root, '*', ''))):
+        known: Dict[str, str] = {}
+        variants = set()
+        results_file = os.path.join(batch, 'results.json')
+        if os.path.exists(results_file):
+            with open(results_file) as f:
+                for entry in json.load(f):
+                    if entry.get('local_file') and entry.get('phash'):
+                        known[os.path.basename(entry['local_file'])] = entry['phash']
+                    variants.update(os.path.basename(v['path']) for v in entry.get('variants', ()))
+        for name in sorted(os.listdir(batch)):
+            if name.startswith('.') or name in variants or not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            yield os.path.join(batch, name), known.get(name)
+
+
+def _hash_file(path: str) -> str:
+    from PIL import Image
+    from postprocess import perceptual_hash
+    with Image.open(path) as img:
+        return perceptual_hash(img)
+
+
+def index_archive(index: HashIndex, root: str = HERE, workers: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Add every image in ``root/*/`` that ``index`` doesn't hold yet.
+
+    Returns:
+        ``(images added, of which hashed now)``
+    """
+    todo = []
+    added = 0
+    for path, phash in iter_images(root):
+        if path in index:
+            continue
+        if phash:
+            index.add(path, phash)
+            added += 1
+        else:
+            todo.append(path)
+    if todo:
+        with ProcessPoolExecutor(workers) as pool:
+            for path, phash in zip(todo, pool.map(_hash_file, todo, chunksize=16)):
+                index.add(path, phash)
+                added += 1
+    return added, len(todo)
+
+
+def cmd_index(args):
+    index = HashIndex(args.index, args.max_distance)
+    pruned = index.prune()
+    added, hashed = index_archive(index, args.root, args.workers)
+    print(f"Indexed {added} new images ({hashed} hashed), pruned {pruned}; {len(index)} total")
+
+
+def cmd_cluster(args):
+    index = HashIndex(args.index, args.max_distance)
+    start = time.perf_counter()
+    groups = index.clusters()
+    elapsed = time.perf_counter() - start
+    for i, group in enumerate(groups, 1):
+        print(f"Cluster {i} ({len(group)} images):")
+        for path in group:
+            print(f"  {os.path.relpath(path)}")
+    print(f"{len(groups)} clusters among {len(index)} images in {elapsed * 1000:.0f} ms")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(groups, f, indent=2)
+
+
+def cmd_query(args):
+    index = HashIndex(args.index, args.max_distance)
+    for image in args.images:
+        matches = index.nearest(_hash_file(image), exclude=image)
+        print(f"{image}: {len(matches)} near-duplicate(s)")
+        for distance, path in matches:
+            print(f"  {distance:2d}  {os.path.relpath(path)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find near-duplicate images across batches")
+    parser.add_argument("--index", default=DEFAULT_INDEX, help="Index file (default: %(default)s)")
+    parser.add_argument("--max-distance", type=int, default=6,
+                        help="Hamming distance counted as a near-duplicate (default: 6 of 64 bits)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("index", help="Add every image under ROOT/*/ to the index")
+    p.add_argument("root", nargs="?", default=HERE, help="Archive root (default: etsy-rainbow)")
+    p.add_argument("--workers", type=int, help="Hashing processes (default: CPU count)")
+    p.set_defaults(func=cmd_index)
+
+    p = sub.add_parser("cluster", help="Group indexed images into near-duplicate clusters")
+    p.add_argument("--json", help="Also write the clusters to this JSON file")
+    p.set_defaults(func=cmd_cluster)
+
+    p = sub.add_parser("query", help="List indexed near-duplicates of the given images")
+    p.add_argument("images", nargs="+")
+    p.set_defaults(func=cmd_query)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Streaming, resumable image downloads into a content-addressed store.
+
+Each image is streamed in chunks to a ``.part`` file, hashed once complete
+and atomically renamed to ``.objects/<sha256[:2]>/<sha256><ext>`` under the
+store root. The friendly filename (``set01_..._v1.png``) is a hard link to
+that object, so identical outputs are stored once. Interrupted downloads
+resume with a Range request, and URLs that were already fetched are
+linked from the store without touching the network.
+
+Usage as a module:
+    from downloader import ImageStore
+    store = ImageStore("batch2")
+    obj = store.fetch(url, "batch2/set01_chevron_v1.png")
+"""
+
+import hashlib
+import json
+import os
+import random
+import shutil
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+from jsonl import trim_torn_line
+
+
+# HTTP statuses worth retrying; anything else in 4xx is permanent.
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class ImageStore:
+    """Content-addressed image store with streaming, resumable downloads."""
+
+    def __init__(
+        self,
+        root: str,
+        chunk_size: int = 64 * 1024,
+        retries: int = 4,
+        backoff: float = 1.0,
+        timeout: float = 60,
+    ):
+        """
+        Args:
+            root: Directory holding the ``.objects`` and ``.partial`` folders
+            chunk_size: Bytes read per chunk while streaming
+            retries: Extra attempts after a failed download
+            backoff: Base delay in seconds, doubled on each retry
+            timeout: Socket timeout per request
+        """
+        self.root = root
+        self.objects_dir = os.path.join(root, '.objects')
+        self.partial_dir = os.path.join(root, '.partial')
+        self.chunk_size = chunk_size
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.partial_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # url -> [lock, users]: threads fetching the same URL share one .part file.
+        self._url_locks: Dict[str, List] = {}
+        self._index_path = os.path.join(self.objects_dir, 'urls.jsonl')
+        self._urls: Dict[str, str] = {}
+        trim_torn_line(self._index_path)
+        if os.path.exists(self._index_path):
+            with open(self._index_path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A torn last line from a crash; ignore it.
+                        continue
+                    self._urls[entry['url']] = entry['path']
+
+    def has(self, url: str) -> bool:
+        """True if ``url`` was already fetched and its object is still stored."""
+        with self._lock:
+            known = self._urls.get(url)
+        return bool(known) and os.path.exists(known)
+
+    def fetch(self, url: str, filepath: str) -> str:
+        """
+        Make ``filepath`` hold the image at ``url``.
+
+        Skips the network if ``url`` was fetched before and its object is
+        still in the store.
+
+        Returns:
+            Path of the stored object (its basename is the sha256)
+
+        Raises:
+            urllib.error.URLError / OSError after retries are exhausted
+        """
+        with self._url_lock(url):
+            with self._lock:
+                known = self._urls.get(url)
+            if known and os.path.exists(known):
+                obj = known
+            else:
+                obj = self._download(url)
+                self._remember(url, obj)
+
+        if not (os.path.exists(filepath) and os.path.samefile(obj, filepath)):
+            self._link(obj, filepath)
+        return obj
+
+    def put(self, source: str, filepath: str, url: Optional[str] = None) -> str:
+        """
+        Make ``filepath`` hold a copy of the local file ``source``.
+
+        Used for images that are already on disk (e.g. from the result
+        cache); ``url`` is remembered as their origin, so a later ``fetch``
+        of it doesn't touch the network either.
+
+        Returns:
+            Path of the stored object
+        """
+        part = os.path.join(self.partial_dir, f"put{os.getpid()}.{threading.get_ident()}.part")
+        self._link(source, part)
+        obj = self._store(part, _extension(source, None))
+        if url:
+            self._remember(url, obj)
+        if not (os.path.exists(filepath) and os.path.samefile(obj, filepath)):
+            self._link(obj, filepath)
+        return obj
+
+    def _remember(self, url: str, obj: str):
+        with self._lock:
+            self._urls[url] = obj
+            with open(self._index_path, 'a') as f:
+                f.write(json.dumps({'url': url, 'path': obj}) + '\n')
+
+    @contextmanager
+    def _url_lock(self, url: str):
+        with self._lock:
+            entry = self._url_locks.setdefault(url, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._url_locks[url]
+
+    def _download(self, url: str) -> str:
+        part = os.path.join(self.partial_dir, hashlib.sha256(url.encode()).hexdigest() + '.part')
+        for attempt in range(self.retries + 1):
+            try:
+                content_type = self._stream(url, part)
+                break
+            except urllib.error.HTTPError as e:
+                if e.code not in RETRY_STATUSES or attempt == self.retries:
+                    raise
+            except (urllib.error.URLError, OSError):
+                if attempt == self.retries:
+                    raise
+            time.sleep(self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+        return self._store(part, _extension(url, content_type))
+
+    def _store(self, part: str, ext: str) -> str:
+        """Move a finished ``.part`` file to its content address."""
+        digest = hashlib.sha256()
+        with open(part, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b''):
+                digest.update(chunk)
+        sha = digest.hexdigest()
+
+        obj_dir = os.path.join(self.objects_dir, sha[:2])
+        os.makedirs(obj_dir, exist_ok=True)
+        obj = os.path.join(obj_dir, sha + ext)
+        if os.path.exists(obj):
+            # Same bytes as something already stored.
+            os.remove(part)
+        else:
+            os.replace(part, obj)
+        return obj
+
+    def _stream(self, url: str, part: str) -> Optional[str]:
+        """Stream ``url`` into ``part``, resuming from its current size."""
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        headers = {'User-Agent': 'Mozilla/5.0'}
+        if offset:
+            headers['Range'] = f'bytes={offset}-'
+        req = urllib.request.Request(url, headers=headers)
+
+        try:
+            response = urllib.request.urlopen(req, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            if e.code != 416 or not offset:
+                raise
+            # 416 with "Content-Range: bytes */<size>": the part may already be whole.
+            total = (e.headers.get('Content-Range') or '').rpartition('/')[2]
+            if total.isdigit() and int(total) == offset:
+                return None
+            # Our partial file doesn't match the remote one; start over.
+            os.remove(part)
+            return self._stream(url, part)
+
+        with response:
+            mode = 'ab' if offset and response.status == 206 else 'wb'
+            with open(part, mode) as f:
+                for chunk in iter(lambda: response.read(self.chunk_size), b''):
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+
+            expected = response.headers.get('Content-Length')
+            written = os.path.getsize(part) - (offset if mode == 'ab' else 0)
+            if expected is not None and written != int(expected):
+                raise OSError(f"Incomplete download: {written}/{expected} bytes")
+            return response.headers.get('Content-Type')
+
+    @staticmethod
+    def _link(obj: str, filepath: str):
+        """Atomically point ``filepath`` at ``obj`` (hard link, or copy across devices)."""
+        tmp = f"{filepath}.tmp{os.getpid()}.{threading.get_ident()}"
+        try:
+            os.link(obj, tmp)
+        except OSError:
+            shutil.copyfile(obj, tmp)
+        os.replace(tmp, filepath)
+
+
+def _extension(url: str, content_type: Optional[str]) -> str:
+    ext = os.path.splitext(urlsplit(url).path)[1].lower()
+    if ext in ('.png', '.jpg', '.jpeg', '.webp'):
+        return ext
+    if content_type:
+        sub = content_type.split(';')[0].strip().lower()
+        return {'image/jpeg': '.jpg', 'image/webp': '.webp'}.get(sub, '.png')
+    return '.png'
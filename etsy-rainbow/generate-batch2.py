@@ -1,127 +1,159 @@
 #!/usr/bin/env python3
-"""Generate rainbow art batch 2 - Mixed styles (no curves)"""
+"""
+Generate rainbow art batch 2 - Mixed styles (no curves)
 
+Runs any batch spec (see batch_spec.py); the default is prompts-batch2.json.
+
+    python3 generate-batch2.py
+    python3 generate-batch2.py --spec batch3.json --count   # just count the jobs
+"""
+
+import argparse
 import json
 import sys
 import os
 import time
-import urllib.request
 
-sys.path.insert(0, '/Users/Yingz/clawd/skills/krea-api')
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'skills', 'krea-api'))
 from krea_api import KreaAPI
+from krea_webhook import WebhookListener
+from batch_runner import BatchRunner
+from batch_spec import BatchSpec
+from journal import JobJournal
+from postprocess import PostProcessor
+from dedupe import HashIndex, index_archive
 
-def download_image(url: str, filepath: str) -> bool:
-    """Download image from URL to local file."""
-    try:
-        req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urllib.request.urlopen(req, timeout=60) as response:
-            with open(filepath, 'wb') as f:
-                f.write(response.read())
-        return True
-    except Exception as e:
-        print(f"  ❌ Download failed: {e}")
-        return False
 
 def main():
-    # Load prompts
-    with open('/Users/Yingz/clawd/etsy-rainbow/prompts-batch2.json', 'r') as f:
-        data = json.load(f)
-    
+    parser = argparse.ArgumentParser(description="Generate rainbow art batch 2")
+    parser.add_argument("--spec", default=os.path.join(HERE, 'prompts-batch2.json'),
+                        help="Batch spec to run (default: prompts-batch2.json)")
+    parser.add_argument("--output-dir",
+                        help="Where images go (default: the spec's output_dir)")
+    parser.add_argument("--count", action="store_true",
+                        help="Print how many jobs the spec expands to and exit")
+    parser.add_argument("--concurrency", "-j", type=int,
+                        default=os.environ.get("KREA_CONCURRENCY"),
+                        help="Krea jobs kept in flight at once (default: $KREA_CONCURRENCY, the spec's, or 4)")
+    parser.add_argument("--webhook-port", type=int,
+                        help="Receive Krea completion callbacks on this local port instead of polling "
+                             "(needs --webhook-public-url)")
+    parser.add_argument("--webhook-public-url",
+                        help="Public base URL (e.g. a tunnel) that forwards to --webhook-port")
+    parser.add_argument("--metrics-file",
+                        help="Write per-model latency histograms (p50/p95/p99) to this JSON file")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Serve Prometheus metrics on this port at /metrics while running")
+    parser.add_argument("--fresh", action="store_true",
+                        help="Ignore the journal from earlier runs and start over")
+    parser.add_argument("--sizes", type=lambda v: [int(x) for x in v.split(',') if x],
+                        default=[], help="Also export these longest-edge sizes, e.g. 2000,1000,400")
+    parser.add_argument("--formats", type=lambda v: [x for x in v.split(',') if x],
+                        default=[], help="Also export these formats, e.g. jpg,webp")
+    parser.add_argument("--phash", action="store_true",
+                        help="Record a perceptual hash of each image in results.json")
+    parser.add_argument("--post-workers", type=int,
+                        help="Processes for post-processing (default: CPU count)")
+    parser.add_argument("--dedupe", action="store_true",
+                        help="Flag images that look like anything already in etsy-rainbow/*/ (implies --phash)")
+    parser.add_argument("--skip-duplicates", action="store_true",
+                        help="With --dedupe, delete near-duplicates instead of just flagging them")
+    parser.add_argument("--dedupe-distance", type=int, default=6,
+                        help="Hash bits (of 64) that may differ for a near-duplicate (default: 6)")
+    args = parser.parse_args()
+    if args.webhook_port is not None and not args.webhook_public_url:
+        # The listener binds 0.0.0.0, which is no address Krea can call back to.
+        parser.error("--webhook-port needs --webhook-public-url (the address Krea can reach it at)")
+
+    spec = BatchSpec.load(args.spec)
+    total = spec.count()
+    if args.count:
+        print(total)
+        return
+
     # Output directory
-    output_dir = '/Users/Yingz/clawd/etsy-rainbow/batch2'
+    output_dir = args.output_dir or spec.output_dir
+    if not output_dir:
+        parser.error("The spec has no output_dir; pass --output-dir")
     os.makedirs(output_dir, exist_ok=True)
-    
+    settings = {'concurrency': 4, 'poll_interval': 3.0, 'timeout': 180, **spec.runner}
+    if args.concurrency is not None:
+        settings['concurrency'] = int(args.concurrency)
+
     # Initialize API
     api = KreaAPI()
-    
-    results = []
-    total = sum(len(s['prompts']) for s in data['sets'])
-    current = 0
-    
-    for set_info in data['sets']:
-        set_id = set_info['set_id']
-        theme = set_info['theme']
-        style = set_info['style']
-        
-        print(f"\n{'='*60}")
-        print(f"Set {set_id}: {theme} ({style})")
-        print('='*60)
-        
-        for var_idx, prompt in enumerate(set_info['prompts'], 1):
-            current += 1
-            print(f"\n[{current}/{total}] Generating {theme} v{var_idx}...")
-            print(f"  Prompt: {prompt[:80]}...")
-            
-            try:
-                # Generate with Imagen 4
-                job = api.generate_image(
-                    prompt=prompt,
-                    model="imagen-4",
-                    width=1024,
-                    height=1024
-                )
-                job_id = job['job_id']
-                print(f"  Job: {job_id}")
-                
-                # Wait for completion
-                result = api.wait_for_completion(job_id, poll_interval=3.0, timeout=180)
-                urls = result.get('result', {}).get('urls', [])
-                
-                if urls:
-                    url = urls[0]
-                    # Save locally
-                    filename = f"set{set_id:02d}_{theme.lower().replace(' ', '-')}_v{var_idx}.png"
-                    filepath = os.path.join(output_dir, filename)
-                    
-                    if download_image(url, filepath):
-                        print(f"  ✅ Saved: {filename}")
-                        results.append({
-                            'set_id': set_id,
-                            'theme': theme,
-                            'style': style,
-                            'variation': var_idx,
-                            'prompt': prompt,
-                            'url': url,
-                            'local_file': filepath
-                        })
-                    else:
-                        results.append({
-                            'set_id': set_id,
-                            'theme': theme,
-                            'variation': var_idx,
-                            'url': url,
-                            'error': 'download_failed'
-                        })
-                else:
-                    print(f"  ⚠️ No URLs in result")
-                    results.append({
-                        'set_id': set_id,
-                        'theme': theme,
-                        'variation': var_idx,
-                        'error': 'no_urls'
-                    })
-                    
-            except Exception as e:
-                print(f"  ❌ Error: {e}")
-                results.append({
-                    'set_id': set_id,
-                    'theme': theme,
-                    'variation': var_idx,
-                    'error': str(e)
-                })
-            
-            # Small delay between requests
-            time.sleep(1)
-    
+
+    if args.metrics_port is not None:
+        metrics_port = api.telemetry.serve(args.metrics_port)
+        print(f"Metrics at http://127.0.0.1:{metrics_port}/metrics")
+
+    print(f"Generating {total} images with {settings['concurrency']} jobs in flight...")
+
+    webhook = None
+    if args.webhook_port is not None:
+        webhook = WebhookListener(
+            host="0.0.0.0", port=args.webhook_port, public_url=args.webhook_public_url
+        ).start()
+        print(f"Listening for Krea callbacks on port {webhook.port}")
+
+    # Every job state change is journaled, so a crashed or interrupted run
+    # picks up where it left off when started again.
+    journal_path = os.path.join(output_dir, 'journal.jsonl')
+    if args.fresh and os.path.exists(journal_path):
+        os.replace(journal_path, f"{journal_path}.{int(time.time())}.bak")
+    journal = JobJournal(journal_path)
+
+    post = None
+    if args.sizes or args.formats or args.phash or args.dedupe:
+        post = PostProcessor(args.sizes, args.formats, args.phash or args.dedupe, workers=args.post_workers)
+    dedupe = None
+    if args.dedupe:
+        dedupe = HashIndex(max_distance=args.dedupe_distance)
+        # New images are checked against the whole archive, not just what
+        # an earlier `dedupe.py index` happened to record.
+        added, hashed = index_archive(dedupe, workers=args.post_workers)
+        print(f"Dedupe index: {len(dedupe)} images ({added} new, {hashed} hashed now)")
+
+    runner = BatchRunner(
+        api,
+        output_dir,
+        concurrency=settings['concurrency'],
+        poll_interval=settings['poll_interval'],
+        timeout=settings['timeout'],
+        webhook=webhook,
+        journal=journal,
+        postprocess=post,
+        dedupe=dedupe,
+        skip_duplicates=args.skip_duplicates,
+    )
+    start = time.time()
+    try:
+        results = runner.run(iter(spec))
+    finally:
+        journal.close()
+        if post:
+            post.close()
+        if webhook:
+            webhook.stop()
+    elapsed = time.time() - start
+
     # Save results
     results_file = os.path.join(output_dir, 'results.json')
     with open(results_file, 'w') as f:
         json.dump(results, f, indent=2)
-    
+
+    if args.metrics_file:
+        api.telemetry.write_json(args.metrics_file)
+
     # Summary
     success = len([r for r in results if 'local_file' in r])
+    duplicates = len([r for r in results if 'duplicate_of' in r])
     print(f"\n{'='*60}")
-    print(f"COMPLETE: {success}/{total} images generated")
+    print(f"COMPLETE: {success}/{total} images generated in {elapsed:.0f}s")
+    if duplicates:
+        action = "skipped" if args.skip_duplicates else "flagged"
+        print(f"Near-duplicates {action}: {duplicates}")
     print(f"Results saved to: {results_file}")
     print(f"Images saved to: {output_dir}")
     print('='*60)
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Shared job queue for distributed batch workers.
+
+Producers enqueue job dicts; any number of worker processes claim them.
+A claim is only leased: it stays invisible to other workers for
+``visibility`` seconds, the holder extends it with heartbeats while it
+works, and if the worker dies the job becomes claimable again once the
+lease runs out. Jobs are keyed (the batch runner's ``key`` / ``filename``),
+so enqueueing the same spec twice adds nothing.
+
+Backends are picked by URL and pluggable:
+
+    sqlite:///abs/path/queue.db    (or just a path) - SQLiteQueue, for
+                                   workers on one host or a shared disk
+                                   with working locks
+
+Other stores (Redis, Postgres, ...) can be added with register_backend().
+
+Usage as a module:
+    from job_queue import open_queue
+    queue = open_queue("batch3/queue.db")
+    queue.put_many(jobs, key=lambda job: job['filename'])
+    claim = queue.claim("worker-1", visibility=300)
+    queue.heartbeat(claim, visibility=300)
+    queue.complete(claim, result)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional
+
+READY = "ready"
+CLAIMED = "claimed"
+DONE = "done"
+FAILED = "failed"
+
+
+class Claim:
+    """A leased job. ``token`` proves the lease is still ours."""
+
+    def __init__(self, id: int, key: str, job: dict, attempts: int, token: str, progress: Optional[dict]):
+        self.id = id
+        self.key = key
+        self.job = job
+        self.attempts = attempts
+        self.token = token
+        self.progress = progress or {}
+
+    def __repr__(self):
+        return f"Claim(id={self.id}, key={self.key!r}, attempts={self.attempts})"
+
+
+class JobQueue(ABC):
+    """Interface every queue backend implements; a backend missing a method can't be instantiated."""
+
+    @abstractmethod
+    def put_many(self, jobs: Iterable[dict], key: Callable[[dict], str]) -> int:
+        """Enqueue jobs not already present (by ``key(job)``); returns how many were added."""
+        ...
+
+    @abstractmethod
+    def claim(self, worker: str, visibility: float) -> Optional[Claim]:
+        """Lease the next visible job, or None if there is none right now."""
+        ...
+
+    @abstractmethod
+    def heartbeat(self, claim: Claim, visibility: float) -> bool:
+        """Extend a lease; False if it was lost to another worker."""
+        ...
+
+    @abstractmethod
+    def save_progress(self, claim: Claim, progress: dict) -> bool:
+        """Store resumable state (e.g. the Krea job id) with the job."""
+        ...
+
+    @abstractmethod
+    def complete(self, claim: Claim, result: dict) -> bool:
+        """Mark the job done with its result; False if the lease was lost."""
+        ...
+
+    @abstractmethod
+    def fail(self, claim: Claim, error: str, result: Optional[dict] = None, retry_after: Optional[float] = None) -> bool:
+        """
+        Mark the job failed, or make it claimable again after ``retry_after``
+        seconds (unless it has used up its attempts).
+        """
+        ...
+
+    @abstractmethod
+    def counts(self) -> Dict[str, int]:
+        """Jobs per state (ready, claimed, done, failed); expired leases count as ready."""
+        ...
+
+    @abstractmethod
+    def results(self) -> Iterable[dict]:
+        """Stored results of finished jobs, in enqueue order."""
+        ...
+
+    @abstractmethod
+    def requeue_failed(self) -> int:
+        """Make every failed job claimable again; returns how many."""
+        ...
+
+    def close(self):
+        pass
+
+
+class SQLiteQueue(JobQueue):
+    """
+    Job queue in one SQLite file (WAL mode).
+
+    Each claim is a single ``BEGIN IMMEDIATE`` transaction, so concurrent
+    workers never lease the same job. Jobs claimed ``max_attempts`` times
+    (leases that expired, or failures retried) are failed instead of handed
+    out again.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            key TEXT NOT NULL UNIQUE,
+            payload TEXT NOT NULL,
+            state TEXT NOT NULL DEFAULT 'ready',
+            visible_at REAL NOT NULL DEFAULT 0,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            worker TEXT,
+            token TEXT,
+            progress TEXT,
+            result TEXT,
+            error TEXT,
+            updated REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS jobs_claimable ON jobs (state, visible_at);
+    """
+
+    def __init__(self, path: str, max_attempts: int = 5, timeout: float = 30.0):
+        """
+        Args:
+            path: SQLite database file (created if missing)
+            max_attempts: Leases a job may get before it is failed
+            timeout: Seconds to wait on a locked database
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(self.SCHEMA)
+
+    def put_many(self, jobs: Iterable[dict], key: Callable[[dict], str]) -> int:
+        added = 0
+        batch: List[tuple] = []
+        now = time.time()
+
+        def flush():
+            nonlocal added
+            with self._lock:
+                self._db.execute("BEGIN IMMEDIATE")
+                try:
+                    before = self._db.total_changes
+                    self._db.executemany(
+                        "INSERT OR IGNORE INTO jobs (key, payload, updated) VALUES (?, ?, ?)", batch
+                    )
+                    added += self._db.total_changes - before
+                    self._db.execute("COMMIT")
+                except BaseException:
+                    self._db.execute("ROLLBACK")
+                    raise
+            batch.clear()
+
+        # Jobs may be a lazy stream of any length; insert in chunks.
+        for job in jobs:
+            batch.append((key(job), json.dumps(job), now))
+            if len(batch) >= 1000:
+                flush()
+        if batch:
+            flush()
+        return added
+
+    def claim(self, worker: str, visibility: float) -> Optional[Claim]:
+        token = uuid.uuid4().hex
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                # Leases that ran out too often: give up on those jobs.
+                self._db.execute(
+                    "UPDATE jobs SET state = ?, error = 'lease expired too many times', token = NULL, updated = ?"
+                    " WHERE state = ? AND visible_at <= ? AND attempts >= ?",
+                    (FAILED, now, CLAIMED, now, self.max_attempts),
+                )
+                row = self._db.execute(
+                    "SELECT id, key, payload, attempts, progress FROM jobs"
+                    " WHERE state IN (?, ?) AND visible_at <= ? ORDER BY id LIMIT 1",
+                    (READY, CLAIMED, now),
+                ).fetchone()
+                if row is None:
+                    self._db.execute("COMMIT")
+                    return None
+                job_id, key, payload, attempts, progress = row
+                self._db.execute(
+                    "UPDATE jobs SET state = ?, visible_at = ?, attempts = attempts + 1,"
+                    " worker = ?, token = ?, updated = ? WHERE id = ?",
+                    (CLAIMED, now + visibility, worker, token, now, job_id),
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return Claim(job_id, key, json.loads(payload), attempts + 1, token,
+                     json.loads(progress) if progress else None)
+
+    def heartbeat(self, claim: Claim, visibility: float) -> bool:
+        now = time.time()
+        return self._update(claim, "visible_at = ?, updated = ?", (now + visibility, now))
+
+    def save_progress(self, claim: Claim, progress: dict) -> bool:
+        return self._update(claim, "progress = ?, updated = ?", (json.dumps(progress), time.time()))
+
+    def complete(self, claim: Claim, result: dict) -> bool:
+        return self._update(
+            claim, "state = ?, result = ?, error = NULL, token = NULL, updated = ?",
+            (DONE, json.dumps(result), time.time()),
+        )
+
+    def fail(self, claim: Claim, error: str, result: Optional[dict] = None, retry_after: Optional[float] = None) -> bool:
+        now = time.time()
+        # Retries count against the same cap as expired leases, so a job that
+        # always fails ends up FAILED instead of being resubmitted forever.
+        if retry_after is not None and claim.attempts < self.max_attempts:
+            return self._update(
+                claim, "state = ?, visible_at = ?, error = ?, token = NULL, updated = ?",
+                (READY, now + retry_after, error, now),
+            )
+        return self._update(
+            claim, "state = ?, error = ?, result = ?, token = NULL, updated = ?",
+            (FAILED, error, json.dumps(result) if result is not None else None, now),
+        )
+
+    def counts(self) -> Dict[str, int]:
+        now = time.time()
+        counts = {READY: 0, CLAIMED: 0, DONE: 0, FAILED: 0}
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT CASE WHEN state = ? AND visible_at <= ? THEN ? ELSE state END, COUNT(*)"
+                " FROM jobs GROUP BY 1",
+                (CLAIMED, now, READY),
+            ).fetchall()
+        for state, n in rows:
+            counts[state] = counts.get(state, 0) + n
+        return counts
+
+    def results(self) -> Iterable[dict]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT payload, state, result, error FROM jobs WHERE state IN (?, ?) ORDER BY id",
+                (DONE, FAILED),
+            ).fetchall()
+        for payload, state, result, error in rows:
+            if result:
+                yield json.loads(result)
+            else:
+                job = json.loads(payload)
+                yield {**{k: v for k, v in job.items() if k not in ('prompt', 'filename', 'label')},
+                       'error': error}
+
+    def requeue_failed(self) -> int:
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET state = ?, visible_at = 0, attempts = 0, error = NULL, updated = ?"
+                " WHERE state = ?",
+                (READY, time.time(), FAILED),
+            )
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _update(self, claim: Claim, assignments: str, params: tuple) -> bool:
+        with self._lock:
+            cursor = self._db.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ? AND token = ?",
+                (*params, claim.id, claim.token),
+            )
+        return cursor.rowcount == 1
+
+
+BACKENDS: Dict[str, Callable[..., JobQueue]] = {"sqlite": SQLiteQueue}
+
+
+def register_backend(scheme: str, factory: Callable[..., JobQueue]):
+    """Make ``open_queue("<scheme>://...")`` use ``factory(rest_of_url, **options)``."""
+    BACKENDS[scheme] = factory
+
+
+def open_queue(url: str, **options) -> JobQueue:
+    """Open a queue by URL (``sqlite:///path/queue.db``); a bare path means SQLite."""
+    scheme, sep, rest = url.partition("://")
+    if not sep:
+        return SQLiteQueue(url, **options)
+    if scheme not in BACKENDS:
+        raise ValueError(f"Unknown queue backend '{scheme}'. Available: {', '.join(BACKENDS)}")
+    # sqlite:///abs/path -> "/abs/path", sqlite://rel/path -> "rel/path"
+    return BACKENDS[scheme](rest, **options)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Append-only journal of batch job state changes.
+
+Every transition (submitted, completed, downloaded, failed, ...) is written
+as one JSON line and fsync'd before the runner moves on, so a crash loses at
+most the event being written (its torn line is cut off on the next open).
+``replay()`` folds the log back into the latest state per job key, which the
+runner uses to resume.
+
+Usage as a module:
+    from journal import JobJournal
+    journal = JobJournal("batch2/journal.jsonl")
+    journal.record("set01_v1", "submitted", job_id="abc", model="imagen-4")
+    state = journal.replay()["set01_v1"]   # {"event": "submitted", ...}
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict
+
+from jsonl import trim_torn_line
+
+
+class JobJournal:
+    """Append-only JSONL journal of per-job events."""
+
+    SUBMITTED = "submitted"
+    COMPLETED = "completed"
+    DOWNLOADED = "downloaded"
+    DOWNLOAD_FAILED = "download_failed"
+    FAILED = "failed"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        trim_torn_line(path)
+        self._file = open(path, 'a')
+
+    def record(self, key: str, event: str, **fields):
+        """Append one event for ``key`` and flush it to disk."""
+        line = json.dumps({'key': key, 'event': event, 'ts': time.time(), **fields})
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def replay(self) -> Dict[str, dict]:
+        """
+        Latest state per key.
+
+        Each value is the last event's fields merged over the earlier ones,
+        so e.g. a ``completed`` state still carries the ``job_id`` from
+        ``submitted``.
+        """
+        state: Dict[str, dict] = {}
+        if not os.path.exists(self.path):
+            return state
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn final line from a crash mid-write.
+                    continue
+                key = entry.pop('key')
+                if entry['event'] == self.SUBMITTED:
+                    # A new submission starts a fresh attempt.
+                    state[key] = entry
+                else:
+                    state.setdefault(key, {}).update(entry)
+        return state
+
+    def close(self):
+        with self._lock:
+            self._file.close()
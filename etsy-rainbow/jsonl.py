@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Helpers for the append-only JSONL files (journal, URL index, hash index).
+
+A crash mid-append leaves a partial last line. Readers skip it, but the next
+append would be glued onto it and lost too, so writers cut it off first.
+
+Usage as a module:
+    from jsonl import trim_torn_line
+    trim_torn_line(path)
+    with open(path, 'a') as f:
+        f.write(json.dumps(entry) + '\n')
+"""
+
+import os
+
+
+def trim_torn_line(path: str):
+    """Cut a partial last line left by a crash, so the next append isn't glued onto it."""
+    try:
+        f = open(path, 'rb+')
+    except FileNotFoundError:
+        return
+    with f:
+        end = pos = f.seek(0, os.SEEK_END)
+        while pos > 0:
+            step = min(4096, pos)
+            f.seek(pos - step)
+            newline = f.read(step).rfind(b'\n')
+            if newline != -1:
+                pos = pos - step + newline + 1
+                break
+            pos -= step
+        if pos != end:
+            f.truncate(pos)
+            f.flush()
+            os.fsync(f.fileno())
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Post-generation image processing on a process pool.
+
+Turns each downloaded image into Etsy-ready files next to the original:
+
+    sizes    resized copies by longest edge, e.g. 2000 -> set01_..._v1_2000px.png
+    formats  converted copies, e.g. jpg -> set01_..._v1.jpg (and _2000px.jpg)
+    phash    64-bit DCT perceptual hash, as 16 hex chars
+
+Resizing and encoding are CPU-bound, so they run in worker processes while
+the batch runner is still generating and downloading. Outputs that already
+exist and are newer than their source are not rebuilt. Needs Pillow.
+
+Usage as a module:
+    from postprocess import PostProcessor
+    with PostProcessor(sizes=[2000, 400], formats=["jpg"], phash=True) as post:
+        future = post.submit("batch2/set01_chevron_v1.png")
+        print(future.result())  # {"variants": [...], "phash": "..."}
+
+Or over an existing batch (updates its results.json):
+    python3 postprocess.py batch2 --sizes 2000,400 --formats jpg,webp --phash
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    from PIL import Image
+except ImportError:  # optional: only needed when post-processing is enabled
+    Image = None
+
+
+# name -> (Pillow format, extension)
+FORMATS = {
+    'png': ('PNG', '.png'),
+    'jpg': ('JPEG', '.jpg'),
+    'jpeg': ('JPEG', '.jpg'),
+    'webp': ('WEBP', '.webp'),
+}
+
+HASH_SIZE = 8      # 8x8 low-frequency block -> 64-bit hash
+HASH_SAMPLE = 32   # image is reduced to 32x32 before the DCT
+
+
+class PostProcessor:
+    """Runs image transforms on a ProcessPoolExecutor."""
+
+    def __init__(
+        self,
+        sizes: Iterable[int] = (),
+        formats: Iterable[str] = (),
+        phash: bool = False,
+        quality: int = 90,
+        workers: Optional[int] = None,
+    ):
+        """
+        Args:
+            sizes: Longest-edge pixel sizes to export (never upscaled)
+            formats: Extra formats to write (png, jpg, webp); the original
+                format is always kept for resized copies
+            phash: Compute a perceptual hash of each image
+            quality: JPEG/WebP quality
+            workers: Worker processes (default: CPU count)
+        """
+        if Image is None:
+            raise RuntimeError("Post-processing needs Pillow: pip install Pillow")
+        formats = [f.lower().lstrip('.') for f in formats]
+        unknown = [f for f in formats if f not in FORMATS]
+        if unknown:
+            raise ValueError(f"Unknown format(s): {', '.join(unknown)}. Available: {', '.join(FORMATS)}")
+
+        self.sizes = sorted({int(s) for s in sizes}, reverse=True)
+        self.formats = list(dict.fromkeys(formats))
+        self.phash = phash
+        self.quality = quality
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def submit(self, path: str) -> Future:
+        """Queue ``path`` for processing; the future resolves to process_image()'s dict."""
+        with self._lock:
+            if self._pool is None:
+                # Spawned, not forked: the batch runner calls this from download
+                # threads, and forking a threaded process can copy held locks.
+                self._pool = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            pool = self._pool
+        return pool.submit(process_image, path, self.sizes, self.formats, self.phash, self.quality)
+
+    def close(self):
+        """Wait for queued work and stop the worker processes."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+def process_image(
+    path: str,
+    sizes: List[int],
+    formats: List[str],
+    phash: bool = False,
+    quality: int = 90,
+) -> dict:
+    """
+    Write the resized / converted variants of ``path`` beside it.
+
+    Returns:
+        ``{"variants": [{"path", "size", "format", "width", "height", "bytes"}, ...]}``
+        plus ``"phash"`` when requested
+    """
+    stem, ext = os.path.splitext(path)
+    original = _format_name(ext)
+    result: Dict[str, object] = {'variants': []}
+
+    with Image.open(path) as img:
+        img.load()
+        if phash:
+            result['phash'] = perceptual_hash(img)
+
+        # (longest edge or None for full size, format name)
+        wanted: List[Tuple[Optional[int], str]] = [(None, f) for f in formats if f != original]
+        for size in sizes:
+            if size >= max(img.size):
+                continue
+            wanted += [(size, f) for f in dict.fromkeys([original] + formats)]
+
+        resized: Dict[Optional[int], 'Image.Image'] = {None: img}
+        for size, fmt in wanted:
+            out = f"{stem}_{size}px{FORMATS[fmt][1]}" if size else f"{stem}{FORMATS[fmt][1]}"
+            if not _up_to_date(out, path):
+                if size not in resized:
+                    copy = img.copy()
+                    copy.thumbnail((size, size), Image.LANCZOS)
+                    resized[size] = copy
+                _save(resized[size], out, fmt, quality)
+            with Image.open(out) as written:
+                width, height = written.size
+            result['variants'].append({
+                'path': out,
+                'size': size,
+                'format': FORMATS[fmt][1].lstrip('.'),
+                'width': width,
+                'height': height,
+                'bytes': os.path.getsize(out),
+            })
+    return result
+
+
+def perceptual_hash(img: 'Image.Image') -> str:
+    """
+    DCT perceptual hash: 32x32 grayscale, keep the 8x8 lowest frequencies,
+    one bit per coefficient above their median. Near-identical images differ
+    in only a few bits (compare with hamming distance).
+    """
+    n, k = HASH_SAMPLE, HASH_SIZE
+    small = img.convert('L').resize((n, n), Image.LANCZOS)
+    pixels = list(small.getdata())
+    cos = [[math.cos((2 * x + 1) * u * math.pi / (2 * n)) for x in range(n)] for u in range(k)]
+
+    # Separable 2-D DCT-II, only the k lowest frequencies in each direction.
+    rows = [
+        [sum(pixels[y * n + x] * cos[u][x] for x in range(n)) for u in range(k)]
+        for y in range(n)
+    ]
+    coeffs = [sum(cos[v][y] * rows[y][u] for y in range(n)) for v in range(k) for u in range(k)]
+
+    # The DC term is just brightness; leave it out of the median.
+    median = sorted(coeffs[1:])[len(coeffs[1:]) // 2]
+    bits = 0
+    for c in coeffs:
+        bits = (bits << 1) | (c > median)
+    return f"{bits:0{k * k // 4}x}"
+
+
+def hamming(a: str, b: str) -> int:
+    """Number of differing bits between two hex hashes."""
+    return bin(int(a, 16) ^ int(b, 16)).count('1')
+
+
+def _format_name(ext: str) -> str:
+    for name, (_, suffix) in FORMATS.items():
+        if suffix == ext.lower() or f".{name}" == ext.lower():
+            return 'jpg' if name == 'jpeg' else name
+    return 'png'
+
+
+def _up_to_date(out: str, source: str) -> bool:
+    return os.path.exists(out) and os.path.getmtime(out) >= os.path.getmtime(source)
+
+
+def _save(img: 'Image.Image', out: str, fmt: str, quality: int):
+    pil_format = FORMATS[fmt][0]
+    options: dict = {}
+    if pil_format == 'JPEG':
+        if img.mode in ('RGBA', 'LA', 'P'):
+            # JPEG has no alpha: flatten onto white.
+            rgba = img.convert('RGBA')
+            img = Image.new('RGB', rgba.size, (255, 255, 255))
+            img.paste(rgba, mask=rgba.split()[-1])
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+        options = {'quality': quality, 'optimize': True, 'progressive': True}
+    elif pil_format == 'WEBP':
+        options = {'quality': quality, 'method': 4}
+    else:
+        options = {'optimize': True}
+
+    tmp = f"{out}.tmp{os.getpid()}"
+    img.save(tmp, format=pil_format, **options)
+    os.replace(tmp, out)
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(',') if v.strip()]
+
+
+def _str_list(value: str) -> List[str]:
+    return [v.strip() for v in value.split(',') if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resize, convert and hash a generated batch")
+    parser.add_argument("output_dir", help="Batch directory containing results.json")
+    parser.add_argument("--sizes", type=_int_list, default=[], help="Longest-edge sizes, e.g. 2000,1000,400")
+    parser.add_argument("--formats", type=_str_list, default=[], help="Extra formats, e.g. jpg,webp")
+    parser.add_argument("--phash", action="store_true", help="Compute perceptual hashes")
+    parser.add_argument("--quality", type=int, default=90, help="JPEG/WebP quality (default: 90)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    results_file = os.path.join(args.output_dir, 'results.json')
+    with open(results_file) as f:
+        results = json.load(f)
+
+    with PostProcessor(args.sizes, args.formats, args.phash, args.quality, args.workers) as post:
+        futures = [(r, post.submit(r['local_file'])) for r in results if r.get('local_file')]
+        for entry, future in futures:
+            try:
+                entry.update(future.result())
+                entry.pop('postprocess_error', None)
+                print(f"  ✅ {os.path.basename(entry['local_file'])}: {len(entry['variants'])} variants")
+            except Exception as e:
+                entry['postprocess_error'] = str(e)
+                print(f"  ❌ {os.path.basename(entry['local_file'])}: {e}")
+
+    tmp = f"{results_file}.tmp{os.getpid()}"
+    with open(tmp, 'w') as f:
+        json.dump(results, f, indent=2)
+    os.replace(tmp, results_file)
+    print(f"Updated {results_file}")
+
+
+if __name__ == "__main__":
+    main()
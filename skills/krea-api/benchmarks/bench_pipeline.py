@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Krea generation pipeline against the local fake server.
+
+Runs the same workload through several client paths and reports, per
+scenario: jobs/sec, API calls per job, 429s, and time-to-complete
+p50/p95/p99. No real generations are made.
+
+Scenarios:
+    wait      generate_and_wait() from a thread pool (one poll loop per job)
+    tracker   KreaAPI submissions + one JobTracker
+    async     AsyncKreaAPI over the keep-alive pool
+    batch     etsy-rainbow BatchRunner, including downloads
+    webhook   BatchRunner with a WebhookListener instead of polling
+
+Usage:
+    python3 bench_pipeline.py --jobs 200 --concurrency 16 --latency-median 2
+    python3 bench_pipeline.py --json bench.json             # save results
+    python3 bench_pipeline.py --baseline bench.json         # compare to a saved run
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, os.path.join(HERE, "..", "..", "..", "etsy-rainbow"))
+
+from fake_krea import FakeKrea  # noqa: E402
+from krea_api import KreaAPI, JobTracker  # noqa: E402
+from krea_async import AsyncKreaAPI  # noqa: E402
+from krea_ratelimit import RateLimiter  # noqa: E402
+from krea_telemetry import Telemetry  # noqa: E402
+from krea_webhook import WebhookListener  # noqa: E402
+
+MODEL = "flux"
+
+
+def _client(server: FakeKrea, args, cls=KreaAPI, **kwargs):
+    """Fresh client with its own limiter and telemetry so scenarios don't mix."""
+    return cls(
+        key_id="bench", secret="bench", base_url=server.url,
+        limiter=RateLimiter(rate=args.rate, initial_concurrency=args.concurrency,
+                            max_concurrency=max(64, args.concurrency * 2)),
+        telemetry=Telemetry(),
+        **kwargs,
+    )
+
+
+def scenario_wait(server: FakeKrea, args) -> KreaAPI:
+    api = _client(server, args)
+
+    def one(i):
+        try:
+            api.generate_and_wait(f"bench {i}", model=MODEL)
+        except Exception:
+            # Simulated failures are counted by telemetry, like the other scenarios.
+            pass
+
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        list(pool.map(one, range(args.jobs)))
+    return api
+
+
+def scenario_tracker(server: FakeKrea, args) -> KreaAPI:
+    api = _client(server, args)
+    tracker = JobTracker(api, min_interval=args.poll_interval)
+    remaining = iter(range(args.jobs))
+
+    def fill():
+        for i in remaining:
+            tracker.add(api.generate_image(f"bench {i}", model=MODEL)["job_id"], model=MODEL)
+            if len(tracker) >= args.concurrency:
+                return
+
+    fill()
+    for _ in tracker.as_completed():
+        fill()
+    return api
+
+
+def scenario_async(server: FakeKrea, args) -> KreaAPI:
+    async def run():
+        async with _client(server, args, AsyncKreaAPI, max_connections=args.concurrency) as api:
+            slots = asyncio.Semaphore(args.concurrency)
+
+            async def one(i):
+                async with slots:
+                    job = await api.generate_image(f"bench {i}", model=MODEL)
+                    try:
+                        await api.wait_for_completion(job["job_id"], poll_interval=args.poll_interval)
+                    except Exception:
+                        pass
+
+            await asyncio.gather(*(one(i) for i in range(args.jobs)))
+            return api
+
+    return asyncio.run(run())
+
+
+def _batch(server: FakeKrea, args, webhook=None) -> KreaAPI:
+    from batch_runner import BatchRunner
+
+    api = _client(server, args)
+    out = tempfile.mkdtemp(prefix="krea-bench-")
+    try:
+        runner = BatchRunner(api, out, concurrency=args.concurrency, model=MODEL,
+                             poll_interval=args.poll_interval, webhook=webhook)
+        jobs = ({"prompt": f"bench {i}", "filename": f"bench_{i}.png"} for i in range(args.jobs))
+        runner.run(jobs)
+    finally:
+        shutil.rmtree(out, ignore_errors=True)
+    return api
+
+
+def scenario_batch(server: FakeKrea, args) -> KreaAPI:
+    return _batch(server, args)
+
+
+def scenario_webhook(server: FakeKrea, args) -> KreaAPI:
+    with WebhookListener() as hook:
+        return _batch(server, args, webhook=hook)
+
+
+SCENARIOS: Dict[str, Callable[[FakeKrea, argparse.Namespace], KreaAPI]] = {
+    "wait": scenario_wait,
+    "tracker": scenario_tracker,
+    "async": scenario_async,
+    "batch": scenario_batch,
+    "webhook": scenario_webhook,
+}
+
+
+def run_scenario(name: str, server: FakeKrea, args) -> dict:
+    JobTracker._model_latency.clear()  # don't let one scenario warm the next
+    server.reset()
+    start = time.time()
+    # The clients print progress; redirect once here, not per worker thread,
+    # since redirect_stdout swaps the process-wide sys.stdout.
+    with contextlib.redirect_stdout(io.StringIO()):
+        api = SCENARIOS[name](server, args)
+    elapsed = time.time() - start
+
+    stats = dict(server.stats)
+    metrics = api.telemetry.snapshot().get(MODEL, {})
+    complete = metrics.get("complete_seconds", {})
+    download = metrics.get("download_seconds", {})
+    finished = metrics.get("jobs_completed", 0)
+    return {
+        "scenario": name,
+        "jobs": args.jobs,
+        "completed": finished,
+        "failed": metrics.get("jobs_failed", 0),
+        "seconds": round(elapsed, 3),
+        "jobs_per_sec": round(finished / elapsed, 3) if elapsed else None,
+        "api_calls_per_job": round((stats["submits"] + stats["polls"]) / args.jobs, 3),
+        "polls_per_job": round(stats["polls"] / args.jobs, 3),
+        "throttled": stats["throttled"],
+        "complete_p50": complete.get("p50"),
+        "complete_p95": complete.get("p95"),
+        "complete_p99": complete.get("p99"),
+        "download_p50": download.get("p50"),
+    }
+
+
+# (result key, header, width, decimals)
+COLUMNS = [
+    ("completed", "done", 6, 0), ("seconds", "secs", 8, 2), ("jobs_per_sec", "jobs/s", 9, 2),
+    ("api_calls_per_job", "calls/job", 11, 2), ("throttled", "429s", 6, 0),
+    ("complete_p50", "p50", 8, 2), ("complete_p95", "p95", 8, 2), ("complete_p99", "p99", 8, 2),
+]
+
+
+def print_table(results: List[dict], baseline: Optional[Dict[str, dict]] = None):
+    print(f"{'scenario':<9}" + "".join(f"{header:>{width}}" for _, header, width, _ in COLUMNS))
+    for r in results:
+        line = f"{r['scenario']:<9}"
+        for key, _, width, decimals in COLUMNS:
+            value = r.get(key)
+            line += f"{value:>{width}.{decimals}f}" if value is not None else f"{'-':>{width}}"
+        old = (baseline or {}).get(r["scenario"])
+        if old and old.get("jobs_per_sec") and r.get("jobs_per_sec"):
+            change = (r["jobs_per_sec"] - old["jobs_per_sec"]) / old["jobs_per_sec"] * 100
+            calls = r["api_calls_per_job"] - old["api_calls_per_job"]
+            line += f"   vs baseline: {change:+.0f}% jobs/s, {calls:+.2f} calls/job"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Krea pipeline against a fake server")
+    parser.add_argument("--jobs", type=int, default=100, help="Jobs per scenario (default: 100)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Jobs in flight (default: 16)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--poll-interval", type=float, default=0.5,
+                        help="Poll interval for tracker/async/batch (default: 0.5)")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="Client token-bucket rate in req/s (default: unlimited)")
+    parser.add_argument("--latency-median", type=float, default=1.0)
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--max-concurrent-submits", type=int, default=None,
+                        help="Server answers 429 beyond this many concurrent submissions")
+    parser.add_argument("--image-bytes", type=int, default=256 * 1024)
+    parser.add_argument("--seed", type=int, default=1, help="Server RNG seed (default: 1)")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against results saved with --json")
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenario(s): {', '.join(unknown)}")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {r["scenario"]: r for r in json.load(f)["results"]}
+
+    results = []
+    with FakeKrea(
+        latency_median=args.latency_median,
+        latency_sigma=args.latency_sigma,
+        failure_rate=args.failure_rate,
+        throttle_rate=args.throttle_rate,
+        max_concurrent_submits=args.max_concurrent_submits,
+        image_bytes=args.image_bytes,
+        seed=args.seed,
+    ) as server:
+        for name in names:
+            print(f"Running {name}...", file=sys.stderr)
+            results.append(run_scenario(name, server, args))
+
+    print_table(results, baseline)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Local fake of the Krea.ai API for benchmarks.
+
+Implements just enough of the real API for KreaAPI and the batch runner:
+
+    POST /generate/image/...   create a job (or 429 when throttled)
+    GET  /jobs/<id>            queued -> processing -> completed | failed
+    GET  /images/<id>.png      deterministic bytes, Range supported
+
+Job latency is drawn from a log-normal distribution per job (median and
+spread configurable, optionally per model), and a share of submissions can
+be throttled or fail. If the request carries ``X-Webhook-URL`` the server
+POSTs the finished job there, like Krea does.
+
+Usage:
+    server = FakeKrea(latency_median=2.0, throttle_rate=0.05).start()
+    api = KreaAPI(key_id="x", secret="y", base_url=server.url)
+    ...
+    print(server.stats)
+    server.stop()
+
+Or standalone:  python3 fake_krea.py --port 8899 --latency-median 2
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import random
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+
+class FakeKrea:
+    """Threaded fake Krea server with configurable latency and failures."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_median: float = 1.0,
+        latency_sigma: float = 0.5,
+        model_latency: Optional[Dict[str, float]] = None,
+        submit_latency: float = 0.05,
+        queue_fraction: float = 0.3,
+        failure_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        max_concurrent_submits: Optional[int] = None,
+        retry_after: float = 0.5,
+        image_bytes: int = 256 * 1024,
+        seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free one)
+            latency_median: Median seconds from submit to completion
+            latency_sigma: Log-normal sigma (0 = every job takes the median)
+            model_latency: Per-model median overrides, keyed by endpoint
+                suffix (e.g. {"imagen-4-fast": 0.5})
+            submit_latency: Seconds the create-job request takes
+            queue_fraction: Share of each job's latency spent "queued"
+            failure_rate: Probability a job ends "failed"
+            throttle_rate: Probability a submission gets 429 + Retry-After
+            max_concurrent_submits: Submissions beyond this many at once get 429
+            retry_after: Retry-After seconds sent with 429s
+            image_bytes: Size of each served image
+            seed: Seed for the latency/failure RNG, for repeatable runs
+        """
+        self.host = host
+        self.port = port
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.model_latency = model_latency or {}
+        self.submit_latency = submit_latency
+        self.queue_fraction = queue_fraction
+        self.failure_rate = failure_rate
+        self.throttle_rate = throttle_rate
+        self.max_concurrent_submits = max_concurrent_submits
+        self.retry_after = retry_after
+        self.image_bytes = image_bytes
+
+        self._rng = random.Random(seed)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, dict] = {}
+        self._submitting = 0
+        self._server: Optional[ThreadingHTTPServer] = None
+        self.stats: Dict[str, int] = {}
+        self.reset()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def reset(self):
+        """Zero the request counters (jobs are kept)."""
+        with self._lock:
+            self.stats = {
+                "submits": 0, "throttled": 0, "polls": 0,
+                "downloads": 0, "download_bytes": 0, "webhooks": 0,
+            }
+
+    def start(self) -> "FakeKrea":
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                if self.path.startswith("/generate/"):
+                    fake._submit(self)
+                else:
+                    self._json(404, {"error": "not found"})
+
+            def do_GET(self):
+                if self.path.startswith("/jobs/"):
+                    fake._poll(self, self.path[len("/jobs/"):])
+                elif self.path.startswith("/images/"):
+                    fake._image(self, self.path[len("/images/"):].split(".")[0])
+                else:
+                    self._json(404, {"error": "not found"})
+
+            def _json(self, status: int, obj: dict, headers: Optional[dict] = None):
+                body = json.dumps(obj).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="fake-krea", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _submit(self, handler):
+        with self._lock:
+            self.stats["submits"] += 1
+            crowded = (
+                self.max_concurrent_submits is not None
+                and self._submitting >= self.max_concurrent_submits
+            )
+            if crowded or self._rng.random() < self.throttle_rate:
+                self.stats["throttled"] += 1
+                throttled = True
+            else:
+                throttled = False
+                self._submitting += 1
+        if throttled:
+            handler._json(429, {"error": "rate limited"}, {"Retry-After": str(self.retry_after)})
+            return
+
+        try:
+            time.sleep(self.submit_latency)
+            model = handler.path.rstrip("/").rsplit("/", 1)[-1]
+            median = self.model_latency.get(model, self.latency_median)
+            with self._lock:
+                job_id = f"fake-{next(self._ids)}"
+                latency = median * math.exp(self._rng.gauss(0, self.latency_sigma))
+                failed = self._rng.random() < self.failure_rate
+            now = time.time()
+            job = {
+                "job_id": job_id,
+                "created": now,
+                "started": now + latency * self.queue_fraction,
+                "done": now + latency,
+                "failed": failed,
+                "webhook": handler.headers.get("X-Webhook-URL"),
+            }
+            with self._lock:
+                self._jobs[job_id] = job
+            if job["webhook"]:
+                timer = threading.Timer(latency, self._callback, (job_id,))
+                timer.daemon = True
+                timer.start()
+            handler._json(200, {"job_id": job_id, "status": "queued", "created_at": now})
+        finally:
+            with self._lock:
+                self._submitting -= 1
+
+    def _state(self, job_id: str) -> Optional[dict]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        now = time.time()
+        if now >= job["done"]:
+            if job["failed"]:
+                return {"job_id": job_id, "status": "failed", "error": "simulated failure"}
+            return {
+                "job_id": job_id,
+                "status": "completed",
+                "result": {"urls": [f"{self.url}/images/{job_id}.png"]},
+            }
+        return {"job_id": job_id, "status": "processing" if now >= job["started"] else "queued"}
+
+    def _poll(self, handler, job_id: str):
+        with self._lock:
+            self.stats["polls"] += 1
+            state = self._state(job_id)
+        if state is None:
+            handler._json(404, {"error": "job not found"})
+        else:
+            handler._json(200, state)
+
+    def _callback(self, job_id: str):
+        with self._lock:
+            state = self._state(job_id)
+            url = self._jobs[job_id]["webhook"]
+            self.stats["webhooks"] += 1
+        req = urllib.request.Request(url, data=json.dumps(state).encode(), method="POST")
+        req.add_header("Content-Type", "application/json")
+        try:
+            urllib.request.urlopen(req, timeout=10).close()
+        except Exception:
+            pass
+
+    def _image(self, handler, job_id: str):
+        # Deterministic bytes per job, so reruns hash the same.
+        block = hashlib.sha256(job_id.encode()).digest()
+        data = (block * (self.image_bytes // len(block) + 1))[:self.image_bytes]
+        start = 0
+        rng = handler.headers.get("Range")
+        if rng and rng.startswith("bytes="):
+            start = min(int(rng[6:].split("-")[0] or 0), len(data))
+        body = data[start:]
+        with self._lock:
+            self.stats["downloads"] += 1
+            self.stats["download_bytes"] += len(body)
+        handler.send_response(206 if rng else 200)
+        handler.send_header("Content-Type", "image/png")
+        handler.send_header("Content-Length", str(len(body)))
+        if rng:
+            handler.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+        handler.end_headers()
+        handler.wfile.write(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake Krea.ai API server")
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument("--latency-median", type=float, default=1.0)
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeKrea(
+        port=args.port,
+        latency_median=args.latency_median,
+        latency_sigma=args.latency_sigma,
+        failure_rate=args.failure_rate,
+        throttle_rate=args.throttle_rate,
+    ).start()
+    print(f"Fake Krea listening on {server.url} (Ctrl-C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
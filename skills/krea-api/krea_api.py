@@ -11,12 +11,20 @@ Or use as a module:
     urls = api.generate_and_wait(prompt="...")
 """
 
+import heapq
 import json
+import threading
 import time
 import urllib.request
 import urllib.error
 import argparse
-from typing import Optional, List
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed as futures_as_completed, wait as futures_wait
+from typing import Dict, Iterator, Optional, List, Tuple
+
+from krea_credentials import CredentialProvider
+from krea_ratelimit import RateLimiter
+from krea_telemetry import Telemetry
 
 
 class KreaAPI:
@@ -44,22 +52,46 @@ class KreaAPI:
         "runway-gen-4": "/generate/image/runway/gen-4",
     }
     
-    def __init__(self, key_id: str = None, secret: str = None):
+    def __init__(
+        self,
+        key_id: str = None,
+        secret: str = None,
+        base_url: str = None,
+        cache=None,
+        limiter: Optional[RateLimiter] = None,
+        telemetry: Optional[Telemetry] = None,
+        credentials: Optional[CredentialProvider] = None,
+    ):
         """
         Initialize the Krea API client.
         
         Args:
             key_id: Your API key ID (or set via config)
             secret: Your API secret (or set via config)
+            base_url: Override the API host (e.g. a local stub server)
+            cache: Optional krea_cache.ResultCache; seeded requests with
+                parameters seen before return the stored result
+            limiter: RateLimiter for this client (default: one shared by
+                every client in the process)
+            telemetry: Telemetry sink (default: the process-wide one)
+            credentials: Where to look up missing credentials (default: the
+                process-wide provider; env, credentials file, clawdbot)
         """
         # Try config if not provided
+        self._credentials: Optional[CredentialProvider] = None
         if not key_id or not secret:
-            key_id = key_id or self._get_config("key_id")
-            secret = secret or self._get_config("secret")
+            self._credentials = credentials or CredentialProvider.shared()
+            found = self._credentials.get()
+            if found:
+                key_id = key_id or found[0]
+                secret = secret or found[1]
         
         if not key_id or not secret:
-            raise ValueError("API credentials required. Set via args or clawdbot config.")
+            raise ValueError(
+                "API credentials required. Set via args, KREA_KEY_ID/KREA_SECRET, or clawdbot config."
+            )
         
+        self.base_url = (base_url or self.BASE_URL).rstrip("/")
         self.token = f"{key_id}:{secret}"
         self.headers = {
             "Authorization": f"Bearer {self.token}",
@@ -67,18 +99,16 @@ class KreaAPI:
             "Accept": "application/json",
             "User-Agent": "Mozilla/5.0 (compatible; Klawf/1.0; +https://clawdhub.com/FossilizedCarlos/krea-api)"
         }
-    
-    def _get_config(self, key: str) -> Optional[str]:
-        """Get config from clawdbot config if available."""
-        try:
-            import subprocess
-            result = subprocess.run(
-                ["clawdbot", "config", "get", f"skill.krea_api.{key}"],
-                capture_output=True, text=True
-            )
-            return result.stdout.strip() if result.returncode == 0 else None
-        except Exception:
-            return None
+        self.limiter = limiter or RateLimiter.shared()
+        self.telemetry = telemetry or Telemetry.shared()
+        # job_id -> {"model", "submitted", "polls", "running"} until it finishes;
+        # updated from generate_many's worker threads, hence the lock.
+        self._job_stats: Dict[str, dict] = {}
+        self._stats_lock = threading.Lock()
+        self.cache = cache
+        # job_id -> result-cache key, and jobs served from the cache; see forget().
+        self._cache_keys: Dict[str, str] = {}
+        self._cached_jobs: Dict[str, dict] = {}
     
     def generate_image(
         self,
@@ -105,15 +135,165 @@ class KreaAPI:
             webhook_url: URL to receive completion notification
             
         Returns:
-            dict with job_id, status, created_at
+            dict with job_id, status, created_at. On a result-cache hit, the
+            stored completed job with ``cached: True`` (and ``local_file``
+            if an image was attached).
+        """
+        cache_key = self._cache_key(model, prompt, width, height, steps, guidance_scale, seed)
+        cached = self._cache_hit(cache_key)
+        if cached:
+            return cached
+        
+        url, payload, headers = self._generate_request(
+            prompt, model, width, height, steps, guidance_scale, seed, webhook_url
+        )
+        
+        req = urllib.request.Request(url, data=json.dumps(payload).encode(), method="POST")
+        for k, v in headers.items():
+            req.add_header(k, v)
+        
+        # Not idempotent: only retried when Krea refused the request outright.
+        started = time.time()
+        try:
+            job = self.limiter.call(lambda: self._open_json(req), idempotent=False)
+        except urllib.error.HTTPError as e:
+            self._rejected(e)
+            raise
+        self._track_submitted(job, model, started)
+        if cache_key:
+            self._cache_keys[job["job_id"]] = cache_key
+        return job
+    
+    def get_job(self, job_id: str) -> dict:
+        """Get the status and result of a job."""
+        if job_id in self._cached_jobs:
+            return self._cached_jobs[job_id]
+        
+        url, headers = self._job_request(job_id)
+        req = urllib.request.Request(url, method="GET")
+        for k, v in headers.items():
+            req.add_header(k, v)
+
+        try:
+            job = self.limiter.call(lambda: self._open_json(req))
+        except urllib.error.HTTPError as e:
+            self._rejected(e)
+            raise
+        self._track_status(job)
+        self._cache_completed(job)
+        return job
+    
+    @staticmethod
+    def _open_json(req: urllib.request.Request) -> dict:
+        with urllib.request.urlopen(req, timeout=60) as response:
+            return json.loads(response.read().decode())
+    
+    def _rejected(self, error: urllib.error.HTTPError):
+        """On a 401, drop looked-up credentials so the next client resolves them afresh."""
+        if error.code == 401 and self._credentials is not None:
+            self._credentials.invalidate()
+    
+    def cache_file(self, job_id: str, filepath: str) -> Optional[str]:
+        """
+        Keep a downloaded image alongside the cached result for ``job_id``.
+        
+        No-op (returns None) without a cache or for unseeded jobs. Releases
+        the job's cache key, so call it once per completed job.
         """
+        key = self._cache_keys.pop(job_id, None)
+        if not key:
+            return None
+        return self.cache.attach_file(key, filepath)
+    
+    def forget(self, job_id: str, keep_cache_key: bool = False):
+        """
+        Drop the client's bookkeeping for a job that finished or was given up on.
+        
+        Args:
+            job_id: Job to forget
+            keep_cache_key: Keep its result-cache key for a later cache_file()
+        """
+        with self._stats_lock:
+            self._job_stats.pop(job_id, None)
+        self._cached_jobs.pop(job_id, None)
+        if not keep_cache_key:
+            self._cache_keys.pop(job_id, None)
+    
+    def _cache_key(self, model, prompt, width, height, steps, guidance_scale, seed) -> Optional[str]:
+        """Result-cache key, or None when caching doesn't apply (no cache or no seed)."""
+        if self.cache is None or not seed:
+            return None
+        return self.cache.key(model, prompt, width, height, steps, guidance_scale, seed)
+    
+    def _cache_hit(self, key: Optional[str]) -> Optional[dict]:
+        entry = self.cache.get(key) if key else None
+        if not entry:
+            return None
+        job = dict(entry["job"], cached=True)
+        if entry["local_file"]:
+            job["local_file"] = entry["local_file"]
+        self._cache_keys[job["job_id"]] = key
+        self._cached_jobs[job["job_id"]] = job
+        return job
+    
+    def _track_submitted(self, job: dict, model: str, started: float):
+        now = time.time()
+        self.telemetry.observe("submit_seconds", model, now - started)
+        self.telemetry.incr("jobs_submitted", model)
+        with self._stats_lock:
+            self._job_stats[job["job_id"]] = {
+                "model": model, "submitted": now, "polls": 0, "running": False,
+            }
+    
+    def _track_status(self, job: dict, polled: bool = True):
+        """Feed an observed job state into telemetry."""
+        status = job.get("status")
+        with self._stats_lock:
+            stats = self._job_stats.get(job.get("job_id"))
+            if stats is None:
+                return
+            if polled:
+                stats["polls"] += 1
+            finished = status in ("completed", "failed", "cancelled")
+            started = not finished and status not in ("queued", "pending") and not stats["running"]
+            if finished:
+                self._job_stats.pop(job["job_id"], None)
+            elif started:
+                stats["running"] = True
+        elapsed = time.time() - stats["submitted"]
+        if finished:
+            self.telemetry.observe("complete_seconds", stats["model"], elapsed)
+            self.telemetry.observe("polls", stats["model"], stats["polls"])
+            self.telemetry.incr(
+                "jobs_completed" if status == "completed" else "jobs_failed", stats["model"]
+            )
+        elif started:
+            self.telemetry.observe("queue_seconds", stats["model"], elapsed)
+    
+    def _cache_completed(self, job: dict):
+        key = self._cache_keys.get(job.get("job_id"))
+        if key and job.get("status") == "completed":
+            self.cache.put(key, job)
+    
+    def _generate_request(
+        self,
+        prompt: str,
+        model: str,
+        width: int,
+        height: int,
+        steps: int,
+        guidance_scale: float,
+        seed: Optional[str],
+        webhook_url: Optional[str],
+    ) -> Tuple[str, dict, dict]:
+        """Build (url, payload, headers) for a generation request."""
         endpoint = self.IMAGE_MODELS.get(model)
         if not endpoint:
             raise ValueError(
                 f"Unknown model: {model}. Available: {list(self.IMAGE_MODELS.keys())}"
             )
         
-        url = f"{self.BASE_URL}{endpoint}"
+        url = f"{self.base_url}{endpoint}"
         
         payload = {
             "prompt": prompt,
@@ -130,64 +310,389 @@ class KreaAPI:
         if webhook_url:
             headers["X-Webhook-URL"] = webhook_url
         
-        req = urllib.request.Request(url, data=json.dumps(payload).encode(), method="POST")
-        for k, v in headers.items():
-            req.add_header(k, v)
-        
-        with urllib.request.urlopen(req, timeout=60) as response:
-            return json.loads(response.read().decode())
+        return url, payload, headers
     
-    def get_job(self, job_id: str) -> dict:
-        """Get the status and result of a job."""
-        url = f"{self.BASE_URL}/jobs/{job_id}"
-        req = urllib.request.Request(url, method="GET")
-        for k, v in self.headers.items():
-            # Content-Type is harmless on GET but unnecessary.
-            if k.lower() == "content-type":
-                continue
-            req.add_header(k, v)
-
-        with urllib.request.urlopen(req, timeout=60) as response:
-            return json.loads(response.read().decode())
+    def _job_request(self, job_id: str) -> Tuple[str, dict]:
+        """Build (url, headers) for a job status request."""
+        url = f"{self.base_url}/jobs/{job_id}"
+        # Content-Type is harmless on GET but unnecessary.
+        headers = {k: v for k, v in self.headers.items() if k.lower() != "content-type"}
+        return url, headers
     
     def wait_for_completion(
         self,
         job_id: str,
         poll_interval: float = 2.0,
-        timeout: float = 120.0
+        timeout: float = 120.0,
+        webhook=None,
     ) -> dict:
-        """Poll until job completes or times out."""
+        """
+        Poll until job completes or times out.
+        
+        With ``webhook`` (a krea_webhook.WebhookListener the job was created
+        with), waits for the callback instead and only polls every
+        ``webhook.fallback_interval`` seconds as a safety net. A callback
+        that isn't final hands over to polling every ``poll_interval``.
+        """
+        if job_id in self._cached_jobs:
+            job = self._cached_jobs[job_id]
+            self.forget(job_id, keep_cache_key=True)
+            return job
         start = time.time()
-        while time.time() - start < timeout:
-            job = self.get_job(job_id)
-            status = job.get("status")
-            
-            if status == "completed":
-                return job
-            elif status == "failed":
-                raise Exception(f"Job failed: {job}")
-            elif status == "cancelled":
-                raise Exception("Job was cancelled")
-            
-            time.sleep(poll_interval)
+        arrival = webhook.expect(job_id) if webhook else None
+        status = None
+        try:
+            while time.time() - start < timeout:
+                if arrival is not None:
+                    remaining = max(0.0, timeout - (time.time() - start))
+                    futures_wait([arrival], timeout=min(webhook.fallback_interval, remaining))
+                    if arrival.done():
+                        job = self._callback_job(arrival.result())
+                        # A done future returns at once from now on: if this
+                        # callback wasn't terminal, go back to plain polling.
+                        arrival = None
+                    else:
+                        job = self.get_job(job_id)
+                else:
+                    job = self.get_job(job_id)
+                status = job.get("status")
+                
+                if status == "completed":
+                    return job
+                elif status == "failed":
+                    raise Exception(f"Job failed: {job}")
+                elif status == "cancelled":
+                    raise Exception("Job was cancelled")
+                
+                if arrival is None:
+                    time.sleep(poll_interval)
+        finally:
+            if webhook:
+                webhook.forget(job_id)
+            self.forget(job_id, keep_cache_key=status == "completed")
         
         raise TimeoutError(f"Job {job_id} did not complete within {timeout}s")
     
-    def generate_and_wait(self, prompt: str, **kwargs) -> List[str]:
-        """Generate an image and wait for the result."""
+    def generate_and_wait(self, prompt: str, webhook=None, **kwargs) -> List[str]:
+        """
+        Generate an image and wait for the result.
+        
+        Pass a started krea_webhook.WebhookListener as ``webhook`` to be
+        notified by callback instead of polling.
+        """
+        if webhook:
+            kwargs["webhook_url"] = webhook.url
         job = self.generate_image(prompt, **kwargs)
         print(f"Job created: {job['job_id']} (status: {job['status']})")
         
-        result = self.wait_for_completion(job["job_id"])
+        result = self.wait_for_completion(job["job_id"], webhook=webhook)
         return result.get("result", {}).get("urls", [])
+    
+    def generate_many(
+        self,
+        prompt: str,
+        models: List[str],
+        mode: str = "all",
+        timeout: float = 300.0,
+        webhook=None,
+        **kwargs,
+    ) -> Iterator[dict]:
+        """
+        Submit ``prompt`` to several models at once and yield jobs as they finish.
+        
+        Args:
+            prompt: Text description of the image
+            models: Model names from IMAGE_MODELS
+            mode: "all" yields every model's final job in completion order;
+                "first" yields only the first job to complete and stops
+                tracking the rest (they still run, and bill, on Krea)
+            timeout: Seconds to wait for each job
+            webhook: Optional started WebhookListener, as for generate_and_wait
+            **kwargs: Passed to generate_image (width, height, seed, ...)
+            
+        Yields:
+            Job dicts with ``model`` set. In "all" mode, failed submissions
+            and timeouts are yielded too, with ``status`` "failed" /
+            "timeout" and an ``error``.
+            
+        Raises:
+            Exception: In "first" mode, if no model completes
+        """
+        self._check_many(models, mode)
+        if webhook:
+            kwargs["webhook_url"] = webhook.url
+        
+        tracker = JobTracker(self, timeout=timeout, webhook=webhook)
+        job_models: Dict[str, str] = {}
+        failures: List[dict] = []
+        with ThreadPoolExecutor(max_workers=len(models) or 1) as pool:
+            submits = {
+                pool.submit(self.generate_image, prompt, model=model, **kwargs): model
+                for model in models
+            }
+            for future in futures_as_completed(submits):
+                model = submits[future]
+                try:
+                    job = future.result()
+                except Exception as e:
+                    failed = {"job_id": None, "model": model, "status": "failed", "error": str(e)}
+                    failures.append(failed)
+                    if mode == "all":
+                        yield failed
+                    continue
+                job_models[job["job_id"]] = model
+                tracker.add(job["job_id"], model=model)
+        
+        try:
+            for job in tracker.as_completed():
+                job = dict(job, model=job_models[job["job_id"]])
+                if mode == "all":
+                    yield job
+                elif job.get("status") == "completed":
+                    yield job
+                    return
+                else:
+                    failures.append(job)
+        finally:
+            # Stop tracking the losers (or everything, if the caller stopped
+            # early); finished jobs were already released and keep their cache key.
+            for job_id in job_models:
+                tracker.discard(job_id)
+        
+        if mode == "first":
+            raise Exception(f"No model completed: {failures}")
+    
+    def _check_many(self, models: List[str], mode: str):
+        if mode not in ("all", "first"):
+            raise ValueError(f"mode must be 'all' or 'first', not {mode!r}")
+        for model in models:
+            if model not in self.IMAGE_MODELS:
+                raise ValueError(
+                    f"Unknown model: {model}. Available: {list(self.IMAGE_MODELS.keys())}"
+                )
+    
+    def _callback_job(self, payload: dict) -> dict:
+        """Turn a webhook payload into a full job, fetching it if the callback was terse."""
+        if payload.get("status") in (None, "completed") and "result" not in payload:
+            return self.get_job(payload["job_id"])
+        self._track_status(payload, polled=False)
+        return payload
+
+class JobTracker:
+    """
+    Poll many Krea jobs from one scheduler and yield them as they finish.
+
+    Each job gets its own poll schedule: the first poll lands near the
+    model's typical completion time (learned from earlier jobs in this
+    process), then polls back off geometrically up to ``max_interval``.
+    New jobs can be added while iterating ``as_completed()``.
+
+    With a krea_webhook.WebhookListener, jobs are yielded as soon as their
+    callback arrives and polling drops to every ``fallback_interval``
+    seconds; pass the same listener's ``url`` as ``webhook_url`` when
+    creating the jobs.
+
+    Usage:
+        tracker = JobTracker(api)
+        for prompt in prompts:
+            tracker.add(api.generate_image(prompt, model="flux")["job_id"], model="flux")
+        for job in tracker.as_completed():
+            print(job["job_id"], job["status"])
+    """
+
+    # Smoothed seconds-to-complete per model, shared by every tracker.
+    _model_latency: Dict[str, float] = {}
+    _latency_lock = threading.Lock()
+    LATENCY_SMOOTHING = 0.3
+
+    def __init__(
+        self,
+        api: "KreaAPI",
+        min_interval: float = 1.0,
+        max_interval: float = 15.0,
+        backoff: float = 1.5,
+        timeout: float = 300.0,
+        webhook=None,
+    ):
+        """
+        Args:
+            api: Client used for get_job calls
+            min_interval: Shortest gap between polls of one job
+            max_interval: Longest gap between polls of one job
+            backoff: Multiplier applied to a job's interval after each poll
+            timeout: Seconds after submission before a job is given up on
+            webhook: Optional started WebhookListener the jobs report to
+        """
+        self.api = api
+        self.webhook = webhook
+        if webhook:
+            # Polls are only a safety net when callbacks are expected.
+            min_interval = max(min_interval, webhook.fallback_interval)
+            max_interval = max(max_interval, min_interval)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.timeout = timeout
+        self.poll_count = 0
+        self._jobs: Dict[str, dict] = {}
+        self._schedule: List[Tuple[float, int, str]] = []
+        self._seq = 0
+        self._arrivals: "queue.Queue[str]" = queue.Queue()
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def add(self, job_id: str, model: Optional[str] = None, submitted_at: Optional[float] = None):
+        """Start tracking a job. ``model`` enables latency-aware scheduling."""
+        now = time.time()
+        submitted = submitted_at or now
+        self._jobs[job_id] = {
+            "model": model,
+            "submitted": submitted,
+            "interval": self.min_interval,
+            "polls": 0,
+            "error": None,
+        }
+        if job_id in getattr(self.api, "_cached_jobs", {}):
+            # Served from the result cache: nothing to wait for.
+            self._push(now, job_id)
+            return
+        expected = None if self.webhook else self.expected_latency(model)
+        first = submitted + (0.8 * expected if expected else self.min_interval)
+        self._push(max(first, now), job_id)
+        if self.webhook:
+            arrival = self.webhook.expect(job_id)
+            arrival.add_done_callback(lambda _: self._arrivals.put(job_id))
+
+    def discard(self, job_id: str, keep_cache_key: bool = False):
+        """
+        Stop tracking a job without waiting for it (see KreaAPI.forget).
+
+        No-op for jobs no longer tracked, e.g. ones already yielded.
+        """
+        if self._jobs.pop(job_id, None) is None:
+            return
+        if self.webhook:
+            self.webhook.forget(job_id)
+        self.api.forget(job_id, keep_cache_key=keep_cache_key)
+
+    @classmethod
+    def expected_latency(cls, model: Optional[str]) -> Optional[float]:
+        """Smoothed seconds-to-complete observed for ``model``, if any."""
+        with cls._latency_lock:
+            return cls._model_latency.get(model)
+
+    @classmethod
+    def _observe_latency(cls, model: Optional[str], seconds: float):
+        if model is None:
+            return
+        with cls._latency_lock:
+            old = cls._model_latency.get(model)
+            a = cls.LATENCY_SMOOTHING
+            cls._model_latency[model] = seconds if old is None else a * seconds + (1 - a) * old
+
+    def as_completed(self) -> Iterator[dict]:
+        """
+        Yield each job's final state in completion order.
+
+        Completed, failed and cancelled jobs are yielded as returned by
+        get_job. Jobs that pass ``timeout`` are yielded as
+        ``{"job_id": ..., "status": "timeout"}`` (with ``error`` set if the
+        last poll raised).
+        """
+        while self._jobs:
+            due, _, job_id = self._schedule[0]
+            state = self._jobs.get(job_id)
+            if state is None:
+                # Discarded, or a stale entry for a re-added job.
+                heapq.heappop(self._schedule)
+                continue
+
+            delay = due - time.time()
+            if delay > 0:
+                arrived = self._wait_for_arrival(delay)
+                if arrived is not None:
+                    state = self._jobs[arrived]
+                    try:
+                        job = self.api._callback_job(self.webhook.expect(arrived).result())
+                    except Exception as e:
+                        # Couldn't fetch the full job; regular polling will.
+                        state["error"] = str(e)
+                        continue
+                    self._finish(arrived, state, job)
+                    yield job
+                # Either way the head of the schedule may have changed.
+                continue
+            heapq.heappop(self._schedule)
+
+            try:
+                job = self.api.get_job(job_id)
+                state["error"] = None
+            except Exception as e:
+                # Transient poll failures just push the job back.
+                job = {"job_id": job_id, "status": "unknown"}
+                state["error"] = str(e)
+            self.poll_count += 1
+            state["polls"] += 1
+
+            now = time.time()
+            if job.get("status") in ("completed", "failed", "cancelled"):
+                self._finish(job_id, state, job)
+                yield job
+                continue
+
+            if now - state["submitted"] >= self.timeout:
+                self.discard(job_id)
+                timed_out = {"job_id": job_id, "status": "timeout"}
+                if state["error"]:
+                    timed_out["error"] = state["error"]
+                yield timed_out
+                continue
+
+            next_poll = now + state["interval"]
+            expected = self.expected_latency(state["model"])
+            if expected and now - state["submitted"] < expected:
+                # Don't bother polling again before the model usually finishes.
+                next_poll = max(next_poll, state["submitted"] + expected)
+            state["interval"] = min(state["interval"] * self.backoff, self.max_interval)
+            self._push(min(next_poll, state["submitted"] + self.timeout), job_id)
+
+    def _wait_for_arrival(self, delay: float) -> Optional[str]:
+        """Sleep up to ``delay``; return a tracked job id if its callback lands first."""
+        if not self.webhook:
+            time.sleep(delay)
+            return None
+        deadline = time.time() + delay
+        while True:
+            try:
+                job_id = self._arrivals.get(timeout=max(0.0, deadline - time.time()))
+            except queue.Empty:
+                return None
+            if job_id in self._jobs:
+                return job_id
+
+    def _finish(self, job_id: str, state: dict, job: dict):
+        # A completed job's cache key is still needed by cache_file().
+        self.discard(job_id, keep_cache_key=job.get("status") == "completed")
+        if job.get("status") == "completed":
+            self._observe_latency(state["model"], time.time() - state["submitted"])
+
+    def _push(self, due: float, job_id: str):
+        self._seq += 1
+        heapq.heappush(self._schedule, (due, self._seq, job_id))
 
 
 def main():
     parser = argparse.ArgumentParser(description="Generate images with Krea.ai API")
     parser.add_argument("--prompt", help="Image description")
     parser.add_argument("--model", default="flux", help="Model name (default: flux)")
+    parser.add_argument("--models", help="Comma-separated models to run the prompt on concurrently")
+    parser.add_argument("--first", action="store_true",
+                        help="With --models, keep only whichever model finishes first")
     parser.add_argument("--width", type=int, default=1024, help="Image width")
     parser.add_argument("--height", type=int, default=1024, help="Image height")
+    parser.add_argument("--seed", help="Random seed (seeded runs can be served from --cache-dir)")
+    parser.add_argument("--cache-dir", help="Reuse results of identical seeded requests from this directory")
     parser.add_argument("--key-id", help="API key ID")
     parser.add_argument("--secret", help="API secret")
     parser.add_argument("--list-models", action="store_true", help="List available models")
@@ -203,14 +708,37 @@ def main():
     if not args.prompt:
         parser.error("--prompt is required unless --list-models is set")
 
-    api = KreaAPI(key_id=args.key_id, secret=args.secret)
+    cache = None
+    if args.cache_dir:
+        from krea_cache import ResultCache
+        cache = ResultCache(args.cache_dir)
+
+    api = KreaAPI(key_id=args.key_id, secret=args.secret, cache=cache)
+
+    if args.models:
+        models = [m.strip() for m in args.models.split(",") if m.strip()]
+        print(f"Generating '{args.prompt[:50]}...' with {', '.join(models)}...")
+        jobs = api.generate_many(
+            prompt=args.prompt,
+            models=models,
+            mode="first" if args.first else "all",
+            width=args.width,
+            height=args.height,
+            seed=args.seed,
+        )
+        for job in jobs:
+            print(f"\n{job['model']}: {job['status']}")
+            for url in job.get("result", {}).get("urls", []):
+                print(f"  {url}")
+        return
 
     print(f"Generating '{args.prompt[:50]}...' with {args.model}...")
     urls = api.generate_and_wait(
         prompt=args.prompt,
         model=args.model,
         width=args.width,
-        height=args.height
+        height=args.height,
+        seed=args.seed,
     )
 
     print("\nGenerated images:")
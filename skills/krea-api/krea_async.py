@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Krea.ai API - asyncio client
+
+Same methods as KreaAPI, but coroutines that share one pool of keep-alive
+connections, so thousands of jobs can be submitted and polled from a single
+event loop without a TCP+TLS handshake per request.
+
+Usage:
+    import asyncio
+    from krea_async import AsyncKreaAPI
+
+    async def main():
+        async with AsyncKreaAPI(key_id="...", secret="...") as api:
+            jobs = await asyncio.gather(*(api.generate_image(p) for p in prompts))
+            results = await asyncio.gather(
+                *(api.wait_for_completion(j["job_id"]) for j in jobs)
+            )
+
+Stdlib only: the pool speaks HTTP/1.1 directly over asyncio streams.
+"""
+
+import asyncio
+import http.client
+import io
+import json
+import ssl
+import time
+import urllib.error
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from krea_api import KreaAPI
+
+
+class _Connection:
+    """One keep-alive HTTP/1.1 connection."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.reused = False
+
+    def close(self):
+        self.writer.close()
+
+
+class AsyncConnectionPool:
+    """
+    Keep-alive HTTP/1.1 connection pool on asyncio streams.
+
+    Connections are opened lazily, returned to the pool after each complete
+    response and reused for the next request to the same origin. At most
+    ``max_connections`` requests per origin are on the wire at once; callers
+    beyond that wait for a free connection.
+    """
+
+    def __init__(self, max_connections: int = 10):
+        self.max_connections = max_connections
+        self._idle: Dict[Tuple[str, str, int], List[_Connection]] = {}
+        self._limits: Dict[Tuple[str, str, int], asyncio.Semaphore] = {}
+        self._ssl = ssl.create_default_context()
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[dict] = None,
+        body: Optional[bytes] = None,
+        timeout: float = 60,
+    ) -> Tuple[int, http.client.HTTPMessage, bytes]:
+        """
+        Send one request and return (status, headers, body).
+
+        Raises:
+            urllib.error.HTTPError: for 4xx/5xx responses, like urlopen does
+        """
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        port = parts.port or (443 if scheme == "https" else 80)
+        origin = (scheme, parts.hostname, port)
+        target = parts.path or "/"
+        if parts.query:
+            target += f"?{parts.query}"
+
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {parts.netloc}"]
+        for k, v in (headers or {}).items():
+            lines.append(f"{k}: {v}")
+        lines.append(f"Content-Length: {len(body or b'')}")
+        raw = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (body or b"")
+
+        limit = self._limits.setdefault(origin, asyncio.Semaphore(self.max_connections))
+        async with limit:
+            conn = await self._acquire(origin)
+            try:
+                status, reason, resp_headers, data, keep_alive = await asyncio.wait_for(
+                    self._exchange(conn, raw), timeout
+                )
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                conn.close()
+                if not conn.reused:
+                    raise
+                # The server closed an idle keep-alive connection under us;
+                # retry once on a fresh one.
+                conn = await self._open(origin)
+                try:
+                    status, reason, resp_headers, data, keep_alive = await asyncio.wait_for(
+                        self._exchange(conn, raw), timeout
+                    )
+                except BaseException:
+                    conn.close()
+                    raise
+            except BaseException:
+                conn.close()
+                raise
+
+            if keep_alive:
+                conn.reused = True
+                self._idle.setdefault(origin, []).append(conn)
+            else:
+                conn.close()
+
+        if status >= 400:
+            raise urllib.error.HTTPError(url, status, reason, resp_headers, io.BytesIO(data))
+        return status, resp_headers, data
+
+    async def close(self):
+        """Close every idle connection."""
+        for conns in self._idle.values():
+            for conn in conns:
+                conn.close()
+        self._idle.clear()
+
+    async def _acquire(self, origin: Tuple[str, str, int]) -> _Connection:
+        idle = self._idle.get(origin)
+        while idle:
+            conn = idle.pop()
+            if not conn.reader.at_eof() and not conn.writer.is_closing():
+                return conn
+            conn.close()
+        return await self._open(origin)
+
+    async def _open(self, origin: Tuple[str, str, int]) -> _Connection:
+        scheme, host, port = origin
+        reader, writer = await asyncio.open_connection(
+            host, port, ssl=self._ssl if scheme == "https" else None
+        )
+        return _Connection(reader, writer)
+
+    async def _exchange(self, conn: _Connection, raw: bytes):
+        conn.writer.write(raw)
+        await conn.writer.drain()
+
+        status_line = await conn.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed before response")
+        version, status, reason = (status_line.decode("latin-1").rstrip("\r\n").split(" ", 2) + [""])[:3]
+
+        header_bytes = b""
+        while True:
+            line = await conn.reader.readline()
+            if not line:
+                raise asyncio.IncompleteReadError(header_bytes, None)
+            if line in (b"\r\n", b"\n"):
+                break
+            header_bytes += line
+        resp_headers = http.client.parse_headers(io.BytesIO(header_bytes + b"\r\n"))
+
+        keep_alive = version == "HTTP/1.1"
+        connection = (resp_headers.get("Connection") or "").lower()
+        if connection == "close":
+            keep_alive = False
+        elif connection == "keep-alive":
+            keep_alive = True
+
+        if (resp_headers.get("Transfer-Encoding") or "").lower() == "chunked":
+            data = await self._read_chunked(conn.reader)
+        elif resp_headers.get("Content-Length") is not None:
+            data = await conn.reader.readexactly(int(resp_headers["Content-Length"]))
+        else:
+            data = await conn.reader.read()
+            keep_alive = False
+
+        return int(status), reason, resp_headers, data, keep_alive
+
+    @staticmethod
+    async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+        chunks = []
+        while True:
+            size_line = await reader.readline()
+            size = int(size_line.split(b";", 1)[0].strip(), 16)
+            if size == 0:
+                # Skip trailers up to the terminating blank line.
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+
+
+class AsyncKreaAPI(KreaAPI):
+    """asyncio client for Krea.ai image generation API."""
+
+    def __init__(
+        self,
+        key_id: str = None,
+        secret: str = None,
+        base_url: str = None,
+        max_connections: int = 10,
+        timeout: float = 60,
+        cache=None,
+        limiter=None,
+        telemetry=None,
+        credentials=None,
+    ):
+        """
+        Initialize the async Krea API client.
+
+        Args:
+            key_id: Your API key ID (or set via config)
+            secret: Your API secret (or set via config)
+            base_url: Override the API host (e.g. a local stub server)
+            max_connections: Keep-alive connections shared by all calls
+            timeout: Per-request timeout in seconds
+            cache: Optional krea_cache.ResultCache, as for KreaAPI
+            limiter: RateLimiter, as for KreaAPI (default: process-wide)
+            telemetry: Telemetry sink, as for KreaAPI (default: process-wide)
+            credentials: CredentialProvider, as for KreaAPI (default: process-wide)
+        """
+        super().__init__(
+            key_id=key_id, secret=secret, base_url=base_url, cache=cache,
+            limiter=limiter, telemetry=telemetry, credentials=credentials,
+        )
+        self.timeout = timeout
+        self.pool = AsyncConnectionPool(max_connections=max_connections)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        """Close pooled connections."""
+        await self.pool.close()
+
+    async def generate_image(
+        self,
+        prompt: str,
+        model: str = "flux",
+        width: int = 1024,
+        height: int = 1024,
+        steps: int = 25,
+        guidance_scale: float = 3.0,
+        seed: Optional[str] = None,
+        webhook_url: Optional[str] = None,
+    ) -> dict:
+        """Create an image generation job. See KreaAPI.generate_image."""
+        cache_key = self._cache_key(model, prompt, width, height, steps, guidance_scale, seed)
+        cached = self._cache_hit(cache_key)
+        if cached:
+            return cached
+
+        url, payload, headers = self._generate_request(
+            prompt, model, width, height, steps, guidance_scale, seed, webhook_url
+        )
+        data = json.dumps(payload).encode()
+        started = time.time()
+        try:
+            _, _, body = await self.limiter.acall(
+                lambda: self.pool.request("POST", url, headers, data, timeout=self.timeout),
+                idempotent=False,
+            )
+        except urllib.error.HTTPError as e:
+            self._rejected(e)
+            raise
+        job = json.loads(body.decode())
+        self._track_submitted(job, model, started)
+        if cache_key:
+            self._cache_keys[job["job_id"]] = cache_key
+        return job
+
+    async def get_job(self, job_id: str) -> dict:
+        """Get the status and result of a job."""
+        if job_id in self._cached_jobs:
+            return self._cached_jobs[job_id]
+
+        url, headers = self._job_request(job_id)
+        try:
+            _, _, body = await self.limiter.acall(
+                lambda: self.pool.request("GET", url, headers, timeout=self.timeout)
+            )
+        except urllib.error.HTTPError as e:
+            self._rejected(e)
+            raise
+        job = json.loads(body.decode())
+        self._track_status(job)
+        self._cache_completed(job)
+        return job
+
+    async def wait_for_completion(
+        self,
+        job_id: str,
+        poll_interval: float = 2.0,
+        timeout: float = 120.0,
+        webhook=None,
+    ) -> dict:
+        """Poll until job completes or times out. See KreaAPI.wait_for_completion."""
+        if job_id in self._cached_jobs:
+            job = self._cached_jobs[job_id]
+            self.forget(job_id, keep_cache_key=True)
+            return job
+        start = time.time()
+        arrival = webhook.expect(job_id) if webhook else None
+        status = None
+        try:
+            while time.time() - start < timeout:
+                if arrival is not None:
+                    remaining = max(0.0, timeout - (time.time() - start))
+                    try:
+                        payload = await asyncio.wait_for(
+                            asyncio.shield(asyncio.wrap_future(arrival)),
+                            min(webhook.fallback_interval, remaining),
+                        )
+                    except asyncio.TimeoutError:
+                        job = await self.get_job(job_id)
+                    else:
+                        job = await self._callback_job(payload)
+                        # A done future returns at once from now on: if this
+                        # callback wasn't terminal, go back to plain polling.
+                        arrival = None
+                else:
+                    job = await self.get_job(job_id)
+                status = job.get("status")
+
+                if status == "completed":
+                    return job
+                elif status == "failed":
+                    raise Exception(f"Job failed: {job}")
+                elif status == "cancelled":
+                    raise Exception("Job was cancelled")
+
+                if arrival is None:
+                    await asyncio.sleep(poll_interval)
+        finally:
+            if webhook:
+                webhook.forget(job_id)
+            self.forget(job_id, keep_cache_key=status == "completed")
+
+        raise TimeoutError(f"Job {job_id} did not complete within {timeout}s")
+
+    async def generate_and_wait(self, prompt: str, webhook=None, **kwargs) -> List[str]:
+        """Generate an image and wait for the result."""
+        if webhook:
+            kwargs["webhook_url"] = webhook.url
+        job = await self.generate_image(prompt, **kwargs)
+        print(f"Job created: {job['job_id']} (status: {job['status']})")
+
+        result = await self.wait_for_completion(job["job_id"], webhook=webhook)
+        return result.get("result", {}).get("urls", [])
+
+    async def generate_many(
+        self,
+        prompt: str,
+        models: List[str],
+        mode: str = "all",
+        timeout: float = 300.0,
+        webhook=None,
+        poll_interval: float = 2.0,
+        **kwargs,
+    ) -> AsyncIterator[dict]:
+        """
+        Submit ``prompt`` to several models at once and yield jobs as they finish.
+
+        See KreaAPI.generate_many. In "first" mode the losing waits are
+        cancelled as soon as one model completes.
+        """
+        self._check_many(models, mode)
+        if webhook:
+            kwargs["webhook_url"] = webhook.url
+
+        async def run(model: str) -> dict:
+            job_id = None
+            try:
+                job = await self.generate_image(prompt, model=model, **kwargs)
+                job_id = job["job_id"]
+                job = await self.wait_for_completion(
+                    job_id, poll_interval=poll_interval, timeout=timeout, webhook=webhook
+                )
+            except TimeoutError as e:
+                return {"job_id": job_id, "model": model, "status": "timeout", "error": str(e)}
+            except Exception as e:
+                return {"job_id": job_id, "model": model, "status": "failed", "error": str(e)}
+            return dict(job, model=model)
+
+        tasks = [asyncio.ensure_future(run(model)) for model in models]
+        failures = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                job = await next_done
+                if mode == "all":
+                    yield job
+                elif job.get("status") == "completed":
+                    yield job
+                    return
+                else:
+                    failures.append(job)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        if mode == "first":
+            raise Exception(f"No model completed: {failures}")
+
+    async def _callback_job(self, payload: dict) -> dict:
+        if payload.get("status") in (None, "completed") and "result" not in payload:
+            return await self.get_job(payload["job_id"])
+        self._track_status(payload, polled=False)
+        return payload
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Krea.ai API - on-disk generation result cache
+
+Seeded generations are deterministic, so a finished job can be reused for
+any later request with the same (model, prompt, size, steps, guidance,
+seed). Entries live in a small SQLite database next to optional copies of
+the downloaded images; the least recently used entries are evicted once
+the cache grows past ``max_bytes``, and entries older than ``ttl`` seconds
+are ignored.
+
+Usage:
+    from krea_api import KreaAPI
+    from krea_cache import ResultCache
+
+    api = KreaAPI(cache=ResultCache("~/.cache/krea-api", max_bytes=2 * 1024**3))
+    urls = api.generate_and_wait("A red fox", model="flux", seed="42")
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+
+class ResultCache:
+    """LRU, size-bounded cache of finished Krea jobs keyed on their parameters."""
+
+    def __init__(
+        self,
+        path: str = "~/.cache/krea-api",
+        max_bytes: int = 1024 * 1024 * 1024,
+        ttl: Optional[float] = None,
+    ):
+        """
+        Args:
+            path: Cache directory (created if missing)
+            max_bytes: Evict least recently used entries above this size
+            ttl: Seconds an entry stays valid (None = forever)
+        """
+        self.path = os.path.expanduser(path)
+        self.files_dir = os.path.join(self.path, "files")
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        os.makedirs(self.files_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            os.path.join(self.path, "results.sqlite3"), check_same_thread=False
+        )
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                job TEXT NOT NULL,
+                local_file TEXT,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_lru ON results (last_used)")
+        self._db.commit()
+
+    @staticmethod
+    def key(
+        model: str,
+        prompt: str,
+        width: int,
+        height: int,
+        steps: int,
+        guidance_scale: float,
+        seed: str,
+    ) -> str:
+        """Cache key for one set of generation parameters."""
+        params = [model, prompt, width, height, steps, guidance_scale, str(seed)]
+        return hashlib.sha256(json.dumps(params).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Cached entry for ``key``, or None.
+
+        Returns:
+            dict with ``job`` (the completed job) and ``local_file`` (a
+            cached copy of the image, or None)
+        """
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT job, local_file, created FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            job, local_file, created = row
+            if self.ttl is not None and now - created > self.ttl:
+                self._delete(key, local_file)
+                self._db.commit()
+                return None
+            if local_file and not os.path.exists(local_file):
+                local_file = None
+            self._db.execute("UPDATE results SET last_used = ? WHERE key = ?", (now, key))
+            self._db.commit()
+        return {"job": json.loads(job), "local_file": local_file}
+
+    def put(self, key: str, job: dict):
+        """Store a completed job, keeping any file already attached to ``key``."""
+        data = json.dumps(job)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT local_file FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            local_file = row[0] if row else None
+            self._db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                (key, data, local_file, len(data) + _file_size(local_file), now, now),
+            )
+            self._evict()
+            self._db.commit()
+
+    def attach_file(self, key: str, filepath: str) -> Optional[str]:
+        """
+        Keep a copy of the downloaded image for ``key``.
+
+        Hard-links when possible so the copy costs no extra disk. Returns
+        the cached path, or None if ``key`` isn't cached.
+        """
+        ext = os.path.splitext(filepath)[1] or ".png"
+        cached = os.path.join(self.files_dir, key + ext)
+        with self._lock:
+            row = self._db.execute("SELECT job FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if not os.path.exists(cached):
+                tmp = f"{cached}.tmp{os.getpid()}.{threading.get_ident()}"
+                try:
+                    os.link(filepath, tmp)
+                except OSError:
+                    shutil.copyfile(filepath, tmp)
+                os.replace(tmp, cached)
+            self._db.execute(
+                "UPDATE results SET local_file = ?, size = ? WHERE key = ?",
+                (cached, len(row[0]) + _file_size(cached), key),
+            )
+            self._evict()
+            self._db.commit()
+        return cached
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            for (local_file,) in self._db.execute("SELECT local_file FROM results").fetchall():
+                _remove(local_file)
+            self._db.execute("DELETE FROM results")
+            self._db.commit()
+
+    def _evict(self):
+        """Drop least recently used entries until under max_bytes. Caller holds the lock."""
+        if self.ttl is not None:
+            for key, local_file in self._db.execute(
+                "SELECT key, local_file FROM results WHERE created < ?", (time.time() - self.ttl,)
+            ).fetchall():
+                self._delete(key, local_file)
+
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, local_file, size in self._db.execute(
+            "SELECT key, local_file, size FROM results ORDER BY last_used"
+        ).fetchall():
+            self._delete(key, local_file)
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def _delete(self, key: str, local_file: Optional[str]):
+        self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+        _remove(local_file)
+
+
+def _file_size(path: Optional[str]) -> int:
+    try:
+        return os.path.getsize(path) if path else 0
+    except OSError:
+        return 0
+
+
+def _remove(path: Optional[str]):
+    if path:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
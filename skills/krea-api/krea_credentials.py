@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Krea.ai API - credential resolution
+
+KreaAPI used to shell out to ``clawdbot config get`` twice per client. The
+provider here resolves credentials once per process and tries, in order:
+
+1. ``KREA_KEY_ID`` / ``KREA_SECRET`` environment variables
+2. a JSON credentials file (``KREA_CREDENTIALS_FILE``, default
+   ``~/.config/krea-api/credentials.json``) with ``key_id`` and ``secret``
+3. an on-disk cache of the last clawdbot lookup (mode 0600, expires after
+   ``cache_ttl`` seconds)
+4. ``clawdbot config get`` (both keys looked up in parallel)
+
+Usage:
+    from krea_credentials import CredentialProvider
+    key_id, secret = CredentialProvider.shared().get()
+
+    # No disk cache, env vars only:
+    provider = CredentialProvider(sources=[EnvSource()], cache_path=None)
+    api = KreaAPI(credentials=provider)
+"""
+
+import json
+import os
+import subprocess
+import threading
+import time
+from typing import List, Optional, Sequence, Tuple
+
+Credentials = Tuple[str, str]
+
+# Cached result of a lookup that found nothing, so it isn't repeated.
+_MISSING = object()
+
+DEFAULT_FILE = "~/.config/krea-api/credentials.json"
+DEFAULT_CACHE = "~/.cache/krea-api/credentials.json"
+
+
+class EnvSource:
+    """Credentials from ``KREA_KEY_ID`` and ``KREA_SECRET``."""
+
+    def __init__(self, key_id_var: str = "KREA_KEY_ID", secret_var: str = "KREA_SECRET"):
+        self.key_id_var = key_id_var
+        self.secret_var = secret_var
+
+    def load(self) -> Optional[Credentials]:
+        key_id = os.environ.get(self.key_id_var)
+        secret = os.environ.get(self.secret_var)
+        return (key_id, secret) if key_id and secret else None
+
+
+class FileSource:
+    """Credentials from a JSON file with ``key_id`` and ``secret``."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = os.path.expanduser(path or os.environ.get("KREA_CREDENTIALS_FILE") or DEFAULT_FILE)
+
+    def load(self) -> Optional[Credentials]:
+        return _read_json(self.path)
+
+
+class ClawdbotSource:
+    """Credentials from ``clawdbot config get skill.krea_api.*``."""
+
+    cacheable = True
+
+    def __init__(self, timeout: float = 10.0):
+        self.timeout = timeout
+
+    def load(self) -> Optional[Credentials]:
+        try:
+            # Start both lookups before waiting on either.
+            procs = [
+                subprocess.Popen(
+                    ["clawdbot", "config", "get", f"skill.krea_api.{key}"],
+                    stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+                )
+                for key in ("key_id", "secret")
+            ]
+        except OSError:
+            return None
+        values = []
+        for proc in procs:
+            try:
+                out, _ = proc.communicate(timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.communicate()
+                return None
+            values.append(out.strip() if proc.returncode == 0 else None)
+        key_id, secret = values
+        return (key_id, secret) if key_id and secret else None
+
+
+class CredentialProvider:
+    """Resolves Krea credentials once per process from a chain of sources."""
+
+    _shared: Optional["CredentialProvider"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        sources: Optional[Sequence] = None,
+        cache_path: Optional[str] = DEFAULT_CACHE,
+        cache_ttl: float = 86400.0,
+    ):
+        """
+        Args:
+            sources: Objects with ``load() -> (key_id, secret) | None``, tried
+                in order (default: env, credentials file, clawdbot)
+            cache_path: Where results of slow sources (those with
+                ``cacheable = True``) are kept between processes;
+                None disables the disk cache
+            cache_ttl: Seconds a disk-cached entry stays valid
+        """
+        self.sources: List = list(sources) if sources is not None else [EnvSource(), FileSource(), ClawdbotSource()]
+        self.cache_path = os.path.expanduser(cache_path) if cache_path else None
+        self.cache_ttl = cache_ttl
+        self._lock = threading.Lock()
+        self._resolved = None
+
+    @classmethod
+    def shared(cls) -> "CredentialProvider":
+        """Process-wide provider used by clients that aren't given one."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def get(self) -> Optional[Credentials]:
+        """
+        ``(key_id, secret)``, or None if no source has them.
+
+        Either answer is kept until ``invalidate()``.
+        """
+        with self._lock:
+            if self._resolved is None:
+                self._resolved = self._resolve() or _MISSING
+            return None if self._resolved is _MISSING else self._resolved
+
+    def invalidate(self):
+        """Forget the in-process and on-disk cached credentials (e.g. after a 401)."""
+        with self._lock:
+            self._resolved = None
+            if self.cache_path:
+                try:
+                    os.remove(self.cache_path)
+                except FileNotFoundError:
+                    pass
+
+    def _resolve(self) -> Optional[Credentials]:
+        cached_checked = False
+        for source in self.sources:
+            if getattr(source, "cacheable", False) and not cached_checked:
+                cached_checked = True
+                cached = self._read_cache()
+                if cached:
+                    return cached
+            creds = source.load()
+            if creds:
+                if getattr(source, "cacheable", False):
+                    self._write_cache(creds)
+                return creds
+        return None
+
+    def _read_cache(self) -> Optional[Credentials]:
+        if not self.cache_path:
+            return None
+        try:
+            st = os.stat(self.cache_path)
+        except OSError:
+            return None
+        if st.st_mode & 0o077 or (hasattr(os, "getuid") and st.st_uid != os.getuid()):
+            # Readable by others or not ours: don't trust it.
+            return None
+        if time.time() - st.st_mtime > self.cache_ttl:
+            return None
+        return _read_json(self.cache_path)
+
+    def _write_cache(self, creds: Credentials):
+        if not self.cache_path:
+            return
+        directory = os.path.dirname(self.cache_path)
+        tmp = f"{self.cache_path}.tmp{os.getpid()}"
+        try:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump({"key_id": creds[0], "secret": creds[1]}, f)
+            os.replace(tmp, self.cache_path)
+        except OSError:
+            # The cache is an optimisation; a read-only home is fine.
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+
+def _read_json(path: str) -> Optional[Credentials]:
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict):
+        return None
+    key_id, secret = data.get("key_id"), data.get("secret")
+    return (key_id, secret) if key_id and secret else None
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Krea.ai API - client-side rate limiting and retries
+
+Every request from every KreaAPI / AsyncKreaAPI in the process goes through
+one shared RateLimiter (unless a client is given its own):
+
+- a token bucket caps the request rate,
+- an AIMD controller caps concurrent requests, halving the cap when Krea
+  answers 429/503 and growing it back by about one per round of successes,
+- ``Retry-After`` pauses all requests until the server says to resume,
+- retryable failures are retried with full-jitter exponential backoff.
+
+Usage:
+    from krea_ratelimit import RateLimiter
+    api = KreaAPI(limiter=RateLimiter(rate=5, burst=10, max_concurrency=16))
+"""
+
+import asyncio
+import email.utils
+import random
+import threading
+import time
+import urllib.error
+from typing import Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Statuses that mean "slow down" and drive the concurrency cap down.
+THROTTLE_STATUSES = {429, 503}
+# Statuses worth retrying for idempotent requests (GET /jobs/...).
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class TokenBucket:
+    """Thread-safe token bucket; ``rate=None`` means unlimited."""
+
+    def __init__(self, rate: Optional[float], burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate or 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token; returns how long the caller must wait before using it."""
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """Block until a token is available."""
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD cap on concurrent requests.
+
+    Each success raises the cap by ``1/cap`` (about +1 per full round of
+    requests); a throttle response halves it, at most once per
+    ``cooldown`` seconds so a burst of 429s from one round counts once.
+    """
+
+    def __init__(
+        self,
+        initial: float = 8,
+        minimum: float = 1,
+        maximum: float = 64,
+        decrease: float = 0.5,
+        cooldown: float = 1.0,
+    ):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def try_acquire(self) -> float:
+        """Take a slot if one is free; returns 0, or seconds to wait before retrying."""
+        with self._cond:
+            return self._try_acquire()
+
+    def acquire(self):
+        """Block until a slot is free and any Retry-After pause is over."""
+        with self._cond:
+            while True:
+                wait = self._try_acquire()
+                if not wait:
+                    return
+                self._cond.wait(wait)
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def succeeded(self):
+        with self._cond:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify()
+
+    def throttled(self, retry_after: Optional[float] = None):
+        now = time.monotonic()
+        with self._cond:
+            if now - self._last_decrease >= self.cooldown:
+                self.limit = max(self.minimum, self.limit * self.decrease)
+                self._last_decrease = now
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+
+    def _try_acquire(self) -> float:
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.in_flight >= int(self.limit):
+            # Woken by release(); the timeout is just a safety net.
+            return 0.05
+        self.in_flight += 1
+        return 0.0
+
+
+class RateLimiter:
+    """Token bucket + adaptive concurrency + jittered retries for API calls."""
+
+    _shared: Optional["RateLimiter"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        rate: Optional[float] = 10.0,
+        burst: Optional[float] = None,
+        initial_concurrency: float = 8,
+        max_concurrency: float = 64,
+        max_retries: int = 5,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+    ):
+        """
+        Args:
+            rate: Sustained requests per second (None = unlimited)
+            burst: Requests allowed back-to-back (default: rate)
+            initial_concurrency: Starting cap on concurrent requests
+            max_concurrency: Ceiling the cap can grow to
+            max_retries: Retries per call before the error is raised
+            backoff: Base delay in seconds for exponential backoff
+            max_backoff: Upper bound on a single backoff delay
+        """
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = AdaptiveConcurrency(initial_concurrency, maximum=max_concurrency)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retries = 0
+        self.throttles = 0
+
+    @classmethod
+    def shared(cls) -> "RateLimiter":
+        """Process-wide limiter used by clients that aren't given one."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def call(self, fn: Callable[[], T], idempotent: bool = True) -> T:
+        """
+        Run ``fn`` (one HTTP request) under the limiter, retrying as needed.
+
+        Non-idempotent calls (job creation) are only retried when the server
+        clearly refused them (429/503), never after a network error that may
+        have left a job created.
+        """
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            self.concurrency.acquire()
+            try:
+                result = fn()
+            except Exception as e:
+                delay = self._failed(e, attempt, idempotent)
+                if delay is None:
+                    raise
+            else:
+                self.concurrency.succeeded()
+                return result
+            finally:
+                self.concurrency.release()
+            attempt += 1
+            time.sleep(delay)
+
+    async def acall(self, fn: Callable[[], Awaitable[T]], idempotent: bool = True) -> T:
+        """Async variant of call(); ``fn`` returns a fresh awaitable per attempt."""
+        attempt = 0
+        while True:
+            delay = self.bucket.reserve()
+            if delay:
+                await asyncio.sleep(delay)
+            while True:
+                wait = self.concurrency.try_acquire()
+                if not wait:
+                    break
+                await asyncio.sleep(wait)
+            try:
+                result = await fn()
+            except Exception as e:
+                delay = self._failed(e, attempt, idempotent)
+                if delay is None:
+                    raise
+            else:
+                self.concurrency.succeeded()
+                return result
+            finally:
+                self.concurrency.release()
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def _failed(self, error: Exception, attempt: int, idempotent: bool) -> Optional[float]:
+        """Record a failure; returns the backoff delay, or None if it shouldn't be retried."""
+        retry_after = None
+        if isinstance(error, urllib.error.HTTPError):
+            if error.code in THROTTLE_STATUSES:
+                retry_after = parse_retry_after(error.headers.get("Retry-After") if error.headers else None)
+                self.concurrency.throttled(retry_after)
+                self.throttles += 1
+            retryable = error.code in (RETRY_STATUSES if idempotent else THROTTLE_STATUSES)
+        else:
+            retryable = idempotent and isinstance(
+                error, (urllib.error.URLError, ConnectionError, TimeoutError, asyncio.IncompleteReadError)
+            )
+
+        if not retryable or attempt >= self.max_retries:
+            return None
+        self.retries += 1
+        # Full jitter keeps many clients from retrying in lockstep.
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+        return max(delay, retry_after or 0.0)
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Krea.ai API - per-model latency and throughput telemetry
+
+KreaAPI records, per model:
+    submit_seconds    time for the create-job request
+    queue_seconds     submit until the job was first seen running
+    complete_seconds  submit until the job was seen finished
+    polls             get_job calls per finished job
+    download_seconds  image download time (recorded by the batch runner)
+and counters for submitted / completed / failed jobs.
+
+Histograms use fixed buckets, so memory stays flat however many jobs run;
+p50/p95/p99 are interpolated within buckets.
+
+Usage:
+    from krea_telemetry import Telemetry
+    telemetry = Telemetry.shared()          # what KreaAPI uses by default
+    telemetry.write_json("metrics.json")    # snapshot with p50/p95/p99
+    telemetry.serve(9108)                   # Prometheus text on /metrics
+"""
+
+import bisect
+import json
+import math
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# 5 ms .. ~10 min, roughly x1.6 per bucket.
+SECONDS_BUCKETS = tuple(round(0.005 * 1.6 ** i, 4) for i in range(26))
+COUNT_BUCKETS = (1, 2, 3, 4, 5, 6, 8, 10, 13, 16, 20, 25, 32, 40, 50, 64, 100)
+
+METRICS = {
+    "submit_seconds": ("Time for the create-job request", SECONDS_BUCKETS),
+    "queue_seconds": ("Submit until the job was first seen running", SECONDS_BUCKETS),
+    "complete_seconds": ("Submit until the job was seen finished", SECONDS_BUCKETS),
+    "polls": ("get_job calls per finished job", COUNT_BUCKETS),
+    "download_seconds": ("Image download time", SECONDS_BUCKETS),
+}
+COUNTERS = {
+    "jobs_submitted": "Jobs created",
+    "jobs_completed": "Jobs that finished successfully",
+    "jobs_failed": "Jobs that failed or were cancelled",
+}
+
+
+class Histogram:
+    """Fixed-bucket histogram with interpolated quantiles."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                lower, upper = max(lower, self.min), min(upper, self.max)
+                return lower + (upper - lower) * ((rank - seen) / n)
+            seen += n
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else None,
+            "p50": _round(self.quantile(0.50)),
+            "p95": _round(self.quantile(0.95)),
+            "p99": _round(self.quantile(0.99)),
+            "max": _round(self.max) if self.count else None,
+        }
+
+
+class Telemetry:
+    """Per-model histograms and counters for the Krea pipeline."""
+
+    _shared: Optional["Telemetry"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._counters: Dict[Tuple[str, str], int] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @classmethod
+    def shared(cls) -> "Telemetry":
+        """Process-wide instance used by clients that aren't given one."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def observe(self, metric: str, model: Optional[str], value: float):
+        """Record one sample of a METRICS histogram for ``model``."""
+        key = (metric, model or "unknown")
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram(METRICS[metric][1])
+            hist.observe(value)
+
+    def incr(self, counter: str, model: Optional[str], n: int = 1):
+        """Bump a COUNTERS counter for ``model``."""
+        key = (counter, model or "unknown")
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + n
+
+    def snapshot(self) -> dict:
+        """``{model: {metric: summary or count}}`` for every model seen."""
+        out: Dict[str, dict] = {}
+        with self._lock:
+            for (metric, model), hist in sorted(self._histograms.items()):
+                out.setdefault(model, {})[metric] = hist.summary()
+            for (counter, model), n in sorted(self._counters.items()):
+                out.setdefault(model, {})[counter] = n
+        return out
+
+    def write_json(self, path: str):
+        """Atomically write snapshot() to ``path``."""
+        tmp = f"{path}.tmp{os.getpid()}"
+        with open(tmp, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp, path)
+
+    def prometheus_text(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            for metric, (help_text, _) in METRICS.items():
+                series = [(m, h) for (name, m), h in sorted(self._histograms.items()) if name == metric]
+                if not series:
+                    continue
+                name = f"krea_{metric}"
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for model, hist in series:
+                    cumulative = 0
+                    for bound, n in zip(hist.buckets, hist.counts):
+                        cumulative += n
+                        lines.append(f'{name}_bucket{{model="{model}",le="{bound}"}} {cumulative}')
+                    lines.append(f'{name}_bucket{{model="{model}",le="+Inf"}} {hist.count}')
+                    lines.append(f'{name}_sum{{model="{model}"}} {hist.sum}')
+                    lines.append(f'{name}_count{{model="{model}"}} {hist.count}')
+            for counter, help_text in COUNTERS.items():
+                series = [(m, n) for (name, m), n in sorted(self._counters.items()) if name == counter]
+                if not series:
+                    continue
+                name = f"krea_{counter}_total"
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for model, n in series:
+                    lines.append(f'{name}{{model="{model}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int = 9108, host: str = "127.0.0.1") -> int:
+        """Serve prometheus_text() on ``/metrics`` from a daemon thread; returns the port."""
+        telemetry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = telemetry.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="krea-metrics", daemon=True).start()
+        return self._server.server_address[1]
+
+    def stop(self):
+        """Stop the /metrics server if running."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 6)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Krea.ai API - local webhook receiver
+
+Krea POSTs the finished job to the URL passed as ``webhook_url``. This module
+runs a small HTTP listener in a background thread that turns those callbacks
+into futures, so callers can wait for completion instead of polling.
+
+Usage:
+    from krea_api import KreaAPI
+    from krea_webhook import WebhookListener
+
+    api = KreaAPI()
+    with WebhookListener(port=8787, public_url="https://my-tunnel.example") as hook:
+        urls = api.generate_and_wait("A red fox", webhook=hook)
+
+Krea has to be able to reach the listener, so for real jobs expose the port
+through a tunnel and pass its address as ``public_url``. Polling still runs
+every ``fallback_interval`` seconds in case a callback is lost.
+"""
+
+import json
+import secrets
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+
+class WebhookListener:
+    """Receive Krea job callbacks and resolve one Future per job id."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        path: str = "/krea/webhook",
+        public_url: Optional[str] = None,
+        fallback_interval: float = 30.0,
+    ):
+        """
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free one)
+            path: Path callbacks are accepted on
+            public_url: Externally reachable base URL (e.g. a tunnel); the
+                path and token are appended to it
+            fallback_interval: Seconds between safety-net polls while waiting
+        """
+        self.host = host
+        self.port = port
+        self.path = path
+        self.public_url = public_url.rstrip("/") if public_url else None
+        self.fallback_interval = fallback_interval
+        # Callbacks must carry this token, so stray POSTs can't resolve jobs.
+        self.token = secrets.token_urlsafe(16)
+
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """URL to pass to generate_image(webhook_url=...)."""
+        base = self.public_url or f"http://{self.host}:{self.port}"
+        return f"{base}{self.path}?token={self.token}"
+
+    def start(self) -> "WebhookListener":
+        """Start serving in a daemon thread."""
+        if self._server:
+            return self
+        listener = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                parts = urlsplit(self.path)
+                token = parse_qs(parts.query).get("token", [None])[0]
+                if parts.path != listener.path or token != listener.token:
+                    self.send_error(404)
+                    return
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    payload = json.loads(self.rfile.read(length).decode() or "{}")
+                except ValueError:
+                    self.send_error(400, "Invalid JSON")
+                    return
+                if not isinstance(payload, dict):
+                    self.send_error(400, "Body must be a JSON object")
+                    return
+                if not listener.deliver(payload):
+                    self.send_error(400, "Missing job_id")
+                    return
+                self.send_response(204)
+                self.end_headers()
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="krea-webhook", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def expect(self, job_id: str) -> Future:
+        """
+        Future resolved with the job payload when its callback arrives.
+
+        Call it before the callback can arrive: callbacks for jobs nobody
+        is waiting on are dropped (polling still picks those jobs up).
+        """
+        with self._lock:
+            return self._futures.setdefault(job_id, Future())
+
+    def forget(self, job_id: str):
+        """Drop the future for a job that is no longer being waited on."""
+        with self._lock:
+            self._futures.pop(job_id, None)
+
+    def deliver(self, payload: dict) -> bool:
+        """Resolve the future for ``payload``'s job, if expected; False if it has no id."""
+        job_id = payload.get("job_id") or payload.get("id")
+        if not job_id:
+            return False
+        payload.setdefault("job_id", job_id)
+        if payload.get("status") not in (None, "completed", "failed", "cancelled"):
+            # Progress updates are acknowledged but don't resolve anything.
+            return True
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None and not future.done():
+            future.set_result(payload)
+        return True
@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+Jupiter Swap Daemon
+Usage: python3 jup_daemon.py <command> [args]
+
+Keeps the keypair, the Jupiter HTTP session and its warm connections in one
+long-running process, so a quote or swap costs a round trip on a local
+socket instead of interpreter startup, solders/aiohttp imports, keypair
+decoding and a TLS handshake.
+
+Commands:
+  serve [--http-port PORT]                    Run the daemon
+  quote <input_mint> <output_mint> <amount>   Get swap quote from the daemon
+  swap <input_mint> <output_mint> <amount>    Execute swap through the daemon
+  status                                      Show daemon uptime and counters
+  stop                                        Shut the daemon down
+
+The client commands only use the standard library; jup_swap.py and its
+dependencies are imported by `serve` alone.
+
+Protocol: one JSON object per line over the Unix socket, e.g.
+  {"cmd": "quote", "input": "SOL", "output": "USDC", "amount": "1"}
+answered by {"ok": true, "result": {...}} or {"ok": false, "error": "..."}.
+With --http-port the same commands are served as POST /<cmd> on 127.0.0.1,
+authorized by the bearer token in <socket>.token.
+"""
+
+import os
+import sys
+import hmac
+import json
+import socket
+import argparse
+import tempfile
+from typing import Any, Dict, Optional
+
+
+def default_socket_path() -> str:
+    """
+    $JUP_SWAP_SOCKET, else jup-swap-<uid>.sock in $XDG_RUNTIME_DIR, else
+    daemon.sock in a 0700 jup-swap-<uid> directory under the temp dir.
+    """
+    if os.environ.get("JUP_SWAP_SOCKET"):
+        return os.environ["JUP_SWAP_SOCKET"]
+    if os.environ.get("XDG_RUNTIME_DIR"):
+        return os.path.join(os.environ["XDG_RUNTIME_DIR"], f"jup-swap-{os.getuid()}.sock")
+    # The temp dir is shared: a bare predictable name there could be bound
+    # by another user first.
+    return os.path.join(tempfile.gettempdir(), f"jup-swap-{os.getuid()}", "daemon.sock")
+
+
+def _check_owner(path: str):
+    """Refuse a socket (or its directory) that another user created."""
+    info = os.lstat(path)
+    if info.st_uid != os.getuid():
+        raise PermissionError(f"{path} is owned by uid {info.st_uid}, not you; refusing to use it")
+
+
+# ---------------------------------------------------------------------------
+# Daemon
+# ---------------------------------------------------------------------------
+
+class SwapDaemon:
+    """Serves quote/swap requests from one keypair and one JupiterClient."""
+
+    def __init__(self, socket_path: str, http_port: Optional[int] = None, cache_ttl: float = 0):
+        """
+        Args:
+            socket_path: Unix socket to listen on (created 0600)
+            http_port: Also serve HTTP on 127.0.0.1 at this port
+            cache_ttl: Serve identical quotes from memory for this many seconds
+        """
+        # Deferred so the client commands never pay for these imports.
+        import asyncio
+        import jup_swap
+
+        self.asyncio = asyncio
+        self.jup = jup_swap
+        self.socket_path = socket_path
+        self.http_port = http_port
+        self.cache_ttl = cache_ttl
+        self.keypair = jup_swap.get_keypair()
+        self.taker = str(self.keypair.pubkey())
+        self.token = os.urandom(16).hex()
+        self.jupiter = None
+        self.started = None
+        self.requests = 0
+        self.swaps = 0
+        self._stopped = None
+
+    def run(self):
+        self.asyncio.run(self._main())
+
+    async def _main(self):
+        import signal
+        import time
+
+        asyncio = self.asyncio
+        loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self._stopped.set)
+
+        cache = self.jup.QuoteCache(ttl=self.cache_ttl) if self.cache_ttl else None
+        self.jupiter = self.jup.JupiterClient(keepalive_timeout=300.0, cache=cache)
+        try:
+            self._claim_socket()
+        except PermissionError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
+        old_umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(self._serve_client, path=self.socket_path)
+        finally:
+            os.umask(old_umask)
+        self._write_token()
+
+        http_runner = None
+        if self.http_port is not None:
+            http_runner = await self._start_http()
+
+        self.started = time.time()
+        await self._warm_up()
+        print(f"◎ Jupiter daemon ready for {self.taker}")
+        print(f"  Socket: {self.socket_path}")
+        if http_runner:
+            print(f"  HTTP: http://127.0.0.1:{self.http_port}/ (token in {self.socket_path}.token)")
+
+        try:
+            async with server:
+                await self._stopped.wait()
+        finally:
+            if http_runner:
+                await http_runner.cleanup()
+            await self.jupiter.close()
+            for path in (self.socket_path, f"{self.socket_path}.token"):
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+            print("◎ Jupiter daemon stopped")
+
+    def _claim_socket(self):
+        directory = os.path.dirname(os.path.abspath(self.socket_path))
+        if directory == os.path.join(tempfile.gettempdir(), f"jup-swap-{os.getuid()}"):
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            _check_owner(directory)
+            os.chmod(directory, 0o700)
+        if not os.path.lexists(self.socket_path):
+            return
+        _check_owner(self.socket_path)
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except OSError:
+            os.unlink(self.socket_path)  # left over from a daemon that died
+            return
+        finally:
+            probe.close()
+        print(f"Error: A daemon is already listening on {self.socket_path}")
+        sys.exit(1)
+
+    def _write_token(self):
+        path = f"{self.socket_path}.token"
+        tmp = f"{path}.tmp{os.getpid()}"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(self.token)
+        os.replace(tmp, path)
+
+    async def _warm_up(self):
+        # One quote opens the DNS entry, TCP connection and TLS session that
+        # the first real request would otherwise pay for.
+        try:
+            await self.jupiter.fetch_quote(
+                self.jup.TOKENS["SOL"], self.jup.TOKENS["USDC"], 10 ** 9, None, fresh=True)
+        except Exception as e:
+            print(f"  ⚠️ Warm-up quote failed: {e}")
+
+    async def _serve_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    response = {"ok": False, "error": "Invalid JSON"}
+                else:
+                    if isinstance(request, dict):
+                        response = await self.handle(request)
+                    else:
+                        response = {"ok": False, "error": "Request must be a JSON object"}
+                writer.write(json.dumps(response, default=str).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _start_http(self):
+        from aiohttp import web
+
+        async def endpoint(request):
+            authorization = request.headers.get("Authorization", "")
+            if not hmac.compare_digest(authorization.encode(), f"Bearer {self.token}".encode()):
+                return web.json_response({"ok": False, "error": "Unauthorized"}, status=401)
+            try:
+                body = await request.json() if request.can_read_body else {}
+            except ValueError:
+                return web.json_response({"ok": False, "error": "Invalid JSON"}, status=400)
+            if not isinstance(body, dict):
+                return web.json_response({"ok": False, "error": "Body must be a JSON object"}, status=400)
+            response = await self.handle({**body, "cmd": request.match_info["cmd"]})
+            return web.json_response(response, dumps=lambda o: json.dumps(o, default=str))
+
+        app = web.Application()
+        app.router.add_post("/{cmd}", endpoint)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", self.http_port).start()
+        return runner
+
+    async def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one request; errors are returned, never raised."""
+        self.requests += 1
+        handler = {
+            "quote": self._quote,
+            "swap": self._swap,
+            "status": self._status,
+            "stop": self._stop,
+        }.get(request.get("cmd"))
+        if handler is None:
+            return {"ok": False, "error": f"Unknown command: {request.get('cmd')}"}
+        try:
+            return {"ok": True, "result": await handler(request)}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    async def _amounts(self, request: Dict[str, Any]):
+        # Unknown tokens may need a (blocking) registry lookup; keep it off the loop.
+        return await self.asyncio.to_thread(self._resolve, request)
+
+    def _resolve(self, request: Dict[str, Any]):
+        jup = self.jup
+        input_mint = jup.resolve_mint(request["input"])
+        output_mint = jup.resolve_mint(request["output"])
+        try:
+            amount = jup.parse_amount(str(request["amount"]), input_mint)
+        except ArithmeticError:
+            raise ValueError(f"Invalid amount: {request['amount']}")
+        jup.token_registry().decimals(output_mint)
+        return input_mint, output_mint, amount
+
+    def _describe(self, quote: Dict[str, Any], input_mint: str, output_mint: str) -> Dict[str, Any]:
+        jup = self.jup
+        in_amount = int(quote.get("inAmount", 0))
+        out_amount = int(quote.get("outAmount", 0))
+        rate = jup.quote_rate(in_amount, out_amount, input_mint, output_mint)
+        return {
+            "input_mint": input_mint,
+            "output_mint": output_mint,
+            "in_amount": in_amount,
+            "out_amount": out_amount,
+            "pay": f"{jup.format_amount(in_amount, input_mint)} {jup.get_token_name(input_mint)}",
+            "get": f"{jup.format_amount(out_amount, output_mint)} {jup.get_token_name(output_mint)}",
+            "rate": f"{rate:.6f}" if rate is not None else None,
+            "price_impact": quote.get("priceImpactPct", "0"),
+            "router": quote.get("router"),
+        }
+
+    async def _quote(self, request):
+        input_mint, output_mint, amount = await self._amounts(request)
+        quote = await self.jupiter.fetch_quote(input_mint, output_mint, amount, self.taker)
+        return self._describe(quote, input_mint, output_mint)
+
+    async def _swap(self, request):
+        input_mint, output_mint, amount = await self._amounts(request)
+        quote, result = await self.jupiter.swap(self.keypair, input_mint, output_mint, amount)
+        self.swaps += 1
+        return {
+            **self._describe(quote, input_mint, output_mint),
+            "status": result.get("status"),
+            "signature": result.get("signature"),
+            "error": result.get("error"),
+        }
+
+    async def _status(self, request):
+        import time
+        return {
+            "wallet": self.taker,
+            "uptime": round(time.time() - self.started, 1),
+            "requests": self.requests,
+            "swaps": self.swaps,
+        }
+
+    async def _stop(self, request):
+        # Let this response go out before the server closes.
+        self.asyncio.get_running_loop().call_soon(self._stopped.set)
+        return {"stopping": True}
+
+
+# ---------------------------------------------------------------------------
+# Thin client
+# ---------------------------------------------------------------------------
+
+def call(request: Dict[str, Any], socket_path: Optional[str] = None, timeout: float = 60.0) -> Dict[str, Any]:
+    """Send one request to the daemon and return its response."""
+    path = socket_path or default_socket_path()
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        try:
+            # Someone else's socket could feed us fake quotes.
+            _check_owner(path)
+            sock.connect(path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            print(f"Error: No daemon listening on {path}")
+            print("Start one with: python3 jup_daemon.py serve")
+            sys.exit(1)
+        except PermissionError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    if not line:
+        print("Error: Daemon closed the connection")
+        sys.exit(1)
+    return json.loads(line)
+
+
+def _result(args, request: Dict[str, Any]) -> Dict[str, Any]:
+    response = call(request, args.socket)
+    if not response.get("ok"):
+        print(f"Error: {response.get('error')}")
+        sys.exit(1)
+    return response["result"]
+
+
+def cmd_serve(args):
+    """Run the daemon in the foreground."""
+    SwapDaemon(args.socket or default_socket_path(), args.http_port, args.cache_ttl).run()
+
+
+def cmd_quote(args):
+    """Get swap quote from the daemon."""
+    quote = _result(args, {"cmd": "quote", "input": args.input_mint,
+                           "output": args.output_mint, "amount": args.amount})
+    print(f"◎ Quote:")
+    print(f"  You pay: {quote['pay']}")
+    print(f"  You get: {quote['get']}")
+    print(f"  Price impact: {quote['price_impact']}%")
+    print(f"  Router: {quote.get('router') or 'N/A'}")
+    if quote.get("rate"):
+        print(f"  Rate: {quote['rate']}")
+
+
+def cmd_swap(args):
+    """Execute swap through the daemon."""
+    swap = _result(args, {"cmd": "swap", "input": args.input_mint,
+                          "output": args.output_mint, "amount": args.amount})
+    print(f"◎ {swap['pay']} -> {swap['get']} (impact {swap['price_impact']}%)")
+    if swap.get("status") == "Success":
+        print(f"\n✅ Swap successful!")
+        print(f"◎ Signature: {swap['signature']}")
+        print(f"◎ Explorer: https://solscan.io/tx/{swap['signature']}")
+    else:
+        print(f"\n❌ Swap failed: {swap.get('error') or 'Unknown error'}")
+        sys.exit(1)
+
+
+def cmd_status(args):
+    """Show daemon status."""
+    status = _result(args, {"cmd": "status"})
+    print(f"◎ Wallet: {status['wallet']}")
+    print(f"  Uptime: {status['uptime']}s")
+    print(f"  Requests: {status['requests']}  Swaps: {status['swaps']}")
+
+
+def cmd_stop(args):
+    """Stop the daemon."""
+    _result(args, {"cmd": "stop"})
+    print("◎ Daemon stopping")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Jupiter Swap Daemon",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  jup_daemon.py serve &                  Start the daemon (needs SOLANA_PRIVATE_KEY, JUPITER_API_KEY)
+  jup_daemon.py quote SOL USDC 1         Quote through the daemon
+  jup_daemon.py swap SOL USDC 0.1        Swap through the daemon
+  jup_daemon.py stop                     Shut it down
+        """
+    )
+    parser.add_argument(
+        "--socket", help="Unix socket path (default: $JUP_SWAP_SOCKET or a per-user path)")
+
+    subparsers = parser.add_subparsers(dest="command", help="Command to run")
+
+    serve_parser = subparsers.add_parser("serve", help="Run the daemon")
+    serve_parser.add_argument(
+        "--http-port", type=int, help="Also serve HTTP on 127.0.0.1 at this port")
+    serve_parser.add_argument(
+        "--cache-ttl", type=float, default=0,
+        help="Serve identical quotes from memory for this many seconds (e.g. 0.5)")
+    serve_parser.set_defaults(func=cmd_serve)
+
+    for name, func, help_text in (("quote", cmd_quote, "Get swap quote"),
+                                  ("swap", cmd_swap, "Execute swap")):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("input_mint", help="Input token (symbol or mint)")
+        sub.add_argument("output_mint", help="Output token (symbol or mint)")
+        sub.add_argument("amount", help="Amount to swap")
+        sub.set_defaults(func=func)
+
+    subparsers.add_parser("status", help="Show daemon status").set_defaults(func=cmd_status)
+    subparsers.add_parser("stop", help="Stop the daemon").set_defaults(func=cmd_stop)
+
+    args = parser.parse_args()
+
+    if not args.command:
+        parser.print_help()
+        sys.exit(1)
+
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
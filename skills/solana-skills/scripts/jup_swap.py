@@ -5,6 +5,8 @@ Usage: python3 jup_swap.py <command> [args]
 
 Commands:
   quote <input_mint> <output_mint> <amount>   Get swap quote
+  quote-matrix --inputs A,B --outputs C --amounts 1,10
+                                              Quote many pairs and sizes at once
   swap <input_mint> <output_mint> <amount>    Execute swap
 """
 
@@ -13,8 +15,14 @@ import sys
 import asyncio
 import argparse
 import base64
+import json
+import hashlib
+import stat
+import tempfile
+import threading
+import time
 from decimal import Decimal
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Awaitable, Callable, Iterable, List, Tuple
 
 try:
     import aiohttp
@@ -27,63 +35,13 @@ except ImportError as e:
     print("Run: pip install solana solders base58 aiohttp")
     sys.exit(1)
 
+from token_registry import TOKENS, TOKEN_DECIMALS, TokenRegistry
+
 
 # Jupiter Ultra API
 JUPITER_ULTRA_API_URL = os.environ.get(
     "JUPITER_API_URL", "https://api.jup.ag/ultra/v1")
 
-# Common token mints
-TOKENS = {
-    # Native
-    "SOL": "So11111111111111111111111111111111111111112",
-    # Stablecoins
-    "USDC": "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v",
-    "USDT": "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB",
-    "PYUSD": "2b1kV6DkPAnxd5ixfnxCpjxmKwqjjaYmCZfHsFu24GXo",
-    "USDS": "USDSwr9ApdHk5bvJKMjzff41FfuX8bSxdKcR81vTwcA",
-    "USDG": "2u1tszSeqZ3qBWF3uNGPFc8TzMk2tdiwknnRMWGWjGWH",
-    "USD1": "USD1ttGY1N17NEEHLmELoaybftRBUSErhqYiQzvEmuB",
-    "CASH": "CASHx9KJUStyftLFWGvEVf59SGeG9sh5FfcnZMVPCASH",
-    # Wrapped assets
-    "ETH": "7vfCXTUXx5WJV5JADk17DUJ4ksgau7utNKj4b963voxs",
-    "CBBTC": "cbbtcf3aa214zXHbiAZQwf4122FBYbraNdFqgw4iMij",
-    # LST
-    "JITOSOL": "J1toso1uCk3RLmjorhTtrVwY9HJ7X8V9yYac6Y7kGCPn",
-    # DeFi
-    "JUP": "JUPyiwrYJFskUPiHa7hkeR8VUtAeFoSYbKedZNsDvCN",
-    "JLP": "27G8MtK7VtTcCHkpASjSDdkWWYfoqT6ggEuKidVJidD4",
-    "RAY": "4k3Dyjzvzp8eMZWUXbBCjEvwSkkk59S5iCNLY3QrkX6R",
-    "PYTH": "HZ1JovNiVvGrGNiiYvEozEVgZ58xaU3RKwX8eACQBCt3",
-    # Memes
-    "PUMP": "pumpCmXqMfrsAkQ5r49WcJnRayYRqmXz6ae8H7H9Dfn",
-    "BONK": "DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263",
-    "FARTCOIN": "9BB6NFEcjBCtnNLFko2FqVQBq8HHM13kCyYcdQbgpump",
-    "TRUMP": "6p6xgHyF7AeE6TZkSmFsko444wqoP15icUSqi2jfGiPN",
-}
-
-# Token decimals (for display)
-TOKEN_DECIMALS = {
-    "So11111111111111111111111111111111111111112": 9,   # SOL
-    "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v": 6,  # USDC
-    "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB": 6,  # USDT
-    "2b1kV6DkPAnxd5ixfnxCpjxmKwqjjaYmCZfHsFu24GXo": 6,  # PYUSD
-    "USDSwr9ApdHk5bvJKMjzff41FfuX8bSxdKcR81vTwcA": 6,   # USDS
-    "2u1tszSeqZ3qBWF3uNGPFc8TzMk2tdiwknnRMWGWjGWH": 6,  # USDG
-    "USD1ttGY1N17NEEHLmELoaybftRBUSErhqYiQzvEmuB": 6,   # USD1
-    "CASHx9KJUStyftLFWGvEVf59SGeG9sh5FfcnZMVPCASH": 6,  # CASH
-    "7vfCXTUXx5WJV5JADk17DUJ4ksgau7utNKj4b963voxs": 8,  # ETH
-    "cbbtcf3aa214zXHbiAZQwf4122FBYbraNdFqgw4iMij": 8,   # cbBTC
-    "J1toso1uCk3RLmjorhTtrVwY9HJ7X8V9yYac6Y7kGCPn": 9,  # JitoSOL
-    "JUPyiwrYJFskUPiHa7hkeR8VUtAeFoSYbKedZNsDvCN": 6,   # JUP
-    "27G8MtK7VtTcCHkpASjSDdkWWYfoqT6ggEuKidVJidD4": 6,  # JLP
-    "4k3Dyjzvzp8eMZWUXbBCjEvwSkkk59S5iCNLY3QrkX6R": 6,  # RAY
-    "HZ1JovNiVvGrGNiiYvEozEVgZ58xaU3RKwX8eACQBCt3": 6,  # PYTH
-    "pumpCmXqMfrsAkQ5r49WcJnRayYRqmXz6ae8H7H9Dfn": 6,   # PUMP
-    "DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263": 5,  # BONK
-    "9BB6NFEcjBCtnNLFko2FqVQBq8HHM13kCyYcdQbgpump": 6,  # Fartcoin
-    "6p6xgHyF7AeE6TZkSmFsko444wqoP15icUSqi2jfGiPN": 6,  # TRUMP
-}
-
 
 def check_api_key() -> str:
     """Check Jupiter API key is set."""
@@ -115,122 +73,481 @@ def get_keypair() -> Keypair:
         sys.exit(1)
 
 
+_registry: Optional[TokenRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def token_registry() -> TokenRegistry:
+    """Process-wide token registry; opened on first use, refreshing stale entries in the background."""
+    global _registry
+    # Called from worker threads (e.g. the daemon's to_thread lookups).
+    with _registry_lock:
+        if _registry is None:
+            _registry = TokenRegistry()
+            _registry.refresh_in_background()
+        return _registry
+
+
 def resolve_mint(mint_or_symbol: str) -> str:
-    """Resolve token symbol to mint address."""
-    upper = mint_or_symbol.upper()
-    if upper in TOKENS:
-        return TOKENS[upper]
-    return mint_or_symbol
+    """Resolve token symbol to mint address (unknown symbols are looked up)."""
+    return token_registry().resolve(mint_or_symbol)
 
 
 def get_token_name(mint: str) -> str:
     """Get token symbol from mint address."""
-    for symbol, address in TOKENS.items():
-        if address == mint:
-            return symbol
-    return mint[:8] + "..."
+    return token_registry().symbol(mint) or mint[:8] + "..."
 
 
 def format_amount(amount: int, mint: str) -> str:
     """Format raw amount to human-readable."""
-    decimals = TOKEN_DECIMALS.get(mint, 9)
+    return _format_units(amount, token_registry().decimals(mint))
+
+
+def _format_units(amount: int, decimals: int) -> str:
     value = Decimal(amount) / Decimal(10 ** decimals)
     return f"{value:.{decimals}f}".rstrip('0').rstrip('.')
 
 
 def parse_amount(amount: str, mint: str) -> int:
     """Parse human-readable amount to raw units."""
-    decimals = TOKEN_DECIMALS.get(mint, 9)
+    decimals = token_registry().decimals(mint)
     value = Decimal(amount)
     return int(value * Decimal(10 ** decimals))
 
 
-async def get_quote(
-    input_mint: str,
-    output_mint: str,
-    amount: int,
-    taker: str
-) -> Optional[Dict[str, Any]]:
-    """Get swap quote from Jupiter Ultra API."""
-    api_key = check_api_key()
-
-    headers = {
-        "Accept": "application/json",
-        "x-api-key": api_key,
-    }
-
-    params = {
-        "inputMint": input_mint,
-        "outputMint": output_mint,
-        "amount": str(amount),
-        "taker": taker,
-        "swapMode": "ExactIn",
-    }
+def quote_rate(in_amount: int, out_amount: int, input_mint: str, output_mint: str) -> Optional[Decimal]:
+    """Output tokens per input token, or None for an empty quote."""
+    if in_amount <= 0 or out_amount <= 0:
+        return None
+    in_dec = token_registry().decimals(input_mint)
+    out_dec = token_registry().decimals(output_mint)
+    return (Decimal(out_amount) / Decimal(10 ** out_dec)) / \
+        (Decimal(in_amount) / Decimal(10 ** in_dec))
 
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f"{JUPITER_ULTRA_API_URL}/order",
-                params=params,
-                headers=headers
+
+class QuoteCache:
+    """
+    Short-lived cache of Jupiter quotes keyed on (input, output, amount, taker).
+
+    Quotes go stale within seconds, so the TTL is meant to be short: enough
+    to absorb a bot asking for the same quote several times a second. A
+    lookup that misses while an identical request is already in flight waits
+    for that request instead of sending its own.
+
+    With ``shared_dir`` (a tmpfs such as /dev/shm by default) quotes are also
+    shared between processes on the host, one small JSON file per key.
+
+    In-flight coalescing is per event loop; use one cache per loop.
+    """
+
+    def __init__(self, ttl: float = 0.5, shared_dir: Optional[str] = None, max_entries: int = 1024):
+        """
+        Args:
+            ttl: Seconds a quote is served from the cache
+            shared_dir: Directory for the cross-process cache (None: this process only)
+            max_entries: In-memory quotes kept before the oldest are dropped
+        """
+        self.ttl = ttl
+        self.shared_dir = shared_dir
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._quotes: Dict[tuple, Tuple[float, Dict[str, Any]]] = {}
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        if shared_dir and not self._private_dir(shared_dir):
+            print(f"Warning: {shared_dir} is not a private directory of yours; "
+                  "quotes will not be shared between processes", file=sys.stderr)
+            self.shared_dir = None
+
+    @staticmethod
+    def _private_dir(path: str) -> bool:
+        """Create ``path`` if needed; True only if it is a directory we own with no group/other access."""
+        try:
+            os.makedirs(path, mode=0o700, exist_ok=True)
+            info = os.lstat(path)
+        except OSError:
+            return False
+        # Another user could have created it first to plant or read quotes.
+        return stat.S_ISDIR(info.st_mode) and info.st_uid == os.getuid() and not info.st_mode & 0o077
+
+    @staticmethod
+    def default_shared_dir() -> str:
+        base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+        return os.path.join(base, f"jup-quotes-{os.getuid()}")
+
+    async def get(self, key: tuple, fetch: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Cached quote for ``key``, or the result of ``fetch()`` (shared with concurrent callers)."""
+        now = time.monotonic()
+        cached = self._quotes.get(key)
+        if cached and cached[0] > now:
+            self.hits += 1
+            return dict(cached[1])
+
+        loop = asyncio.get_running_loop()
+        pending = self._inflight.get(key)
+        if pending is not None and pending.get_loop() is loop:
+            self.hits += 1
+            try:
+                return dict(await asyncio.shield(pending))
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The caller doing the fetch was cancelled, not us; try again.
+                return await self.get(key, fetch)
+
+        data = self._read_shared(key)
+        if data is not None:
+            self.hits += 1
+            self._store(key, data)
+            return dict(data)
+
+        self.misses += 1
+        future = loop.create_future()
+        self._inflight[key] = future
+        try:
+            data = await fetch()
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved: no warning if nobody was waiting
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        future.set_result(data)
+        self._store(key, data)
+        self._write_shared(key, data)
+        return dict(data)
+
+    def clear(self):
+        self._quotes.clear()
+
+    def _store(self, key: tuple, data: Dict[str, Any]):
+        self._quotes[key] = (time.monotonic() + self.ttl, data)
+        if len(self._quotes) > self.max_entries:
+            now = time.monotonic()
+            for k in [k for k, (expires, _) in self._quotes.items() if expires <= now]:
+                del self._quotes[k]
+            while len(self._quotes) > self.max_entries:
+                del self._quotes[next(iter(self._quotes))]
+
+    def _shared_path(self, key: tuple) -> str:
+        digest = hashlib.sha1(json.dumps(key).encode()).hexdigest()
+        return os.path.join(self.shared_dir, f"{digest}.json")
+
+    def _read_shared(self, key: tuple) -> Optional[Dict[str, Any]]:
+        if not self.shared_dir:
+            return None
+        try:
+            with open(self._shared_path(key)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Wall clock here: monotonic time isn't comparable across processes.
+        if entry.get("key") != list(key) or time.time() - entry.get("ts", 0) > self.ttl:
+            return None
+        return entry["quote"]
+
+    def _write_shared(self, key: tuple, data: Dict[str, Any]):
+        if not self.shared_dir:
+            return
+        path = self._shared_path(key)
+        tmp = f"{path}.tmp{os.getpid()}"
+        try:
+            with open(tmp, "w") as f:
+                json.dump({"key": list(key), "ts": time.time(), "quote": data}, f)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+
+class JupiterClient:
+    """
+    Jupiter Ultra API client that keeps one HTTP session open.
+
+    Quote, sign and execute share the session's keep-alive connections, so
+    a swap pays for one TLS handshake instead of one per request, and the
+    same client can run any number of swaps in one process.
+
+    Usage:
+        async with JupiterClient() as jupiter:
+            quote = await jupiter.get_quote(input_mint, output_mint, amount, taker)
+            result = await jupiter.execute(sign_transaction(quote, keypair), quote["requestId"])
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: str = JUPITER_ULTRA_API_URL,
+        limit: int = 20,
+        limit_per_host: int = 10,
+        timeout: float = 30.0,
+        keepalive_timeout: float = 60.0,
+        cache: Optional[QuoteCache] = None,
+    ):
+        """
+        Args:
+            api_key: Jupiter API key (default: $JUPITER_API_KEY)
+            base_url: Ultra API base URL
+            limit: Max open connections in the pool
+            limit_per_host: Max open connections to one host
+            timeout: Total seconds allowed per request
+            keepalive_timeout: Seconds an idle connection is kept for reuse
+            cache: Serve repeated quotes from this QuoteCache (default: none)
+        """
+        self.api_key = api_key or check_api_key()
+        self.base_url = base_url.rstrip("/")
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.keepalive_timeout = keepalive_timeout
+        self.cache = cache
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self):
+        self._ensure_session()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        # Created lazily: aiohttp sessions must be made inside a running loop.
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"Accept": "application/json", "x-api-key": self.api_key},
+            )
+        return self._session
+
+    async def close(self):
+        """Close the session and its pooled connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def get_quote(
+        self,
+        input_mint: str,
+        output_mint: str,
+        amount: int,
+        taker: Optional[str],
+        fresh: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get swap quote (and unsigned transaction) from Jupiter Ultra API.
+
+        Args:
+            fresh: Skip the quote cache; always do this for an order that
+                will be signed and executed
+        """
+        try:
+            return await self.fetch_quote(input_mint, output_mint, amount, taker, fresh)
+        except Exception as e:
+            print(f"Error: {e}")
+            return None
+
+    async def quote_matrix(
+        self,
+        pairs: Iterable[Tuple[str, str, int]],
+        taker: Optional[str] = None,
+        concurrency: int = 8
+    ) -> List[Dict[str, Any]]:
+        """
+        Quote many (input_mint, output_mint, amount) combinations at once.
+
+        All requests go out concurrently on this client's session, at most
+        ``concurrency`` at a time. Without a ``taker`` Jupiter returns
+        quotes only, without building a transaction for each.
+
+        Returns:
+            One row per pair, in input order: input_mint, output_mint,
+            amount, out_amount, rate, price_impact and router, or error
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def quote(input_mint: str, output_mint: str, amount: int) -> Dict[str, Any]:
+            row: Dict[str, Any] = {
+                "input_mint": input_mint,
+                "output_mint": output_mint,
+                "amount": amount,
+            }
+            async with semaphore:
+                try:
+                    data = await self.fetch_quote(input_mint, output_mint, amount, taker)
+                except Exception as e:
+                    row["error"] = str(e)
+                    return row
+            out_amount = int(data.get("outAmount", 0))
+            try:
+                rate = quote_rate(int(data.get("inAmount", amount)),
+                                  out_amount, input_mint, output_mint)
+            except LookupError:
+                rate = None
+            row.update(
+                out_amount=out_amount,
+                rate=rate,
+                price_impact=data.get("priceImpactPct", "0"),
+                router=data.get("router"),
+            )
+            return row
+
+        return list(await asyncio.gather(*(quote(*pair) for pair in pairs)))
+
+    async def fetch_quote(
+        self,
+        input_mint: str,
+        output_mint: str,
+        amount: int,
+        taker: Optional[str],
+        fresh: bool = False
+    ) -> Dict[str, Any]:
+        """Like get_quote, but raises on failure instead of printing."""
+        if self.cache is None or fresh:
+            return await self._order(input_mint, output_mint, amount, taker)
+        return await self.cache.get(
+            (input_mint, output_mint, int(amount), taker),
+            lambda: self._order(input_mint, output_mint, amount, taker),
+        )
+
+    async def _order(
+        self,
+        input_mint: str,
+        output_mint: str,
+        amount: int,
+        taker: Optional[str]
+    ) -> Dict[str, Any]:
+        params = {
+            "inputMint": input_mint,
+            "outputMint": output_mint,
+            "amount": str(amount),
+            "swapMode": "ExactIn",
+        }
+        if taker:
+            params["taker"] = taker
+
+        try:
+            async with self._ensure_session().get(
+                f"{self.base_url}/order",
+                params=params
             ) as response:
                 if response.status != 200:
                     error_data = await response.text()
-                    print(
-                        f"Error: Jupiter API error ({response.status}): {error_data}")
-                    return None
-
+                    raise Exception(
+                        f"Jupiter API error ({response.status}): {error_data}")
                 data = await response.json()
+        except aiohttp.ClientError as e:
+            raise Exception(f"Failed to get quote: {e}") from e
+        except asyncio.TimeoutError as e:
+            raise Exception("Failed to get quote: request timed out") from e
+
+        if data.get('error') or data.get('errorMessage'):
+            raise Exception(data.get('error') or data.get('errorMessage'))
+
+        return data
+
+    async def execute(
+        self,
+        signed_tx: VersionedTransaction,
+        request_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """Execute signed transaction via Jupiter Ultra API."""
+        try:
+            return await self.submit(signed_tx, request_id)
+        except Exception as e:
+            print(f"Error: {e}")
+            return None
+
+    async def submit(
+        self,
+        signed_tx: VersionedTransaction,
+        request_id: str
+    ) -> Dict[str, Any]:
+        """Like execute, but raises on failure instead of printing."""
+        serialized_tx = base64.b64encode(bytes(signed_tx)).decode('utf-8')
+
+        payload = {
+            "signedTransaction": serialized_tx,
+            "requestId": request_id
+        }
+
+        try:
+            async with self._ensure_session().post(
+                f"{self.base_url}/execute",
+                json=payload
+            ) as response:
+                if response.status != 200:
+                    error_data = await response.text()
+                    raise Exception(
+                        f"Execute failed ({response.status}): {error_data}")
+                return await response.json()
+        except aiohttp.ClientError as e:
+            raise Exception(f"Failed to execute: {e}") from e
+        except asyncio.TimeoutError as e:
+            raise Exception("Failed to execute: request timed out") from e
+
+    async def swap(
+        self,
+        keypair: Keypair,
+        input_mint: str,
+        output_mint: str,
+        amount: int
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Quote (always fresh), sign and execute one swap; raises on failure.
 
-                if data.get('error') or data.get('errorMessage'):
-                    print(
-                        f"Error: {data.get('error') or data.get('errorMessage')}")
-                    return None
+        Returns:
+            ``(quote, execution result)``; check ``result["status"]``
+        """
+        quote = await self.fetch_quote(
+            input_mint, output_mint, amount, str(keypair.pubkey()), fresh=True)
+        if not quote.get("transaction"):
+            raise Exception("No transaction returned from API")
+        signed_tx = sign_transaction(quote, keypair)
+        return quote, await self.submit(signed_tx, quote["requestId"])
 
-                return data
-    except Exception as e:
-        print(f"Error: Failed to get quote: {e}")
-        return None
+
+def sign_transaction(quote: Dict[str, Any], keypair: Keypair) -> VersionedTransaction:
+    """Sign the unsigned transaction returned with a quote."""
+    tx_bytes = base64.b64decode(quote["transaction"])
+    unsigned_tx = VersionedTransaction.from_bytes(tx_bytes)
+    return VersionedTransaction(unsigned_tx.message, [keypair])
+
+
+async def get_quote(
+    input_mint: str,
+    output_mint: str,
+    amount: int,
+    taker: str
+) -> Optional[Dict[str, Any]]:
+    """Get swap quote from Jupiter Ultra API (one-off; prefer JupiterClient)."""
+    async with JupiterClient() as jupiter:
+        return await jupiter.get_quote(input_mint, output_mint, amount, taker)
 
 
 async def execute_swap(
     signed_tx: VersionedTransaction,
     request_id: str
 ) -> Optional[Dict[str, Any]]:
-    """Execute signed transaction via Jupiter Ultra API."""
-    api_key = check_api_key()
-
-    headers = {
-        "Accept": "application/json",
-        "Content-Type": "application/json",
-        "x-api-key": api_key,
-    }
-
-    serialized_tx = base64.b64encode(bytes(signed_tx)).decode('utf-8')
+    """Execute signed transaction via Jupiter Ultra API (one-off; prefer JupiterClient)."""
+    async with JupiterClient() as jupiter:
+        return await jupiter.execute(signed_tx, request_id)
 
-    payload = {
-        "signedTransaction": serialized_tx,
-        "requestId": request_id
-    }
 
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{JUPITER_ULTRA_API_URL}/execute",
-                json=payload,
-                headers=headers
-            ) as response:
-                if response.status != 200:
-                    error_data = await response.text()
-                    print(
-                        f"Error: Execute failed ({response.status}): {error_data}")
-                    return None
-
-                result = await response.json()
-                return result
-    except Exception as e:
-        print(f"Error: Failed to execute: {e}")
+def _cli_cache(args) -> Optional[QuoteCache]:
+    """Host-wide quote cache for --cache-ttl, shared by concurrent invocations."""
+    if not args.cache_ttl:
         return None
+    return QuoteCache(ttl=args.cache_ttl, shared_dir=QuoteCache.default_shared_dir())
 
 
 def cmd_quote(args):
@@ -250,7 +567,11 @@ def cmd_quote(args):
     print(f"  Output: {get_token_name(output_mint)}")
     print(f"  Amount: {args.amount}")
 
-    result = asyncio.run(get_quote(input_mint, output_mint, amount, taker))
+    async def run():
+        async with JupiterClient(cache=_cli_cache(args)) as jupiter:
+            return await jupiter.get_quote(input_mint, output_mint, amount, taker)
+
+    result = asyncio.run(run())
 
     if not result:
         sys.exit(1)
@@ -268,15 +589,55 @@ def cmd_quote(args):
     print(f"  Router: {result.get('router', 'N/A')}")
 
     # Calculate rate
-    if in_amount > 0 and out_amount > 0:
-        in_dec = TOKEN_DECIMALS.get(input_mint, 9)
-        out_dec = TOKEN_DECIMALS.get(output_mint, 9)
-        rate = (Decimal(out_amount) / Decimal(10 ** out_dec)) / \
-            (Decimal(in_amount) / Decimal(10 ** in_dec))
+    rate = quote_rate(in_amount, out_amount, input_mint, output_mint)
+    if rate is not None:
         print(
             f"  Rate: 1 {get_token_name(input_mint)} = {rate:.6f} {get_token_name(output_mint)}")
 
 
+def cmd_quote_matrix(args):
+    """Quote every input x output x amount combination concurrently."""
+    inputs = [resolve_mint(t) for t in args.inputs.split(",") if t]
+    outputs = [resolve_mint(t) for t in args.outputs.split(",") if t]
+    amounts = [a for a in args.amounts.split(",") if a]
+
+    pairs = [
+        (input_mint, output_mint, parse_amount(amount, input_mint))
+        for input_mint in inputs
+        for output_mint in outputs
+        if input_mint != output_mint
+        for amount in amounts
+    ]
+    if not pairs:
+        print("Error: Nothing to quote")
+        sys.exit(1)
+    for output_mint in outputs:
+        token_registry().decimals(output_mint)  # look up unknown mints before the event loop
+
+    print(f"◎ Quoting {len(pairs)} combinations, {args.concurrency} at a time...")
+
+    async def run():
+        async with JupiterClient(limit_per_host=args.concurrency, cache=_cli_cache(args)) as jupiter:
+            return await jupiter.quote_matrix(pairs, concurrency=args.concurrency)
+
+    rows = asyncio.run(run())
+
+    if args.json:
+        print(json.dumps(rows, indent=2, default=str))
+        return
+
+    print(f"\n{'Input':>22}  {'Output':>24}  {'Rate':>16}  {'Impact':>8}")
+    for row in rows:
+        input_mint, output_mint = row["input_mint"], row["output_mint"]
+        pay = f"{format_amount(row['amount'], input_mint)} {get_token_name(input_mint)}"
+        if "error" in row:
+            print(f"{pay:>22}  ❌ {get_token_name(output_mint)}: {row['error']}")
+            continue
+        get = f"{format_amount(row['out_amount'], output_mint)} {get_token_name(output_mint)}"
+        rate = f"{row['rate']:.6f}" if row["rate"] is not None else "-"
+        print(f"{pay:>22}  {get:>24}  {rate:>16}  {row['price_impact']:>7}%")
+
+
 def cmd_swap(args):
     """Execute swap."""
     input_mint = resolve_mint(args.input_mint)
@@ -285,46 +646,20 @@ def cmd_swap(args):
     # Parse amount
     amount = parse_amount(args.amount, input_mint)
 
+    # Look the output token up before the event loop (and before quoting),
+    # so an unknown mint fails here rather than after the order is fetched.
+    output_decimals = token_registry().decimals(output_mint)
+    output_name = get_token_name(output_mint)
+
     keypair = get_keypair()
-    taker = str(keypair.pubkey())
 
     print(f"◎ Preparing swap...")
     print(f"  From: {keypair.pubkey()}")
     print(f"  Input: {args.amount} {get_token_name(input_mint)}")
-    print(f"  Output: {get_token_name(output_mint)}")
-
-    # Get quote and transaction
-    result = asyncio.run(get_quote(input_mint, output_mint, amount, taker))
-
-    if not result:
-        sys.exit(1)
-
-    if not result.get("transaction"):
-        print("Error: No transaction returned from API")
-        sys.exit(1)
+    print(f"  Output: {output_name}")
 
-    out_amount = int(result.get("outAmount", 0))
-    price_impact = result.get("priceImpactPct", "0")
-    request_id = result.get("requestId")
-
-    print(f"\n◎ Quote:")
-    print(
-        f"  You get: ~{format_amount(out_amount, output_mint)} {get_token_name(output_mint)}")
-    print(f"  Price impact: {price_impact}%")
-
-    # Decode and sign transaction
-    try:
-        tx_bytes = base64.b64decode(result["transaction"])
-        unsigned_tx = VersionedTransaction.from_bytes(tx_bytes)
-        signed_tx = VersionedTransaction(unsigned_tx.message, [keypair])
-    except Exception as e:
-        print(f"Error: Failed to sign transaction: {e}")
-        sys.exit(1)
-
-    print("\n◎ Executing swap...")
-
-    # Execute via Jupiter API
-    exec_result = asyncio.run(execute_swap(signed_tx, request_id))
+    exec_result = asyncio.run(
+        _quote_and_execute(keypair, input_mint, output_mint, amount, output_decimals, output_name))
 
     if exec_result and exec_result.get("status") == "Success":
         signature = exec_result.get("signature")
@@ -337,14 +672,63 @@ def cmd_swap(args):
         sys.exit(1)
 
 
+async def _quote_and_execute(
+    keypair: Keypair,
+    input_mint: str,
+    output_mint: str,
+    amount: int,
+    output_decimals: int,
+    output_name: str,
+) -> Optional[Dict[str, Any]]:
+    """
+    Quote, sign and execute on one session, so execute reuses the quote's connection.
+
+    The output token's decimals and name are looked up by the caller: the
+    registry may block on the network, which doesn't belong in the loop.
+    """
+    taker = str(keypair.pubkey())
+
+    async with JupiterClient() as jupiter:
+        # Get quote and transaction
+        # Never from the cache: the order's transaction is what gets executed.
+        result = await jupiter.get_quote(input_mint, output_mint, amount, taker, fresh=True)
+
+        if not result:
+            sys.exit(1)
+
+        if not result.get("transaction"):
+            print("Error: No transaction returned from API")
+            sys.exit(1)
+
+        out_amount = int(result.get("outAmount", 0))
+        price_impact = result.get("priceImpactPct", "0")
+        request_id = result.get("requestId")
+
+        print(f"\n◎ Quote:")
+        print(f"  You get: ~{_format_units(out_amount, output_decimals)} {output_name}")
+        print(f"  Price impact: {price_impact}%")
+
+        # Decode and sign transaction
+        try:
+            signed_tx = sign_transaction(result, keypair)
+        except Exception as e:
+            print(f"Error: Failed to sign transaction: {e}")
+            sys.exit(1)
+
+        print("\n◎ Executing swap...")
+
+        # Execute via Jupiter API
+        return await jupiter.execute(signed_tx, request_id)
+
+
 def cmd_tokens(args):
     """List known tokens."""
     print("◎ Known Tokens:\n")
     print(f"  {'Symbol':<8} {'Mint Address':<50} {'Decimals'}")
     print(f"  {'-'*8} {'-'*50} {'-'*8}")
-    for symbol, mint in TOKENS.items():
-        decimals = TOKEN_DECIMALS.get(mint, "?")
-        print(f"  {symbol:<8} {mint:<50} {decimals}")
+    for token in token_registry().tokens():
+        decimals = token["decimals"] if token["decimals"] is not None else "?"
+        print(f"  {token['symbol'] or '?':<8} {token['mint']:<50} {decimals}")
 
 
 def main():
@@ -356,6 +740,8 @@ Examples:
   jup_swap.py quote SOL USDC 1           Quote swapping 1 SOL to USDC
   jup_swap.py quote USDC SOL 100         Quote swapping 100 USDC to SOL
   jup_swap.py swap SOL USDC 0.1          Swap 0.1 SOL to USDC
+  jup_swap.py quote-matrix --inputs SOL,JUP --outputs USDC --amounts 0.1,1,10
+                                         Quote 3 sizes for 2 pairs at once
   jup_swap.py tokens                     List known tokens
 
 Token symbols: SOL, USDC, USDT, ETH, CBBTC, JUP, BONK, TRUMP, etc.
@@ -376,8 +762,30 @@ Environment variables (required):
     quote_parser.add_argument(
         "output_mint", help="Output token (symbol or mint)")
     quote_parser.add_argument("amount", help="Amount to swap")
+    quote_parser.add_argument(
+        "--cache-ttl", type=float, default=0,
+        help="Reuse a quote another process fetched within this many seconds (e.g. 0.5)")
     quote_parser.set_defaults(func=cmd_quote)
 
+    # quote-matrix command
+    matrix_parser = subparsers.add_parser(
+        "quote-matrix", help="Quote many pairs and sizes concurrently")
+    matrix_parser.add_argument(
+        "--inputs", required=True, help="Comma-separated input tokens")
+    matrix_parser.add_argument(
+        "--outputs", required=True, help="Comma-separated output tokens")
+    matrix_parser.add_argument(
+        "--amounts", required=True, help="Comma-separated input amounts")
+    matrix_parser.add_argument(
+        "--concurrency", "-j", type=int, default=8,
+        help="Quote requests in flight at once (default: 8)")
+    matrix_parser.add_argument(
+        "--json", action="store_true", help="Print rows as JSON")
+    matrix_parser.add_argument(
+        "--cache-ttl", type=float, default=0,
+        help="Reuse quotes fetched within this many seconds, across processes")
+    matrix_parser.set_defaults(func=cmd_quote_matrix)
+
     # swap command
     swap_parser = subparsers.add_parser("swap", help="Execute swap")
     swap_parser.add_argument("input_mint", help="Input token (symbol or mint)")
@@ -396,7 +804,11 @@ Environment variables (required):
         parser.print_help()
         sys.exit(1)
 
-    args.func(args)
+    try:
+        args.func(args)
+    except LookupError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
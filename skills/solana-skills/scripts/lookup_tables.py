@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Address lookup tables for recurring multi-recipient transactions.
+
+A v0 transaction can name accounts by a one-byte index into an on-chain
+address lookup table (ALT) instead of by their 32-byte key, so a transfer
+to a recipient already in a table costs ~1 byte of account keys rather
+than 32. ``LookupTables`` keeps the tables one wallet owns, creating and
+extending them with any addresses not yet covered, and remembers their
+addresses per RPC endpoint in ``~/.cache/solana-skills/lookup_tables.json``.
+
+Tables cost rent (about 0.00022 SOL per address, refunded when a table is
+closed), so they pay off for recipient sets paid again and again, not for
+one-off payouts.
+
+Usage as a module:
+    async with BatchRpcClient(url) as rpc:
+        tables = LookupTables(rpc, keypair)
+        accounts = await tables.ensure(addresses)
+        message = MessageV0.try_compile(payer, ixs, accounts, blockhash)
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import asyncio
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    from solders.address_lookup_table_account import AddressLookupTableAccount
+    from solders.address_lookup_table_program import (CreateLookupTableParams, ExtendLookupTableParams,
+                                                      create_lookup_table, extend_lookup_table)
+    from solders.hash import Hash
+    from solders.instruction import Instruction
+    from solders.keypair import Keypair
+    from solders.message import MessageV0
+    from solders.pubkey import Pubkey
+    from solders.transaction import VersionedTransaction
+except ImportError as e:
+    print(f"Error: Required packages not installed. Missing: {e.name}")
+    print("Run: pip install solders")
+    sys.exit(1)
+
+from solana_rpc import BatchRpcClient, RpcError, account_data, get_multiple_accounts
+
+DEFAULT_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "solana-skills", "lookup_tables.json")
+LOOKUP_TABLE_PROGRAM = "AddressLookupTab1e1111111111111111111111111"
+# Table layout: type u32 | deactivation_slot u64 | last_extended_slot u64 |
+# start_index u8 | authority Option<Pubkey> (33) | padding u16 | addresses...
+LOOKUP_TABLE_META_SIZE = 56
+LOOKUP_TABLE_MAX_ADDRESSES = 256
+# Addresses per extend instruction, leaving room for a create in the same transaction.
+EXTEND_CHUNK = 20
+ACTIVE = 2 ** 64 - 1
+# Rent-exempt lamports per byte of account data (including 128 bytes of overhead).
+RENT_PER_BYTE = 6960
+
+
+class LookupTable:
+    """One on-chain table: its addresses, and the slot they became usable from."""
+
+    def __init__(self, key: str, addresses: List[str], last_extended_slot: int, deactivated: bool):
+        self.key = key
+        self.addresses = addresses
+        self.last_extended_slot = last_extended_slot
+        self.deactivated = deactivated
+
+    @classmethod
+    def parse(cls, key: str, data: bytes) -> "LookupTable":
+        count = (len(data) - LOOKUP_TABLE_META_SIZE) // 32
+        addresses = [str(Pubkey(data[LOOKUP_TABLE_META_SIZE + 32 * i:LOOKUP_TABLE_META_SIZE + 32 * (i + 1)]))
+                     for i in range(count)]
+        return cls(
+            key,
+            addresses,
+            last_extended_slot=int.from_bytes(data[12:20], "little"),
+            deactivated=int.from_bytes(data[4:12], "little") != ACTIVE,
+        )
+
+    def account(self) -> AddressLookupTableAccount:
+        return AddressLookupTableAccount(
+            key=Pubkey.from_string(self.key),
+            addresses=[Pubkey.from_string(a) for a in self.addresses],
+        )
+
+
+def table_rent(addresses: int, tables: int = 1) -> int:
+    """Rent-exempt lamports for ``tables`` new tables holding ``addresses`` entries between them."""
+    return RENT_PER_BYTE * ((128 + LOOKUP_TABLE_META_SIZE) * tables + 32 * addresses)
+
+
+class LookupTables:
+    """
+    The lookup tables owned by one wallet on one RPC endpoint.
+
+    ``ensure`` adds missing addresses to the newest table with room (or to a
+    new table) and waits until they can be used, so repeated payouts to the
+    same recipients reuse the tables created the first time.
+    """
+
+    def __init__(
+        self,
+        rpc: BatchRpcClient,
+        keypair: Keypair,
+        path: str = DEFAULT_PATH,
+        poll_interval: float = 1.0,
+    ):
+        """
+        Args:
+            rpc: Batched RPC client
+            keypair: Authority and payer of the tables
+            path: JSON cache of table addresses (created if missing)
+            poll_interval: Seconds between confirmation polls
+        """
+        self.rpc = rpc
+        self.keypair = keypair
+        self.authority = keypair.pubkey()
+        self.path = path
+        self.poll_interval = poll_interval
+        self._cache_key = f"{rpc.url} {self.authority}"
+        self.tables: Dict[str, LookupTable] = {}
+        self._loaded = False
+
+    async def load(self) -> List[LookupTable]:
+        """Fetch the cached tables on chain; closed ones are forgotten, deactivated ones skipped."""
+        keys = self._read_cache()
+        found = {}
+        async for key, account in get_multiple_accounts(self.rpc, keys):
+            if isinstance(account, RpcError):
+                raise account
+            if account is not None and account["owner"] == LOOKUP_TABLE_PROGRAM:
+                found[key] = LookupTable.parse(key, account_data(account))
+        if len(found) != len(keys):
+            self._write_cache([k for k in keys if k in found])
+        # Cache order, so the newest table (the one extended next) is last.
+        self.tables = {k: found[k] for k in keys if k in found and not found[k].deactivated}
+        self._loaded = True
+        return list(self.tables.values())
+
+    def accounts(self) -> List[AddressLookupTableAccount]:
+        return [table.account() for table in self.tables.values()]
+
+    def missing(self, addresses: Iterable[str]) -> List[str]:
+        """Addresses (in first-seen order) that no loaded table holds."""
+        covered = {a for table in self.tables.values() for a in table.addresses}
+        return [a for a in dict.fromkeys(str(a) for a in addresses) if a not in covered]
+
+    def plan(self, addresses: Iterable[str]) -> Tuple[List[AddressLookupTableAccount], int, int]:
+        """
+        Tables as they would be after ``ensure``, without sending anything.
+
+        Returns:
+            ``(lookup table accounts, addresses to add, tables to create)``;
+            tables not yet created get placeholder keys.
+        """
+        missing = self.missing(addresses)
+        accounts = self.accounts()
+        created = 0
+        for table, chunk in self._assign(missing):
+            if table is None:
+                created += 1
+                accounts.append(AddressLookupTableAccount(
+                    key=Pubkey.new_unique(), addresses=[Pubkey.from_string(a) for a in chunk]))
+            else:
+                index = list(self.tables).index(table.key)
+                accounts[index] = AddressLookupTableAccount(
+                    key=accounts[index].key,
+                    addresses=list(accounts[index].addresses) + [Pubkey.from_string(a) for a in chunk])
+        return accounts, len(missing), created
+
+    async def ensure(self, addresses: Iterable[str]) -> List[AddressLookupTableAccount]:
+        """
+        Make every address available through a table, creating and
+        extending tables as needed, and return all usable tables.
+
+        Signers and invoked programs can't be looked up; leave them out.
+        """
+        if not self._loaded:
+            await self.load()
+        missing = self.missing(addresses)
+        if not missing:
+            return self.accounts()
+
+        last_slot = 0
+        for table, chunk in self._assign(missing):
+            if table is None:
+                slot = await self.rpc.call("getSlot", [{"commitment": "finalized"}])
+                create_ix, key = create_lookup_table(CreateLookupTableParams(
+                    authority_address=self.authority, payer_address=self.authority, recent_slot=slot))
+                key = str(key)
+                # Cached before sending so a table created by an interrupted run is still found.
+                self._write_cache(self._read_cache() + [key])
+                table = self.tables[key] = LookupTable(key, [], 0, False)
+                first, chunk = chunk[:EXTEND_CHUNK], chunk[EXTEND_CHUNK:]
+                last_slot = max(last_slot, await self._send([[create_ix, self._extend_ix(key, first)]]))
+                table.addresses += first
+            if chunk:
+                extends = [[self._extend_ix(table.key, chunk[i:i + EXTEND_CHUNK])]
+                           for i in range(0, len(chunk), EXTEND_CHUNK)]
+                # Extends only append, so they can land in any order.
+                last_slot = max(last_slot, await self._send(extends))
+                table.addresses += chunk
+
+        # Addresses become usable in the slot after the one that added them.
+        while await self.rpc.call("getSlot", [{"commitment": "confirmed"}]) <= last_slot:
+            await asyncio.sleep(self.poll_interval)
+        await self.load()
+        still_missing = self.missing(missing)
+        if still_missing:
+            raise RuntimeError(f"{len(still_missing)} addresses missing from lookup tables after extending")
+        return self.accounts()
+
+    def _assign(self, missing: Sequence[str]) -> List[Tuple[Optional[LookupTable], List[str]]]:
+        """Split addresses between the newest table with room and new tables (None)."""
+        assignments = []
+        tables = list(self.tables.values())
+        if tables and len(tables[-1].addresses) < LOOKUP_TABLE_MAX_ADDRESSES:
+            room = LOOKUP_TABLE_MAX_ADDRESSES - len(tables[-1].addresses)
+            if missing[:room]:
+                assignments.append((tables[-1], list(missing[:room])))
+            missing = missing[room:]
+        for i in range(0, len(missing), LOOKUP_TABLE_MAX_ADDRESSES):
+            assignments.append((None, list(missing[i:i + LOOKUP_TABLE_MAX_ADDRESSES])))
+        return assignments
+
+    def _extend_ix(self, table: str, addresses: List[str]) -> Instruction:
+        return extend_lookup_table(ExtendLookupTableParams(
+            lookup_table_address=Pubkey.from_string(table),
+            authority_address=self.authority,
+            payer_address=self.authority,
+            new_addresses=[Pubkey.from_string(a) for a in addresses],
+        ))
+
+    async def _send(self, transactions: List[List[Instruction]]) -> int:
+        """Sign, send and confirm transactions concurrently; returns the highest slot they landed in."""
+        latest = (await self.rpc.call("getLatestBlockhash", [{"commitment": "confirmed"}]))["value"]
+        blockhash = Hash.from_string(latest["blockhash"])
+        signed = {}
+        for ixs in transactions:
+            message = MessageV0.try_compile(
+                payer=self.authority,
+                instructions=ixs,
+                address_lookup_table_accounts=[],
+                recent_blockhash=blockhash,
+            )
+            tx = VersionedTransaction(message, [self.keypair])
+            signed[str(tx.signatures[0])] = base64.b64encode(bytes(tx)).decode()
+        await self.rpc.call_many([
+            ("sendTransaction", [tx, {"encoding": "base64", "preflightCommitment": "confirmed"}])
+            for tx in signed.values()
+        ])
+
+        pending, slot = list(signed), 0
+        while pending:
+            statuses, height = await self.rpc.call_many([
+                ("getSignatureStatuses", [pending]),
+                ("getBlockHeight", [{"commitment": "confirmed"}]),
+            ])
+            if isinstance(statuses, RpcError):
+                raise statuses
+            waiting = []
+            for signature, status in zip(pending, statuses["value"]):
+                if status and status.get("err") is not None:
+                    raise RuntimeError(f"Lookup table transaction {signature} failed: {status['err']}")
+                if status and status.get("confirmationStatus") in ("confirmed", "finalized"):
+                    slot = max(slot, status["slot"])
+                else:
+                    waiting.append(signature)
+            if waiting and not isinstance(height, RpcError) and height > latest["lastValidBlockHeight"]:
+                raise RuntimeError(f"Lookup table transaction {waiting[0]} expired; run again to retry")
+            pending = waiting
+            if pending:
+                await asyncio.sleep(self.poll_interval)
+        return slot
+
+    def _read_cache(self) -> List[str]:
+        try:
+            with open(self.path) as f:
+                return json.load(f).get(self._cache_key, {}).get("tables", [])
+        except (OSError, ValueError):
+            return []
+
+    def _write_cache(self, tables: List[str]):
+        try:
+            with open(self.path) as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+        cache[self._cache_key] = {"tables": tables, "updated": time.time()}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.tmp{os.getpid()}"
+        with open(tmp, "w") as f:
+            json.dump(cache, f, indent=1)
+        os.replace(tmp, self.path)
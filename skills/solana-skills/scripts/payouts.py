@@ -0,0 +1,534 @@
+#!/usr/bin/env python3
+"""
+Bulk SOL and SPL token payouts.
+
+Reads a CSV of recipients and amounts, packs as many transfers (and
+recipient token-account creations) into each transaction as the 1232-byte
+packet limit allows, and signs and submits the transactions concurrently.
+With address lookup tables (see lookup_tables.py) recipients cost a byte
+each instead of 32, and several times more transfers fit per transaction.
+
+Every row's progress is appended to a JSONL results file *before* its
+transaction is sent, so an interrupted run can be started again with the
+same command: rows already confirmed are skipped, and rows whose
+transaction may still land are checked on chain (or left to expire) before
+they are ever sent again. No row is paid twice.
+
+CSV format (header required; mint optional, defaults to --mint or SOL):
+    recipient,amount,mint
+    7xKXtg2CW87d97TXJSDpbD5jBkheTqA83TZRuJosgAsU,0.5,
+    9WzDXwBbmkg8ZTbNMqUxvQRAyrZzDsGYdLVL9zYtAWWM,25,EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v
+
+Usage as a module:
+    from payouts import PayoutEngine, PayoutLog, read_payouts
+    engine = PayoutEngine(rpc, keypair, PayoutLog("payroll.csv.results.jsonl"))
+    summary = await engine.run(read_payouts("payroll.csv"))
+"""
+
+import os
+import csv
+import sys
+import json
+import time
+import base64
+import asyncio
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from solders.address_lookup_table_account import AddressLookupTableAccount
+    from solders.hash import Hash
+    from solders.instruction import AccountMeta, Instruction
+    from solders.keypair import Keypair
+    from solders.message import MessageV0
+    from solders.pubkey import Pubkey
+    from solders.system_program import TransferParams, transfer
+    from solders.transaction import VersionedTransaction
+    from solders.compute_budget import set_compute_unit_price
+    from spl.token.instructions import TransferCheckedParams, transfer_checked
+except ImportError as e:
+    print(f"Error: Required packages not installed. Missing: {e.name}")
+    print("Run: pip install solana solders spl-token")
+    sys.exit(1)
+
+from lookup_tables import LookupTables
+from solana_rpc import (ASSOCIATED_TOKEN_PROGRAM, NATIVE, BatchRpcClient, RpcError,
+                        associated_token_address, fetch_mints, get_multiple_accounts)
+
+# Max serialized transaction size (IPv6 MTU minus headers).
+PACKET_DATA_SIZE = 1232
+# Max accounts a transaction may lock, static keys and lookups together.
+MAX_TX_ACCOUNT_LOCKS = 64
+SYSTEM_PROGRAM = "11111111111111111111111111111111"
+LAMPORTS_PER_SIGNATURE = 5000
+# Rent-exempt minimum for a 165-byte token account.
+TOKEN_ACCOUNT_RENT = 2_039_280
+# Transfer amounts are u64 on chain.
+U64_MAX = 2 ** 64 - 1
+
+CONFIRMED = "confirmed"
+FAILED = "failed"
+SENT = "sent"
+
+
+class Payout:
+    """One CSV row: pay ``amount`` of ``mint`` (or SOL) to ``recipient``."""
+
+    def __init__(self, key: str, recipient: str, amount: str, mint: str):
+        self.key = key
+        self.recipient = recipient
+        self.amount = amount
+        self.mint = mint
+        self.raw: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def fields(self) -> Dict[str, str]:
+        return {"recipient": self.recipient, "amount": self.amount, "mint": self.mint}
+
+    def __repr__(self):
+        return f"Payout({self.key}, {self.recipient}, {self.amount} {self.mint})"
+
+
+def read_payouts(path: str, default_mint: str = NATIVE) -> List[Payout]:
+    """Rows of a recipient,amount[,mint] CSV; keys are CSV line numbers."""
+    payouts = []
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        columns = {name.strip().lower(): name for name in reader.fieldnames or []}
+        recipient_col = next((columns[c] for c in ("recipient", "address", "wallet") if c in columns), None)
+        if recipient_col is None or "amount" not in columns:
+            raise ValueError("CSV needs a header with 'recipient' and 'amount' columns")
+        for row in reader:
+            recipient = (row.get(recipient_col) or "").strip()
+            if not recipient or recipient.startswith("#"):
+                continue
+            mint = (row.get(columns.get("mint", ""), "") or "").strip() or default_mint
+            payouts.append(Payout(
+                key=str(reader.line_num),
+                recipient=recipient,
+                amount=(row[columns["amount"]] or "").strip(),
+                mint=NATIVE if mint.upper() == NATIVE else mint,
+            ))
+    return payouts
+
+
+class PayoutLog:
+    """
+    Append-only JSONL of per-row events (sent, confirmed, failed).
+
+    Each line is flushed and fsynced before the transaction it describes is
+    sent. A torn last line from a crash is ignored on replay, and cut off
+    before the log is appended to again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def replay(self) -> Dict[str, Dict[str, Any]]:
+        """Latest event for every row key."""
+        rows: Dict[str, Dict[str, Any]] = {}
+        if not os.path.exists(self.path):
+            return rows
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                rows[event["row"]] = event
+        return rows
+
+    def record(self, events: List[Dict[str, Any]]):
+        if self._file is None:
+            _trim_torn_line(self.path)
+            self._file = open(self.path, "a")
+        now = time.time()
+        for event in events:
+            self._file.write(json.dumps({**event, "ts": now}) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _trim_torn_line(path: str):
+    """Cut a partial last line left by a crash, so the next append isn't glued onto it."""
+    try:
+        f = open(path, "rb+")
+    except FileNotFoundError:
+        return
+    with f:
+        end = pos = f.seek(0, os.SEEK_END)
+        while pos > 0:
+            step = min(4096, pos)
+            f.seek(pos - step)
+            newline = f.read(step).rfind(b"\n")
+            if newline != -1:
+                pos = pos - step + newline + 1
+                break
+            pos -= step
+        if pos != end:
+            f.truncate(pos)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class _Group:
+    """The instructions one payout adds to a transaction."""
+
+    def __init__(self, payout: Payout, transfer_ix: Instruction, creates: List[Tuple[str, Instruction]]):
+        self.payout = payout
+        self.transfer_ix = transfer_ix
+        self.creates = creates          # (token account, idempotent create ix)
+
+
+class PayoutEngine:
+    """Packs, signs, sends and confirms payouts, recording every row in a PayoutLog."""
+
+    def __init__(
+        self,
+        rpc: BatchRpcClient,
+        keypair: Keypair,
+        log: PayoutLog,
+        max_per_tx: Optional[int] = None,
+        priority_fee: Optional[int] = None,
+        send_chunk: int = 50,
+        poll_interval: float = 2.0,
+        on_event=None,
+        lookup_tables: Optional[LookupTables] = None,
+    ):
+        """
+        Args:
+            rpc: Batched RPC client
+            keypair: Payer and sender of every transfer
+            log: Where per-row results go (and are resumed from)
+            max_per_tx: Cap on transfers per transaction (default: as many as fit)
+            priority_fee: Compute unit price in micro-lamports
+            send_chunk: Transactions signed per blockhash
+            poll_interval: Seconds between confirmation polls
+            on_event: Called with each batch of row events (for progress output)
+            lookup_tables: Put recipients in these wallet-owned lookup tables
+                (creating and extending them as needed) and compile against them
+        """
+        self.rpc = rpc
+        self.keypair = keypair
+        self.payer = keypair.pubkey()
+        self.log = log
+        self.max_per_tx = max_per_tx
+        self.priority_fee = priority_fee
+        self.send_chunk = send_chunk
+        self.poll_interval = poll_interval
+        self.on_event = on_event
+        self.state: Dict[str, Dict[str, Any]] = {}
+        self.lookup_tables = lookup_tables
+        self.tables: List[AddressLookupTableAccount] = []
+        self._mints: Dict[str, Any] = {}
+
+    # -- planning ------------------------------------------------------------
+
+    async def prepare(self, payouts: List[Payout]) -> Tuple[List[_Group], List[Payout]]:
+        """
+        Build each payout's instructions.
+
+        Mint programs/decimals and which recipient token accounts already
+        exist are fetched in bulk (getMultipleAccounts, 100 per call).
+
+        Returns:
+            ``(groups, invalid payouts)``
+        """
+        wanted = {p.mint for p in payouts if p.mint != NATIVE} - set(self._mints)
+        if wanted:
+            self._mints.update(await fetch_mints(self.rpc, wanted))
+
+        invalid, ready, accounts = [], [], {}
+        for payout in payouts:
+            try:
+                recipient = Pubkey.from_string(payout.recipient)
+                decimals = 9
+                if payout.mint != NATIVE:
+                    info = self._mints.get(payout.mint)
+                    if isinstance(info, RpcError) or info is None:
+                        raise ValueError(f"Mint {payout.mint}: {info or 'not found'}")
+                    program, decimals = info
+                    accounts[payout.key] = associated_token_address(payout.recipient, payout.mint, program)
+                payout.raw = _raw_amount(payout.amount, decimals)
+            except ValueError as e:
+                payout.error = str(e) or "Invalid recipient"
+                invalid.append(payout)
+                continue
+            ready.append((payout, recipient, decimals))
+
+        existing = set()
+        async for key, account in get_multiple_accounts(self.rpc, sorted(set(accounts.values()))):
+            if isinstance(account, RpcError):
+                raise account
+            if account is not None:
+                existing.add(key)
+
+        groups = []
+        for payout, recipient, decimals in ready:
+            if payout.mint == NATIVE:
+                ix = transfer(TransferParams(from_pubkey=self.payer, to_pubkey=recipient, lamports=payout.raw))
+                groups.append(_Group(payout, ix, []))
+                continue
+            program, _ = self._mints[payout.mint]
+            mint = Pubkey.from_string(payout.mint)
+            program_id = Pubkey.from_string(program)
+            dest = accounts[payout.key]
+            source = associated_token_address(str(self.payer), payout.mint, program)
+            creates = []
+            if dest not in existing:
+                creates.append((dest, _create_ata_idempotent(self.payer, recipient, mint, Pubkey.from_string(dest), program_id)))
+            ix = transfer_checked(TransferCheckedParams(
+                program_id=program_id,
+                source=Pubkey.from_string(source),
+                mint=mint,
+                dest=Pubkey.from_string(dest),
+                owner=self.payer,
+                amount=payout.raw,
+                decimals=decimals,
+            ))
+            groups.append(_Group(payout, ix, creates))
+        return groups, invalid
+
+    def pack(self, groups: List[_Group]) -> List[List[_Group]]:
+        """Greedily fill transactions up to the size and account limits, in CSV order."""
+        packed: List[List[_Group]] = []
+        current: List[_Group] = []
+        for group in groups:
+            if current and (
+                (self.max_per_tx and len(current) >= self.max_per_tx)
+                or not self.fits(current + [group])
+            ):
+                packed.append(current)
+                current = []
+            current.append(group)
+        if current:
+            packed.append(current)
+        return packed
+
+    def instructions(self, groups: List[_Group]) -> List[Instruction]:
+        ixs = []
+        if self.priority_fee:
+            ixs.append(set_compute_unit_price(self.priority_fee))
+        created = set()
+        for group in groups:
+            for account, ix in group.creates:
+                if account not in created:
+                    created.add(account)
+                    ixs.append(ix)
+            ixs.append(group.transfer_ix)
+        return ixs
+
+    def compile(self, groups: List[_Group], blockhash: Hash) -> MessageV0:
+        return MessageV0.try_compile(
+            payer=self.payer,
+            instructions=self.instructions(groups),
+            address_lookup_table_accounts=self.tables,
+            recent_blockhash=blockhash,
+        )
+
+    def transaction_size(self, groups: List[_Group]) -> int:
+        return _transaction_size(self.compile(groups, Hash.default()))
+
+    def fits(self, groups: List[_Group]) -> bool:
+        message = self.compile(groups, Hash.default())
+        # With lookup tables the account lock limit, not size, is usually what binds.
+        accounts = len(message.account_keys) + sum(
+            len(lookup.writable_indexes) + len(lookup.readonly_indexes)
+            for lookup in message.address_table_lookups)
+        return _transaction_size(message) <= PACKET_DATA_SIZE and accounts <= MAX_TX_ACCOUNT_LOCKS
+
+    def lookup_addresses(self, groups: List[_Group]) -> List[str]:
+        """Accounts of these payouts that can go in a lookup table (not signers or invoked programs)."""
+        ixs = self.instructions(groups)
+        programs = {str(ix.program_id) for ix in ixs}
+        return list(dict.fromkeys(
+            str(meta.pubkey) for ix in ixs for meta in ix.accounts
+            if not meta.is_signer and str(meta.pubkey) not in programs))
+
+    # -- running -------------------------------------------------------------
+
+    async def run(self, payouts: List[Payout], retries: int = 2, retry_failed: bool = False) -> Dict[str, int]:
+        """
+        Pay every row not already confirmed in the log.
+
+        Rows whose transaction expired unconfirmed are re-sent, up to
+        ``retries`` more times per run. Rows that failed (on chain or
+        validation) in an earlier run are only attempted again with
+        ``retry_failed``.
+
+        Returns:
+            Row counts by final state
+        """
+        self.state = self.log.replay()
+        for payout in payouts:
+            previous = self.state.get(payout.key)
+            if previous and any(previous.get(k) != v for k, v in payout.fields().items()):
+                raise ValueError(
+                    f"Row {payout.key} changed since the run began ({previous.get('recipient')} "
+                    f"{previous.get('amount')} {previous.get('mint')}); use a new results file")
+            if retry_failed and previous and previous["event"] == FAILED:
+                previous["retry"] = True
+
+        # Transactions from an interrupted run may still land: settle them first.
+        await self.confirm([p for p in payouts if self._state(p) == SENT])
+
+        for attempt in range(retries + 1):
+            todo = [p for p in payouts if self._state(p) is None or self._retryable(p)]
+            if not todo:
+                break
+            groups, invalid = await self.prepare(todo)
+            if invalid:
+                self._record([self._event(p, FAILED, error=p.error) for p in invalid])
+            if self.lookup_tables is not None and groups:
+                self.tables = await self.lookup_tables.ensure(self.lookup_addresses(groups))
+            sent = await self.send(self.pack(groups))
+            await self.confirm(sent)
+
+        counts: Dict[str, int] = {}
+        for payout in payouts:
+            state = "expired" if self._retryable(payout) else self._state(payout) or "pending"
+            counts[state] = counts.get(state, 0) + 1
+        return counts
+
+    async def send(self, transactions: List[List[_Group]]) -> List[Payout]:
+        """Sign and submit transactions concurrently, ``send_chunk`` per blockhash."""
+        sent: List[Payout] = []
+        for start in range(0, len(transactions), self.send_chunk):
+            chunk = transactions[start:start + self.send_chunk]
+            latest = (await self.rpc.call("getLatestBlockhash", [{"commitment": "confirmed"}]))["value"]
+            blockhash = Hash.from_string(latest["blockhash"])
+
+            signed, events = [], []
+            for groups in chunk:
+                tx = VersionedTransaction(self.compile(groups, blockhash), [self.keypair])
+                signature = str(tx.signatures[0])
+                signed.append(base64.b64encode(bytes(tx)).decode())
+                for group in groups:
+                    events.append(self._event(group.payout, SENT, signature=signature,
+                                              last_valid=latest["lastValidBlockHeight"]))
+                    sent.append(group.payout)
+            # Logged before sending: a crash now can't lead to paying twice.
+            self._record(events)
+            await self.rpc.call_many([
+                ("sendTransaction", [tx, {"encoding": "base64", "skipPreflight": True,
+                                          "preflightCommitment": "confirmed"}])
+                for tx in signed
+            ])
+            # Send errors are not final: the transaction may still land, so
+            # confirmation (or expiry) decides what happened.
+        return sent
+
+    async def confirm(self, payouts: List[Payout]):
+        """Poll until every row's transaction is confirmed, failed, or expired."""
+        waiting: Dict[str, List[Payout]] = {}
+        for payout in payouts:
+            waiting.setdefault(self.state[payout.key]["signature"], []).append(payout)
+
+        while waiting:
+            signatures = list(waiting)
+            # Search history too: a landed signature drops out of the recent
+            # status cache, and a null then would look like an expired send.
+            calls = [("getSignatureStatuses", [signatures[i:i + 256], {"searchTransactionHistory": True}])
+                     for i in range(0, len(signatures), 256)]
+            results = await self.rpc.call_many(calls + [("getBlockHeight", [{"commitment": "confirmed"}])])
+            height = results[-1]
+            statuses = []
+            for call, result in zip(calls, results):
+                # Unknown (not null) when the lookup itself failed: decide on a later poll.
+                statuses.extend(result["value"] if not isinstance(result, RpcError) else [result] * len(call[1][0]))
+
+            events = []
+            for signature, status in zip(signatures, statuses):
+                rows = waiting[signature]
+                if isinstance(status, RpcError):
+                    continue
+                if status and status.get("err") is not None:
+                    events += [self._event(p, FAILED, signature=signature, error=json.dumps(status["err"]))
+                               for p in rows]
+                elif status and status.get("confirmationStatus") in ("confirmed", "finalized"):
+                    events += [self._event(p, CONFIRMED, signature=signature, slot=status.get("slot"))
+                               for p in rows]
+                elif not isinstance(height, RpcError) and height > self.state[rows[0].key]["last_valid"]:
+                    # Blockhash expired and no record of it even in history: safe to resend.
+                    events += [self._event(p, FAILED, signature=signature, error="expired", retry=True)
+                               for p in rows]
+                else:
+                    continue
+                del waiting[signature]
+            if events:
+                self._record(events)
+            if waiting:
+                await asyncio.sleep(self.poll_interval)
+
+    def _state(self, payout: Payout) -> Optional[str]:
+        event = self.state.get(payout.key)
+        return event["event"] if event else None
+
+    def _retryable(self, payout: Payout) -> bool:
+        event = self.state.get(payout.key)
+        return bool(event and event["event"] == FAILED and event.get("retry"))
+
+    def _event(self, payout: Payout, event: str, **fields) -> Dict[str, Any]:
+        return {"row": payout.key, "event": event, **payout.fields(), **fields}
+
+    def _record(self, events: List[Dict[str, Any]]):
+        self.log.record(events)
+        for event in events:
+            self.state[event["row"]] = event
+        if self.on_event:
+            self.on_event(events)
+
+
+def estimate_fees(engine: PayoutEngine, transactions: List[List[_Group]]) -> Dict[str, int]:
+    """Lamports a packed run costs: signatures plus rent for new token accounts."""
+    creates = {account for groups in transactions for group in groups for account, _ in group.creates}
+    return {
+        "transactions": len(transactions),
+        "signature_fees": LAMPORTS_PER_SIGNATURE * len(transactions),
+        "token_accounts": len(creates),
+        "rent": TOKEN_ACCOUNT_RENT * len(creates),
+    }
+
+
+def _transaction_size(message: MessageV0) -> int:
+    # compact-u16 signature count + 64 bytes per signature + message.
+    return 1 + 64 * message.header.num_required_signatures + len(bytes(message))
+
+
+def _raw_amount(amount: str, decimals: int) -> int:
+    try:
+        value = Decimal(amount)
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {amount}")
+    if not value.is_finite():
+        raise ValueError(f"Invalid amount: {amount}")
+    raw = value * (10 ** decimals)
+    if raw != raw.to_integral_value():
+        raise ValueError(f"Invalid amount for {decimals} decimals: {amount}")
+    if not 0 < raw <= U64_MAX:
+        raise ValueError(f"Amount out of range: {amount}")
+    return int(raw)
+
+
+def _create_ata_idempotent(payer: Pubkey, owner: Pubkey, mint: Pubkey, account: Pubkey,
+                           token_program: Pubkey) -> Instruction:
+    # CreateIdempotent (1): succeeds if the account already exists, so
+    # repeated or retried creates can't fail a transaction.
+    return Instruction(
+        Pubkey.from_string(ASSOCIATED_TOKEN_PROGRAM),
+        bytes([1]),
+        [
+            AccountMeta(payer, is_signer=True, is_writable=True),
+            AccountMeta(account, is_signer=False, is_writable=True),
+            AccountMeta(owner, is_signer=False, is_writable=False),
+            AccountMeta(mint, is_signer=False, is_writable=False),
+            AccountMeta(Pubkey.from_string(SYSTEM_PROGRAM), is_signer=False, is_writable=False),
+            AccountMeta(token_program, is_signer=False, is_writable=False),
+        ],
+    )
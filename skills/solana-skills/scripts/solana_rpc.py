@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Batched Solana RPC
+
+A pooled async JSON-RPC client that packs many calls into each HTTP request,
+and balance scanning built on it: SOL and token balances for any number of
+(owner, mint) pairs cost one getMultipleAccounts per 100 accounts, sent
+several to a request and several requests at a time.
+
+Usage as a module:
+    from solana_rpc import BatchRpcClient, scan_balances
+
+    async with BatchRpcClient(rpc_url) as rpc:
+        async for row in scan_balances(rpc, [(owner, "SOL"), (owner, usdc_mint)]):
+            print(row["owner"], row["mint"], row["ui_amount"])
+"""
+
+import sys
+import json
+import base64
+import asyncio
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import aiohttp
+    from solders.pubkey import Pubkey
+except ImportError as e:
+    print(f"Error: Required packages not installed. Missing: {e.name}")
+    print("Run: pip install solders aiohttp")
+    sys.exit(1)
+
+
+TOKEN_PROGRAM = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+TOKEN_2022_PROGRAM = "TokenzQdBNbLqP5VEhdkAS6EPFLC1PWTcDjLSWgfj9ae"
+ASSOCIATED_TOKEN_PROGRAM = "ATokenGPvbdGVxr1b2hvZbsiqW5xWH25efTNsLJA8knL"
+
+# getMultipleAccounts accepts at most 100 keys per call.
+MAX_ACCOUNTS_PER_CALL = 100
+
+NATIVE = "SOL"
+LAMPORTS_PER_SOL = 1_000_000_000
+
+
+class RpcError(Exception):
+    """An RPC call failed (transport error or JSON-RPC error object)."""
+
+
+class BatchRpcClient:
+    """
+    Async Solana JSON-RPC client with connection pooling and request batching.
+
+    ``call_many`` packs ``batch_size`` calls into each HTTP POST (a JSON-RPC
+    batch) and keeps up to ``concurrency`` POSTs in flight. Some providers
+    cap or refuse batches; use ``batch_size=1`` for those.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        concurrency: int = 4,
+        batch_size: int = 10,
+        timeout: float = 30.0,
+        retries: int = 3,
+    ):
+        """
+        Args:
+            url: RPC endpoint
+            concurrency: HTTP requests in flight at once
+            batch_size: JSON-RPC calls per HTTP request
+            timeout: Seconds allowed per HTTP request
+            retries: Retries (with backoff) on HTTP 429/5xx and connection errors
+        """
+        self.url = url
+        self.concurrency = concurrency
+        self.batch_size = max(1, batch_size)
+        self.timeout = timeout
+        self.retries = retries
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._next_id = 0
+
+    async def __aenter__(self):
+        self._ensure_session()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"Content-Type": "application/json"},
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def call(self, method: str, params: Optional[list] = None) -> Any:
+        """One JSON-RPC call; returns ``result`` or raises RpcError."""
+        (result,) = await self._post([(method, params or [])])
+        if isinstance(result, RpcError):
+            raise result
+        return result
+
+    async def call_many(self, calls: Sequence[Tuple[str, list]]) -> List[Any]:
+        """
+        Many JSON-RPC calls, batched and run concurrently.
+
+        Returns:
+            Results in call order; a failed call's slot holds its RpcError
+        """
+        chunks = [calls[i:i + self.batch_size] for i in range(0, len(calls), self.batch_size)]
+        results = await asyncio.gather(*(self._post(chunk) for chunk in chunks))
+        return [result for chunk in results for result in chunk]
+
+    async def call_batch(self, calls: Sequence[Tuple[str, list]]) -> List[Any]:
+        """
+        A few calls in a single HTTP request, whatever ``batch_size`` is
+        (unless it is 1: then they go out concurrently, one per request).
+        """
+        if self.batch_size == 1:
+            return await self.call_many(calls)
+        return await self._post(calls)
+
+    async def iter_many(self, calls: Sequence[Tuple[str, list]]) -> AsyncIterator[Tuple[int, Any]]:
+        """Like call_many, but yields ``(index, result)`` as each HTTP batch completes."""
+        chunks = [(i, calls[i:i + self.batch_size]) for i in range(0, len(calls), self.batch_size)]
+
+        async def run(start, chunk):
+            return start, await self._post(chunk)
+
+        tasks = [asyncio.ensure_future(run(start, chunk)) for start, chunk in chunks]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                start, results = await next_done
+                for offset, result in enumerate(results):
+                    yield start + offset, result
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _post(self, calls: Sequence[Tuple[str, list]]) -> List[Any]:
+        session = self._ensure_session()
+        payload = []
+        for method, params in calls:
+            self._next_id += 1
+            payload.append({"jsonrpc": "2.0", "id": self._next_id, "method": method, "params": params})
+        body = payload if len(payload) > 1 else payload[0]
+
+        delay = 0.5
+        for attempt in range(self.retries + 1):
+            try:
+                async with self._semaphore:
+                    async with session.post(self.url, json=body) as response:
+                        if response.status == 429 or response.status >= 500:
+                            raise RpcError(f"HTTP {response.status}: {(await response.text())[:200]}")
+                        status, text = response.status, await response.text()
+                break
+            except (RpcError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.retries:
+                    error = e if isinstance(e, RpcError) else RpcError(f"RPC request failed: {e}")
+                    return [error] * len(payload)
+                await asyncio.sleep(delay)
+                delay *= 2
+
+        try:
+            data = json.loads(text)
+        except ValueError:
+            # e.g. an HTML 403 from a gateway: not worth retrying.
+            return [RpcError(f"HTTP {status}: not a JSON-RPC reply: {text[:200]}")] * len(payload)
+        if isinstance(data, dict) and len(payload) > 1:
+            # A single error object for the whole batch: batching not supported.
+            error = data.get("error")
+            message = error.get("message", error) if isinstance(error, dict) else data
+            return [RpcError(f"Batch rejected (try a batch size of 1): {message}")] * len(payload)
+        replies = {reply.get("id"): reply for reply in (data if isinstance(data, list) else [data])
+                   if isinstance(reply, dict)}
+        results = []
+        for request in payload:
+            reply = replies.get(request["id"])
+            if reply is None:
+                results.append(RpcError("No reply for call"))
+            elif "error" in reply:
+                error = reply["error"]
+                results.append(RpcError(error.get("message", str(error)) if isinstance(error, dict) else str(error)))
+            else:
+                results.append(reply.get("result"))
+        return results
+
+
+def associated_token_address(owner: str, mint: str, token_program: str = TOKEN_PROGRAM) -> str:
+    """Associated token account of ``owner`` for ``mint``."""
+    address, _ = Pubkey.find_program_address(
+        [bytes(Pubkey.from_string(owner)), bytes(Pubkey.from_string(token_program)),
+         bytes(Pubkey.from_string(mint))],
+        Pubkey.from_string(ASSOCIATED_TOKEN_PROGRAM),
+    )
+    return str(address)
+
+
+def account_data(account: Dict[str, Any]) -> bytes:
+    """Raw bytes of an account fetched with ``encoding: base64``."""
+    data = account.get("data") or ["", "base64"]
+    return base64.b64decode(data[0])
+
+
+def mint_decimals(data: bytes) -> int:
+    # Mint layout: mint_authority (36) | supply u64 (8) | decimals u8 | ...
+    return data[44]
+
+
+def token_account_amount(data: bytes) -> int:
+    # Token account layout: mint (32) | owner (32) | amount u64 | ...
+    return int.from_bytes(data[64:72], "little")
+
+
+def ui_amount(amount: int, decimals: int) -> str:
+    value = Decimal(amount) / Decimal(10 ** decimals)
+    return f"{value:.{decimals}f}".rstrip("0").rstrip(".") if decimals else str(amount)
+
+
+async def get_multiple_accounts(
+    rpc: BatchRpcClient,
+    keys: Sequence[str],
+    commitment: str = "confirmed",
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Yield ``(key, account or None or RpcError)`` for every key, a chunk of
+    100 at a time as each batch returns (not in input order).
+
+    Malformed keys get their own RpcError up front instead of failing the
+    whole call they would have been sent in.
+    """
+    valid = []
+    for key in keys:
+        try:
+            Pubkey.from_string(key)
+        except ValueError:
+            yield key, RpcError(f"Invalid address: {key}")
+            continue
+        valid.append(key)
+    keys = valid
+    chunks = [list(keys[i:i + MAX_ACCOUNTS_PER_CALL]) for i in range(0, len(keys), MAX_ACCOUNTS_PER_CALL)]
+    calls = [("getMultipleAccounts", [chunk, {"encoding": "base64", "commitment": commitment}])
+             for chunk in chunks]
+    async for index, result in rpc.iter_many(calls):
+        chunk = chunks[index]
+        if isinstance(result, RpcError):
+            for key in chunk:
+                yield key, result
+            continue
+        for key, account in zip(chunk, result["value"]):
+            yield key, account
+
+
+async def fetch_mints(
+    rpc: BatchRpcClient,
+    mints: Iterable[str],
+    commitment: str = "confirmed",
+) -> Dict[str, Any]:
+    """``mint -> (token program, decimals)``, or an RpcError for mints that can't be used."""
+    found: Dict[str, Any] = {}
+    async for key, account in get_multiple_accounts(rpc, sorted(mints), commitment):
+        if isinstance(account, RpcError):
+            found[key] = account
+        elif account is None or account["owner"] not in (TOKEN_PROGRAM, TOKEN_2022_PROGRAM):
+            found[key] = RpcError("Not a token mint")
+        else:
+            found[key] = (account["owner"], mint_decimals(account_data(account)))
+    return found
+
+
+async def scan_balances(
+    rpc: BatchRpcClient,
+    pairs: Iterable[Tuple[str, str]],
+    commitment: str = "confirmed",
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Balances for ``(owner, mint)`` pairs; ``mint`` ``"SOL"`` means native SOL.
+
+    Token balances are those of the owner's associated token account (under
+    whichever token program owns the mint). Rows stream out as their RPC
+    batch completes: owner, mint, account, amount (raw), decimals,
+    ui_amount, or error.
+    """
+    pairs = list(dict.fromkeys(pairs))
+
+    # Round 1: every distinct mint, for its token program and decimals.
+    mints = await fetch_mints(rpc, {mint for _, mint in pairs if mint != NATIVE}, commitment)
+
+    # Round 2: the wallets (SOL) and associated token accounts.
+    wanted: Dict[str, List[Dict[str, Any]]] = {}
+    for owner, mint in pairs:
+        row: Dict[str, Any] = {"owner": owner, "mint": mint}
+        try:
+            if mint == NATIVE:
+                Pubkey.from_string(owner)
+                row.update(account=owner, decimals=9)
+            elif isinstance(mints.get(mint), RpcError):
+                raise mints[mint]
+            else:
+                program, decimals = mints[mint]
+                row.update(account=associated_token_address(owner, mint, program), decimals=decimals)
+        except (RpcError, ValueError) as e:
+            row["error"] = str(e) or "Invalid address"
+            yield row
+            continue
+        wanted.setdefault(row["account"], []).append(row)
+
+    async for key, account in get_multiple_accounts(rpc, list(wanted), commitment):
+        for row in wanted[key]:
+            if isinstance(account, RpcError):
+                row["error"] = str(account)
+            elif row["mint"] == NATIVE:
+                row["amount"] = account["lamports"] if account else 0
+            else:
+                row["amount"] = token_account_amount(account_data(account)) if account else 0
+            if "amount" in row:
+                row["ui_amount"] = ui_amount(row["amount"], row["decimals"])
+            yield row
+
+
+async def fetch_portfolio(
+    rpc: BatchRpcClient,
+    owner: str,
+    commitment: str = "confirmed",
+) -> Dict[str, Any]:
+    """
+    Every token account of ``owner`` under both token programs, plus SOL.
+
+    The three calls (getBalance and getTokenAccountsByOwner for Token and
+    Token-2022) go out as one JSON-RPC batch, and accounts are decoded from
+    raw base64 rather than asking the node to jsonParse each one.
+
+    Returns:
+        ``{"owner", "lamports", "tokens": [{"mint", "account", "program", "amount"}]}``
+    """
+    Pubkey.from_string(owner)
+    config = {"encoding": "base64", "commitment": commitment}
+    calls = [("getBalance", [owner, {"commitment": commitment}])] + [
+        ("getTokenAccountsByOwner", [owner, {"programId": program}, config])
+        for program in (TOKEN_PROGRAM, TOKEN_2022_PROGRAM)
+    ]
+    results = await rpc.call_batch(calls)
+    for result in results:
+        if isinstance(result, RpcError):
+            raise result
+
+    balance, *by_program = results
+    tokens = []
+    for program, accounts in zip((TOKEN_PROGRAM, TOKEN_2022_PROGRAM), by_program):
+        for entry in accounts["value"]:
+            data = account_data(entry["account"])
+            tokens.append({
+                "mint": str(Pubkey(data[0:32])),
+                "account": entry["pubkey"],
+                "program": "token-2022" if program == TOKEN_2022_PROGRAM else "token",
+                "amount": token_account_amount(data),
+            })
+    return {"owner": owner, "lamports": balance["value"], "tokens": tokens}
+
+
+async def fetch_mint_decimals(
+    rpc: BatchRpcClient,
+    mints: Sequence[str],
+    commitment: str = "confirmed",
+) -> Dict[str, int]:
+    """Decimals for each mint that exists, read from the mint accounts in bulk."""
+    found = await fetch_mints(rpc, mints, commitment)
+    return {mint: info[1] for mint, info in found.items() if not isinstance(info, RpcError)}
@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+"""
+Token Registry
+Usage: python3 token_registry.py <command> [args]
+
+Symbol and decimals lookup for any SPL mint, backed by an SQLite cache so
+each mint is looked up over the network once per machine. Unknown mints and
+symbols are resolved lazily from the Jupiter token API (decimals fall back
+to the mint account on chain), and cached entries are refreshed a batch at
+a time in the background once they are older than a day.
+
+Commands:
+  lookup <symbol_or_mint>...    Resolve tokens (fetching unknown ones)
+  list                          List cached tokens
+  refresh [--all]               Refresh stale (or all) cached entries now
+
+Usage as a module:
+    from token_registry import TokenRegistry
+    registry = TokenRegistry()               # seeded with TOKENS / TOKEN_DECIMALS
+    mint = registry.resolve("WIF")
+    registry.decimals(mint), registry.symbol(mint)
+
+Only the standard library is used.
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import threading
+import urllib.parse
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+DEFAULT_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "solana-skills", "tokens.db")
+JUPITER_TOKENS_API_URL = os.environ.get(
+    "JUPITER_TOKENS_API_URL", "https://api.jup.ag/tokens/v2")
+DEFAULT_RPC_URL = "https://api.mainnet-beta.solana.com"
+
+# Common token mints
+TOKENS = {
+    # Native
+    "SOL": "So11111111111111111111111111111111111111112",
+    # Stablecoins
+    "USDC": "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v",
+    "USDT": "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB",
+    "PYUSD": "2b1kV6DkPAnxd5ixfnxCpjxmKwqjjaYmCZfHsFu24GXo",
+    "USDS": "USDSwr9ApdHk5bvJKMjzff41FfuX8bSxdKcR81vTwcA",
+    "USDG": "2u1tszSeqZ3qBWF3uNGPFc8TzMk2tdiwknnRMWGWjGWH",
+    "USD1": "USD1ttGY1N17NEEHLmELoaybftRBUSErhqYiQzvEmuB",
+    "CASH": "CASHx9KJUStyftLFWGvEVf59SGeG9sh5FfcnZMVPCASH",
+    # Wrapped assets
+    "ETH": "7vfCXTUXx5WJV5JADk17DUJ4ksgau7utNKj4b963voxs",
+    "CBBTC": "cbbtcf3aa214zXHbiAZQwf4122FBYbraNdFqgw4iMij",
+    # LST
+    "JITOSOL": "J1toso1uCk3RLmjorhTtrVwY9HJ7X8V9yYac6Y7kGCPn",
+    # DeFi
+    "JUP": "JUPyiwrYJFskUPiHa7hkeR8VUtAeFoSYbKedZNsDvCN",
+    "JLP": "27G8MtK7VtTcCHkpASjSDdkWWYfoqT6ggEuKidVJidD4",
+    "RAY": "4k3Dyjzvzp8eMZWUXbBCjEvwSkkk59S5iCNLY3QrkX6R",
+    "PYTH": "HZ1JovNiVvGrGNiiYvEozEVgZ58xaU3RKwX8eACQBCt3",
+    # Memes
+    "PUMP": "pumpCmXqMfrsAkQ5r49WcJnRayYRqmXz6ae8H7H9Dfn",
+    "BONK": "DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263",
+    "FARTCOIN": "9BB6NFEcjBCtnNLFko2FqVQBq8HHM13kCyYcdQbgpump",
+    "TRUMP": "6p6xgHyF7AeE6TZkSmFsko444wqoP15icUSqi2jfGiPN",
+}
+
+# Token decimals
+TOKEN_DECIMALS = {
+    "So11111111111111111111111111111111111111112": 9,   # SOL
+    "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v": 6,  # USDC
+    "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB": 6,  # USDT
+    "2b1kV6DkPAnxd5ixfnxCpjxmKwqjjaYmCZfHsFu24GXo": 6,  # PYUSD
+    "USDSwr9ApdHk5bvJKMjzff41FfuX8bSxdKcR81vTwcA": 6,   # USDS
+    "2u1tszSeqZ3qBWF3uNGPFc8TzMk2tdiwknnRMWGWjGWH": 6,  # USDG
+    "USD1ttGY1N17NEEHLmELoaybftRBUSErhqYiQzvEmuB": 6,   # USD1
+    "CASHx9KJUStyftLFWGvEVf59SGeG9sh5FfcnZMVPCASH": 6,  # CASH
+    "7vfCXTUXx5WJV5JADk17DUJ4ksgau7utNKj4b963voxs": 8,  # ETH
+    "cbbtcf3aa214zXHbiAZQwf4122FBYbraNdFqgw4iMij": 8,   # cbBTC
+    "J1toso1uCk3RLmjorhTtrVwY9HJ7X8V9yYac6Y7kGCPn": 9,  # JitoSOL
+    "JUPyiwrYJFskUPiHa7hkeR8VUtAeFoSYbKedZNsDvCN": 6,   # JUP
+    "27G8MtK7VtTcCHkpASjSDdkWWYfoqT6ggEuKidVJidD4": 6,  # JLP
+    "4k3Dyjzvzp8eMZWUXbBCjEvwSkkk59S5iCNLY3QrkX6R": 6,  # RAY
+    "HZ1JovNiVvGrGNiiYvEozEVgZ58xaU3RKwX8eACQBCt3": 6,  # PYTH
+    "pumpCmXqMfrsAkQ5r49WcJnRayYRqmXz6ae8H7H9Dfn": 6,   # PUMP
+    "DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263": 5,  # BONK
+    "9BB6NFEcjBCtnNLFko2FqVQBq8HHM13kCyYcdQbgpump": 6,  # Fartcoin
+    "6p6xgHyF7AeE6TZkSmFsko444wqoP15icUSqi2jfGiPN": 6,  # TRUMP
+}
+
+
+# Jupiter's search takes up to 100 comma-separated mints per request.
+SEARCH_BATCH = 100
+
+
+class TokenRegistry:
+    """
+    Mint <-> symbol index with decimals, cached on disk.
+
+    Every known token is held in two in-memory dicts (by mint, by upper-case
+    symbol), so lookups are O(1); SQLite is only read once on open and
+    written when something new is learned. Seed tokens (the hard-coded
+    table) always win symbol lookups, so a look-alike token named "USDC"
+    can never shadow the real one.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tokens (
+            mint TEXT PRIMARY KEY,
+            symbol TEXT,
+            name TEXT,
+            decimals INTEGER,
+            verified INTEGER NOT NULL DEFAULT 0,
+            source TEXT NOT NULL,
+            updated REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS tokens_symbol ON tokens (symbol COLLATE NOCASE);
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_PATH,
+        seed_tokens: Optional[Dict[str, str]] = None,
+        seed_decimals: Optional[Dict[str, int]] = None,
+        api_key: Optional[str] = None,
+        rpc_url: Optional[str] = None,
+        max_age: float = 86400.0,
+        timeout: float = 10.0,
+    ):
+        """
+        Args:
+            path: SQLite cache file (created if missing)
+            seed_tokens: Trusted symbol -> mint table (default: TOKENS)
+            seed_decimals: Trusted mint -> decimals table (default: TOKEN_DECIMALS)
+            api_key: Jupiter API key (default: $JUPITER_API_KEY)
+            rpc_url: RPC endpoint for on-chain decimals (default: $SOLANA_RPC_URL or mainnet)
+            max_age: Seconds before a cached entry is refreshed
+            timeout: Seconds allowed per network lookup
+        """
+        self.path = path
+        self.api_key = api_key or os.environ.get("JUPITER_API_KEY")
+        self.rpc_url = rpc_url or os.environ.get("SOLANA_RPC_URL") or DEFAULT_RPC_URL
+        self.max_age = max_age
+        self.timeout = timeout
+        self._lock = threading.RLock()
+        self._by_mint: Dict[str, Dict[str, Any]] = {}
+        self._by_symbol: Dict[str, str] = {}
+        self._seeded: Dict[str, int] = {}       # seed mint -> position in the seed table
+        self._refresher: Optional[threading.Thread] = None
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30.0, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(self.SCHEMA)
+        for mint, symbol, name, decimals, verified, source, updated in self._db.execute(
+                "SELECT mint, symbol, name, decimals, verified, source, updated FROM tokens ORDER BY verified"):
+            self._index({"mint": mint, "symbol": symbol, "name": name, "decimals": decimals,
+                         "verified": bool(verified), "source": source, "updated": updated})
+
+        seed_tokens = TOKENS if seed_tokens is None else seed_tokens
+        seed_decimals = TOKEN_DECIMALS if seed_decimals is None else seed_decimals
+        for symbol, mint in seed_tokens.items():
+            self._index({"mint": mint, "symbol": symbol, "name": symbol,
+                         "decimals": seed_decimals.get(mint), "verified": True,
+                         "source": "builtin", "updated": time.time()})
+            self._seeded[mint] = len(self._seeded)
+
+    def __contains__(self, mint: str) -> bool:
+        return mint in self._by_mint
+
+    def resolve(self, mint_or_symbol: str) -> str:
+        """
+        Mint address for a symbol (case-insensitive) or mint; raises LookupError.
+
+        Symbols only resolve to verified tokens: anyone can mint a token
+        called USDC, so unverified look-alikes need their mint address.
+        """
+        upper = mint_or_symbol.upper()
+        with self._lock:
+            mint = self._by_symbol.get(upper)
+            if mint and self._by_mint[mint].get("verified"):
+                return mint
+        if _looks_like_mint(mint_or_symbol):
+            return mint_or_symbol
+        unverified = bool(mint)
+        for token in self._search(mint_or_symbol):
+            if (token.get("symbol") or "").upper() != upper:
+                continue
+            if not token.get("verified"):
+                unverified = True
+                continue
+            with self._lock:
+                holder = self._by_symbol.get(upper)
+                if holder and self._by_mint[holder].get("verified"):
+                    return holder
+            return token["mint"]
+        if unverified:
+            raise LookupError(f"No verified token with symbol {mint_or_symbol}; "
+                              f"pass its mint address instead")
+        raise LookupError(f"Unknown token symbol: {mint_or_symbol}")
+
+    def symbol(self, mint: str) -> Optional[str]:
+        """Symbol for a mint if known (no network lookup)."""
+        token = self._by_mint.get(mint)
+        return token["symbol"] if token else None
+
+    def decimals(self, mint: str) -> int:
+        """Decimals for a mint, looked up once and cached; raises LookupError."""
+        token = self._by_mint.get(mint)
+        if token and token.get("decimals") is not None:
+            return token["decimals"]
+        self._search(mint)
+        token = self._by_mint.get(mint)
+        if token and token.get("decimals") is not None:
+            return token["decimals"]
+        decimals = self._chain_decimals(mint)
+        self._save({"mint": mint, "decimals": decimals, "source": "chain"})
+        return decimals
+
+    def peek(self, mint: str) -> Optional[Dict[str, Any]]:
+        """Cached record for a mint (symbol, name, decimals, ...), without any lookup."""
+        token = self._by_mint.get(mint)
+        return dict(token) if token else None
+
+    def fetch(self, mints: List[str]) -> int:
+        """
+        Look many mints up on Jupiter, 100 per request, and cache them.
+
+        Returns:
+            How many of them were found
+        """
+        wanted = set(mints)
+        found = set()
+        for start in range(0, len(mints), SEARCH_BATCH):
+            batch = mints[start:start + SEARCH_BATCH]
+            found.update(t["mint"] for t in self._search(",".join(batch)) if t["mint"] in wanted)
+        return len(found)
+
+    def add(self, mint: str, decimals: Optional[int] = None, symbol: Optional[str] = None,
+            name: Optional[str] = None, source: str = "chain"):
+        """Record what is known about a mint; fields left None keep their cached values."""
+        self._save({"mint": mint, "decimals": decimals, "symbol": symbol, "name": name, "source": source})
+
+    def tokens(self) -> List[Dict[str, Any]]:
+        """Every known token: seed tokens in table order, then the rest by symbol."""
+        with self._lock:
+            tokens = list(self._by_mint.values())
+        last = len(self._seeded)
+        return sorted(tokens, key=lambda t: (self._seeded.get(t["mint"], last), (t["symbol"] or "").upper()))
+
+    def refresh(self, limit: Optional[int] = SEARCH_BATCH, everything: bool = False) -> int:
+        """
+        Re-fetch cached entries older than ``max_age``, stalest first.
+
+        Returns:
+            How many entries were refreshed
+        """
+        cutoff = time.time() if everything else time.time() - self.max_age
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT mint FROM tokens WHERE updated < ? ORDER BY updated"
+                + (" LIMIT ?" if limit else ""),
+                (cutoff, limit) if limit else (cutoff,),
+            ).fetchall()
+        mints = [mint for (mint,) in rows]
+        refreshed = 0
+        for start in range(0, len(mints), SEARCH_BATCH):
+            batch = mints[start:start + SEARCH_BATCH]
+            refreshed += len([t for t in self._search(",".join(batch)) if t["mint"] in batch])
+            # Mints Jupiter doesn't list: don't ask again until they're stale.
+            with self._lock:
+                self._db.execute(
+                    f"UPDATE tokens SET updated = ? WHERE updated < ? AND mint IN ({','.join('?' * len(batch))})",
+                    (time.time(), cutoff, *batch))
+        return refreshed
+
+    def refresh_in_background(self) -> Optional[threading.Thread]:
+        """Start one daemon thread refreshing a batch of stale entries; no-op if none."""
+        with self._lock:
+            if self._refresher is not None:
+                return self._refresher
+            stale = self._db.execute(
+                "SELECT 1 FROM tokens WHERE updated < ? LIMIT 1", (time.time() - self.max_age,)
+            ).fetchone()
+            if not stale:
+                return None
+            self._refresher = threading.Thread(
+                target=self._refresh_quietly, name="token-refresh", daemon=True)
+            self._refresher.start()
+            return self._refresher
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _refresh_quietly(self):
+        try:
+            self.refresh()
+        except Exception:
+            pass  # stale entries are still usable; try again next time
+
+    def _index(self, token: Dict[str, Any]):
+        mint = token["mint"]
+        old = self._by_mint.get(mint)
+        if mint in self._seeded and old is not None:
+            # Keep the built-in symbol; only fill in what the seed lacks.
+            token = {**token, "symbol": old["symbol"], "verified": True,
+                     "decimals": old["decimals"] if old["decimals"] is not None else token["decimals"]}
+        if old and old.get("symbol") and self._by_symbol.get(old["symbol"].upper()) == mint:
+            del self._by_symbol[old["symbol"].upper()]
+        self._by_mint[mint] = token
+        symbol = (token.get("symbol") or "").upper()
+        if not symbol:
+            return
+        holder = self._by_symbol.get(symbol)
+        holder_token = self._by_mint.get(holder) if holder else None
+        # Symbols aren't unique: seeds beat lookups, verified beats unverified.
+        if holder_token is None or holder == mint or (
+                holder not in self._seeded
+                and token.get("verified") >= holder_token.get("verified", False)):
+            self._by_symbol[symbol] = mint
+
+    def _save(self, token: Dict[str, Any]):
+        with self._lock:
+            # Merge: a lookup that only learned decimals mustn't erase the symbol.
+            old = self._by_mint.get(token["mint"]) or {"verified": False}
+            token = {**old, **{k: v for k, v in token.items() if v is not None}, "updated": time.time()}
+            self._db.execute(
+                "INSERT INTO tokens (mint, symbol, name, decimals, verified, source, updated)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (mint) DO UPDATE SET symbol = excluded.symbol, name = excluded.name,"
+                " decimals = excluded.decimals, verified = excluded.verified,"
+                " source = excluded.source, updated = excluded.updated",
+                (token["mint"], token.get("symbol"), token.get("name"), token.get("decimals"),
+                 int(bool(token.get("verified"))), token["source"], token["updated"]),
+            )
+            self._index(token)
+
+    def _search(self, query: str) -> List[Dict[str, Any]]:
+        """Look tokens up on Jupiter (by symbol, name or comma-separated mints) and cache them."""
+        url = f"{JUPITER_TOKENS_API_URL}/search?" + urllib.parse.urlencode({"query": query})
+        headers = {"Accept": "application/json"}
+        if self.api_key:
+            headers["x-api-key"] = self.api_key
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, headers=headers),
+                                        timeout=self.timeout) as response:
+                results = json.load(response)
+        except (OSError, ValueError):
+            return []
+        tokens = []
+        for item in results if isinstance(results, list) else []:
+            if not item.get("id"):
+                continue
+            token = {"mint": item["id"], "symbol": item.get("symbol"), "name": item.get("name"),
+                     "decimals": item.get("decimals"), "verified": bool(item.get("isVerified")),
+                     "source": "jupiter"}
+            self._save(token)
+            tokens.append(token)
+        return tokens
+
+    def _chain_decimals(self, mint: str) -> int:
+        payload = {"jsonrpc": "2.0", "id": 1, "method": "getAccountInfo",
+                   "params": [mint, {"encoding": "jsonParsed"}]}
+        request = urllib.request.Request(
+            self.rpc_url, data=json.dumps(payload).encode(),
+            headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                value = json.load(response).get("result", {}).get("value")
+        except (OSError, ValueError) as e:
+            raise LookupError(f"Could not look up decimals for {mint}: {e}")
+        parsed = (value or {}).get("data", {})
+        if not isinstance(parsed, dict) or parsed.get("parsed", {}).get("type") != "mint":
+            raise LookupError(f"{mint} is not a token mint")
+        return int(parsed["parsed"]["info"]["decimals"])
+
+
+def _looks_like_mint(value: str) -> bool:
+    # Base58 public keys are 32-44 characters; symbols are much shorter.
+    return 32 <= len(value) <= 44 and value.isalnum()
+
+
+def cmd_lookup(args, registry: TokenRegistry):
+    for query in args.tokens:
+        try:
+            mint = registry.resolve(query)
+            decimals = registry.decimals(mint)
+        except LookupError as e:
+            print(f"  {query}: ❌ {e}")
+            continue
+        print(f"  {registry.symbol(mint) or '?':<10} {mint:<46} {decimals}")
+
+
+def cmd_list(args, registry: TokenRegistry):
+    tokens = registry.tokens()
+    print(f"◎ {len(tokens)} tokens in {registry.path}:\n")
+    print(f"  {'Symbol':<10} {'Mint Address':<46} {'Decimals':<8} {'Source'}")
+    print(f"  {'-'*10} {'-'*46} {'-'*8} {'-'*8}")
+    for token in tokens:
+        decimals = token["decimals"] if token["decimals"] is not None else "?"
+        print(f"  {token['symbol'] or '?':<10} {token['mint']:<46} {decimals!s:<8} {token['source']}")
+
+
+def cmd_refresh(args, registry: TokenRegistry):
+    start = time.time()
+    refreshed = registry.refresh(limit=None, everything=args.all)
+    print(f"◎ Refreshed {refreshed} tokens in {time.time() - start:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solana token registry")
+    parser.add_argument("--db", default=DEFAULT_PATH, help="Cache file (default: %(default)s)")
+    subparsers = parser.add_subparsers(dest="command", help="Command to run")
+
+    lookup_parser = subparsers.add_parser("lookup", help="Resolve symbols or mints")
+    lookup_parser.add_argument("tokens", nargs="+")
+    lookup_parser.set_defaults(func=cmd_lookup)
+
+    subparsers.add_parser("list", help="List cached tokens").set_defaults(func=cmd_list)
+
+    refresh_parser = subparsers.add_parser("refresh", help="Refresh stale cached entries")
+    refresh_parser.add_argument("--all", action="store_true", help="Refresh every entry")
+    refresh_parser.set_defaults(func=cmd_refresh)
+
+    args = parser.parse_args()
+
+    if not args.command:
+        parser.print_help()
+        sys.exit(1)
+
+    registry = TokenRegistry(args.db)
+    try:
+        args.func(args, registry)
+    finally:
+        registry.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,12 +9,19 @@ Commands:
   token-balance <mint> [--owner]   Check SPL token balance
   send <recipient> <amount>        Send SOL
   send-token <mint> <to> <amount>  Send SPL token
+  balances <file> [--mint M]       SOL/token balances for many wallets
+  portfolio [--owner]              Every SOL, SPL and Token-2022 holding
 """
 
 import os
 import sys
+import csv
+import json
+import time
+import asyncio
 import argparse
 from decimal import Decimal
+from typing import TYPE_CHECKING
 
 try:
     import base58
@@ -34,6 +41,12 @@ except ImportError as e:
     print("Run: pip install solana solders spl-token base58")
     sys.exit(1)
 
+from solana_rpc import (NATIVE, BatchRpcClient, RpcError, fetch_mint_decimals, fetch_portfolio,
+                        scan_balances, ui_amount)
+
+if TYPE_CHECKING:
+    from token_registry import TokenRegistry
+
 
 # Network RPC endpoints
 NETWORKS = {
@@ -64,10 +77,14 @@ def get_keypair() -> Keypair:
         sys.exit(1)
 
 
+def get_rpc_url(network: str = "mainnet") -> str:
+    """RPC endpoint: $SOLANA_RPC_URL, else the network's public endpoint."""
+    return os.environ.get("SOLANA_RPC_URL") or NETWORKS.get(network, NETWORKS["mainnet"])
+
+
 def get_client(network: str = "mainnet") -> Client:
     """Get Solana RPC client."""
-    rpc_url = os.environ.get("SOLANA_RPC_URL") or NETWORKS.get(network, NETWORKS["mainnet"])
-    return Client(rpc_url)
+    return Client(get_rpc_url(network))
 
 
 def cmd_address(args):
@@ -352,6 +369,261 @@ def cmd_send_token(args):
         sys.exit(1)
 
 
+def read_balance_pairs(path: str, mints: list, registry: "TokenRegistry") -> list:
+    """
+    (owner, mint) pairs from a file of lines ``owner [mint ...]``.
+
+    Mints may be symbols or "SOL"; a line without mints gets ``mints``
+    (default: SOL). Blank lines and ``#`` comments are skipped.
+    """
+    pairs = []
+    with (sys.stdin if path == "-" else open(path)) as f:
+        for line in f:
+            fields = line.split("#", 1)[0].replace(",", " ").split()
+            if not fields:
+                continue
+            owner, line_mints = fields[0], fields[1:] or mints or [NATIVE]
+            for mint in line_mints:
+                if mint.upper() == NATIVE:
+                    pairs.append((owner, NATIVE))
+                else:
+                    pairs.append((owner, registry.resolve(mint)))
+    return pairs
+
+
+def cmd_balances(args):
+    """SOL and token balances for many wallets, streamed as CSV or JSONL."""
+    from token_registry import TokenRegistry
+
+    registry = TokenRegistry()
+    try:
+        pairs = read_balance_pairs(args.file, args.mint or [], registry)
+    except (OSError, LookupError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    fields = ["owner", "mint", "symbol", "amount", "ui_amount", "decimals", "account", "error"]
+    writer = csv.DictWriter(out, fieldnames=fields, extrasaction="ignore") if args.format == "csv" else None
+    if writer:
+        writer.writeheader()
+
+    async def scan():
+        rows = errors = 0
+        async with BatchRpcClient(get_rpc_url(args.network), concurrency=args.concurrency,
+                                  batch_size=args.rpc_batch) as rpc:
+            async for row in scan_balances(rpc, pairs):
+                row["symbol"] = NATIVE if row["mint"] == NATIVE else registry.symbol(row["mint"])
+                if writer:
+                    writer.writerow(row)
+                else:
+                    out.write(json.dumps(row) + "\n")
+                rows += 1
+                errors += "error" in row
+                if rows % 100 == 0:
+                    out.flush()
+        return rows, errors
+
+    start = time.time()
+    try:
+        rows, errors = asyncio.run(scan())
+    except (RpcError, LookupError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        registry.close()
+    # Summary on stderr so stdout stays machine-readable.
+    print(f"◎ {rows} balances ({errors} errors) in {time.time() - start:.1f}s", file=sys.stderr)
+
+
+async def portfolio_snapshot(rpc: BatchRpcClient, owner: str, registry: "TokenRegistry") -> dict:
+    """
+    Full holdings of ``owner``, joined with symbols and decimals.
+
+    One round trip fetches SOL and every Token/Token-2022 account; a second
+    is only made for mints the token registry hasn't seen, reading their
+    decimals on chain while Jupiter is asked for their symbols.
+    """
+    snapshot = await fetch_portfolio(rpc, owner)
+    mints = sorted({t["mint"] for t in snapshot["tokens"]})
+    unknown = [m for m in mints if (registry.peek(m) or {}).get("decimals") is None]
+    if unknown:
+        decimals, _ = await asyncio.gather(
+            fetch_mint_decimals(rpc, unknown),
+            asyncio.to_thread(registry.fetch, unknown),
+        )
+        for mint, value in decimals.items():
+            registry.add(mint, decimals=value)
+
+    for token in snapshot["tokens"]:
+        known = registry.peek(token["mint"]) or {}
+        token["symbol"] = known.get("symbol")
+        token["decimals"] = known.get("decimals")
+        if token["decimals"] is not None:
+            token["ui_amount"] = ui_amount(token["amount"], token["decimals"])
+    snapshot["sol"] = ui_amount(snapshot["lamports"], 9)
+    snapshot["tokens"].sort(key=lambda t: (t["amount"] == 0, (t["symbol"] or "~").upper(), t["mint"]))
+    return snapshot
+
+
+def cmd_portfolio(args):
+    """Snapshot of every SOL, SPL and Token-2022 holding of a wallet."""
+    from token_registry import TokenRegistry
+
+    owner = args.owner or str(get_keypair().pubkey())
+    registry = TokenRegistry()
+
+    async def snapshot():
+        async with BatchRpcClient(get_rpc_url(args.network)) as rpc:
+            return await portfolio_snapshot(rpc, owner, registry)
+
+    start = time.time()
+    try:
+        portfolio = asyncio.run(snapshot())
+    except Exception as e:
+        print(f"Error fetching portfolio: {e}")
+        sys.exit(1)
+    finally:
+        registry.close()
+    elapsed = time.time() - start
+
+    if not args.all:
+        portfolio["tokens"] = [t for t in portfolio["tokens"] if t["amount"]]
+
+    if args.json:
+        print(json.dumps(portfolio, indent=2))
+        return
+
+    print(f"◎ Owner: {owner}")
+    print(f"◎ Network: {args.network}")
+    print(f"◎ SOL: {portfolio['sol']}\n")
+    print(f"  {'Symbol':<10} {'Balance':>24}  {'Mint':<44}  {'Program'}")
+    print(f"  {'-'*10} {'-'*24}  {'-'*44}  {'-'*10}")
+    for token in portfolio["tokens"]:
+        balance = token.get("ui_amount") or f"{token['amount']} raw"
+        print(f"  {token['symbol'] or '?':<10} {balance:>24}  {token['mint']:<44}  {token['program']}")
+    print(f"\n◎ {len(portfolio['tokens'])} token accounts in {elapsed:.2f}s")
+
+
+def cmd_batch_send(args):
+    """Pay every row of a recipients CSV, packed into as few transactions as fit."""
+    from payouts import LAMPORTS_PER_SIGNATURE, PayoutEngine, PayoutLog, estimate_fees, read_payouts
+    from lookup_tables import EXTEND_CHUNK, LookupTables, table_rent
+    from token_registry import TokenRegistry
+
+    keypair = get_keypair()
+    registry = TokenRegistry()
+    try:
+        default_mint = NATIVE if args.mint.upper() == NATIVE else registry.resolve(args.mint)
+        payouts = read_payouts(args.file, default_mint)
+        for payout in payouts:
+            if payout.mint != NATIVE:
+                payout.mint = registry.resolve(payout.mint)
+    except (OSError, ValueError, LookupError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    finally:
+        registry.close()
+
+    results = args.results or f"{args.file}.results.jsonl"
+    log = PayoutLog(results)
+
+    def progress(events):
+        for event in events:
+            if event["event"] != "sent":
+                detail = event.get("error") or event.get("signature")
+                print(f"  row {event['row']:>5}  {event['event']:<9} {event['recipient']}  {detail}")
+
+    async def run(engine):
+        if not args.dry_run:
+            return await engine.run(payouts, retries=args.retries, retry_failed=args.retry_failed)
+        done = engine.log.replay()
+        todo = [p for p in payouts if p.key not in done]
+        groups, invalid = await engine.prepare(todo)
+        for payout in invalid:
+            print(f"❌ Row {payout.key}: {payout.error}")
+        added = created = 0
+        if engine.lookup_tables is not None:
+            await engine.lookup_tables.load()
+            engine.tables, added, created = engine.lookup_tables.plan(engine.lookup_addresses(groups))
+        transactions = engine.pack(groups)
+        for i, tx_groups in enumerate(transactions, 1):
+            size = engine.transaction_size(tx_groups)
+            creates = sum(len(g.creates) for g in tx_groups)
+            print(f"  tx {i:>4}: {len(tx_groups)} transfers, {creates} new token accounts, {size} bytes")
+        summary = estimate_fees(engine, transactions)
+        summary["lookup_addresses"] = added
+        summary["rent"] += table_rent(added, created)
+        summary["signature_fees"] += LAMPORTS_PER_SIGNATURE * -(-added // EXTEND_CHUNK)
+        return summary
+
+    async def main_async():
+        async with BatchRpcClient(get_rpc_url(args.network), concurrency=args.concurrency) as rpc:
+            tables = LookupTables(rpc, keypair) if args.lookup_tables else None
+            engine = PayoutEngine(rpc, keypair, log, max_per_tx=args.max_per_tx,
+                                  priority_fee=args.priority_fee, on_event=progress,
+                                  lookup_tables=tables)
+            return await run(engine)
+
+    print(f"◎ Sender: {keypair.pubkey()}")
+    print(f"◎ Rows: {len(payouts)}")
+    print(f"◎ Results: {results}\n")
+    start = time.time()
+    try:
+        summary = asyncio.run(main_async())
+    except (ValueError, RuntimeError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    finally:
+        log.close()
+
+    if args.dry_run:
+        print(f"\n◎ {summary['transactions']} transactions, {summary['token_accounts']} token accounts to create")
+        if args.lookup_tables:
+            print(f"◎ {summary['lookup_addresses']} addresses to add to lookup tables")
+        print(f"◎ Estimated cost: {ui_amount(summary['signature_fees'] + summary['rent'], 9)} SOL "
+              f"(fees {ui_amount(summary['signature_fees'], 9)}, rent {ui_amount(summary['rent'], 9)})")
+        return
+
+    counts = ", ".join(f"{n} {state}" for state, n in sorted(summary.items()))
+    ok = summary.get("confirmed", 0) == len(payouts)
+    print(f"\n{'✅' if ok else '❌'} {counts} in {time.time() - start:.1f}s")
+    if not ok:
+        print("◎ Re-run the same command to resume (add --retry-failed to retry failed rows)")
+        sys.exit(1)
+
+
+def cmd_lookup_tables(args):
+    """List the address lookup tables batch-send has created for this wallet."""
+    from lookup_tables import LookupTables, table_rent
+
+    keypair = get_keypair()
+
+    async def load():
+        async with BatchRpcClient(get_rpc_url(args.network)) as rpc:
+            return await LookupTables(rpc, keypair).load()
+
+    try:
+        tables = asyncio.run(load())
+    except Exception as e:
+        print(f"Error loading lookup tables: {e}")
+        sys.exit(1)
+
+    print(f"◎ Authority: {keypair.pubkey()}")
+    print(f"◎ Network: {args.network}\n")
+    if not tables:
+        print("No lookup tables yet (batch-send --lookup-tables creates them)")
+        return
+    for table in tables:
+        print(f"  {table.key:<44}  {len(table.addresses):>3} addresses  "
+              f"{ui_amount(table_rent(len(table.addresses)), 9)} SOL rent")
+    total = sum(len(t.addresses) for t in tables)
+    print(f"\n◎ {len(tables)} tables, {total} addresses, "
+          f"{ui_amount(table_rent(total, len(tables)), 9)} SOL rent")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Solana Wallet Operations",
@@ -364,6 +636,12 @@ Examples:
   wallet.py token-balance <mint>        Check token balance
   wallet.py send <recipient> 0.1        Send 0.1 SOL
   wallet.py send-token <mint> <to> 10   Send 10 tokens
+  wallet.py balances wallets.txt -m SOL -m USDC -f jsonl
+                                        Balances for every wallet in a file
+  wallet.py portfolio                   Every token you hold
+  wallet.py batch-send payroll.csv --mint USDC --dry-run
+                                        Plan a bulk payout from a CSV
+  wallet.py lookup-tables               Lookup tables used by batch-send
         """
     )
     
@@ -404,6 +682,50 @@ Examples:
     send_tok_parser.add_argument("amount", help="Amount of tokens")
     send_tok_parser.set_defaults(func=cmd_send_token)
     
+    # balances command
+    bals_parser = subparsers.add_parser("balances", help="Balances for many wallets at once")
+    bals_parser.add_argument("file", help="File of 'owner [mint ...]' lines ('-' for stdin)")
+    bals_parser.add_argument("--mint", "-m", action="append",
+                             help="Mint or symbol for lines that list none (repeatable; default: SOL)")
+    bals_parser.add_argument("--format", "-f", choices=["csv", "jsonl"], default="csv",
+                             help="Output format (default: csv)")
+    bals_parser.add_argument("--output", "-O", help="Write here instead of stdout")
+    bals_parser.add_argument("--concurrency", "-j", type=int, default=4,
+                             help="RPC requests in flight (default: 4)")
+    bals_parser.add_argument("--rpc-batch", type=int, default=10,
+                             help="JSON-RPC calls per HTTP request; 1 if your RPC refuses batches (default: 10)")
+    bals_parser.set_defaults(func=cmd_balances)
+    
+    # portfolio command
+    port_parser = subparsers.add_parser("portfolio", help="All SOL, SPL and Token-2022 holdings")
+    port_parser.add_argument("--owner", "-o", help="Owner address (default: your wallet)")
+    port_parser.add_argument("--all", "-a", action="store_true", help="Include empty token accounts")
+    port_parser.add_argument("--json", action="store_true", help="Print the snapshot as JSON")
+    port_parser.set_defaults(func=cmd_portfolio)
+    
+    # batch-send command
+    batch_parser = subparsers.add_parser("batch-send", help="Pay many recipients from a CSV")
+    batch_parser.add_argument("file", help="CSV with recipient,amount[,mint] columns")
+    batch_parser.add_argument("--mint", "-m", default=NATIVE,
+                              help="Mint or symbol for rows without one (default: SOL)")
+    batch_parser.add_argument("--results", "-r", help="Per-row results log (default: <file>.results.jsonl)")
+    batch_parser.add_argument("--max-per-tx", type=int, help="Transfers per transaction (default: as many as fit)")
+    batch_parser.add_argument("--priority-fee", type=int, help="Compute unit price in micro-lamports")
+    batch_parser.add_argument("--retries", type=int, default=2,
+                              help="Times to re-send transactions that expired (default: 2)")
+    batch_parser.add_argument("--retry-failed", action="store_true",
+                              help="Also retry rows that failed in an earlier run")
+    batch_parser.add_argument("--concurrency", "-j", type=int, default=4,
+                              help="RPC requests in flight (default: 4)")
+    batch_parser.add_argument("--lookup-tables", "-L", action="store_true",
+                              help="Address recipients through lookup tables (for recipients paid again and again)")
+    batch_parser.add_argument("--dry-run", action="store_true", help="Show the transactions and cost, send nothing")
+    batch_parser.set_defaults(func=cmd_batch_send)
+    
+    # lookup-tables command
+    alt_parser = subparsers.add_parser("lookup-tables", help="List your address lookup tables")
+    alt_parser.set_defaults(func=cmd_lookup_tables)
+    
     args = parser.parse_args()
     
     if not args.command: